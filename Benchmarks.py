@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+import timeit
+
+from Game import CAPTURE_IN, COMMAND_VOCABULARY, JSON_CODECS, CommandEncoder, UARTCommunication, UARTPool, WireRecorder
+
+
+def report(name, seconds, number):
+    """Print the per-call cost of a benchmark in microseconds"""
+    print(f"{name:<40} {seconds / number * 1e6:8.3f} us/op")
+
+
+def bench_encoder(args):
+    """Compare the precomputed command encoder with per-send json.dumps"""
+    encoder = CommandEncoder()
+    commands = COMMAND_VOCABULARY
+
+    def generic():
+        for message in commands:
+            (json.dumps(message) + "\n").encode()
+
+    def cached():
+        for message in commands:
+            encoder.encode(message)
+
+    number = args.number
+    ops = number * len(commands)
+    generic_time = timeit.timeit(generic, number=number)
+    cached_time = timeit.timeit(cached, number=number)
+    report("encode: json.dumps + encode", generic_time, ops)
+    report("encode: CommandEncoder (cached)", cached_time, ops)
+    print(f"{'encode: speedup':<40} {generic_time / cached_time:8.1f}x")
+
+
+# Frames exactly as TicTacToeHW.ino emits them (ArduinoJson output plus println)
+BOARD_FRAME = b'{"type":"board","board":[["X","O"," "],[" ","X"," "],["O"," ","X"]]}'
+STATUS_FRAME = b'{"type":"win_status","message":"Player X wins!"}'
+
+
+def bench_codecs(args):
+    """Compare the installed JSON backends on real board and status frames"""
+    number = args.number
+    samples = {"board": BOARD_FRAME, "status": STATUS_FRAME}
+    for name, codec_class in JSON_CODECS.items():
+        if not codec_class.available():
+            print(f"{'codec: ' + name:<40} not installed")
+            continue
+        codec = codec_class()
+        for label, frame in samples.items():
+            seconds = timeit.timeit(lambda: codec.loads(frame), number=number)
+            report(f"codec: {name} loads {label}", seconds, number)
+        message = codec.loads(BOARD_FRAME)
+        seconds = timeit.timeit(lambda: codec.dumps(message), number=number)
+        report(f"codec: {name} dumps board", seconds, number)
+
+
+def bench_link(args):
+    """Measure PING round trips at 9600 baud and after negotiating --baudrate"""
+    if not args.port:
+        print(f"{'link':<40} skipped (needs --port)")
+        return
+    uart = UARTCommunication()
+    status = uart.open_port(args.port)
+    if not status.startswith("Connected"):
+        print(f"{'link':<40} {status}")
+        return
+    try:
+        uart.wait_for_message(lambda m: isinstance(m, dict) and m.get("type") == "info", timeout=3)
+        results = [uart.measure_link(args.pings)]
+        if uart.negotiate_baud(args.baudrate):
+            results.append(uart.measure_link(args.pings))
+        else:
+            print(f"{'link':<40} negotiation to {args.baudrate} baud failed")
+        for result in results:
+            rtt = "n/a" if result["rtt_ms"] is None else f"{result['rtt_ms']:.2f} ms"
+            print(f"{'link: ' + str(result['baud']) + ' baud':<40} rtt {rtt}, "
+                  f"{result['bytes_per_second']:.0f} B/s, lost {result['lost']}")
+    finally:
+        uart.close_port()
+
+
+def bench_pool(args):
+    """Push board frames through one UARTPool serving --ports pseudo-terminals"""
+    if not hasattr(os, "openpty"):
+        print(f"{'pool':<40} skipped (needs POSIX pseudo-terminals)")
+        return
+    ptys = [os.openpty() for _ in range(args.ports)]
+    received = [0]
+    done = threading.Event()
+    total = args.ports * args.frames
+
+    def callback(port, message):
+        received[0] += 1
+        if received[0] == total:
+            done.set()
+
+    pool = UARTPool()
+    try:
+        for _, slave in ptys:
+            pool.open_port(os.ttyname(slave), callback=callback)
+        pool.start()
+        frame = BOARD_FRAME + b"\r\n"
+        started = time.perf_counter()
+        for _ in range(args.frames):
+            for master, _ in ptys:
+                os.write(master, frame)
+        done.wait(60)
+        elapsed = time.perf_counter() - started
+        print(f"{'pool: ' + str(args.ports) + ' ports':<40} {received[0] / elapsed:8.0f} frames/s "
+              f"({received[0]}/{total} received)")
+    finally:
+        pool.stop()
+        for master, slave in ptys:
+            os.close(master)
+            os.close(slave)
+
+
+def bench_replay(args):
+    """Parse a wire capture (--capture, or a synthetic one) at maximum replay speed"""
+    path = args.capture
+    if not path:
+        path = os.path.join(tempfile.gettempdir(), "replay_benchmark.cap")
+        recorder = WireRecorder(path)
+        try:
+            for _ in range(args.frames * 50):
+                recorder.record(CAPTURE_IN, BOARD_FRAME + b"\r\n" + STATUS_FRAME + b"\r\n")
+        finally:
+            recorder.close()
+    uart = UARTCommunication()
+    status = uart.open_replay(path, speed=args.speed)
+    if not status.startswith("Connected"):
+        print(f"{'replay':<40} {status}")
+        return
+    try:
+        received = 0
+        started = time.perf_counter()
+        while not uart.ser.finished:
+            received += len(uart.receive_messages())
+        elapsed = time.perf_counter() - started
+        print(f"{'replay: ' + os.path.basename(path):<40} {received / elapsed:8.0f} messages/s "
+              f"({received} messages, {uart.stats()['parse_errors']} parse errors)")
+    finally:
+        uart.close_port()
+        if not args.capture:
+            os.remove(path)
+
+
+BENCHMARKS = {
+    "encoder": bench_encoder,
+    "codecs": bench_codecs,
+    "link": bench_link,
+    "pool": bench_pool,
+    "replay": bench_replay,
+}
+
+
+def parse_arguments():
+    """Parse command-line arguments for the benchmark selection"""
+    parser = argparse.ArgumentParser(description="Host-side microbenchmarks for the TicTacToe UART stack.")
+    parser.add_argument("names", nargs="*",
+                        help=f"Benchmarks to run: {', '.join(BENCHMARKS)} (default: all).")
+    parser.add_argument("--number", type=int, default=20000, help="Iterations per benchmark.")
+    parser.add_argument("--port", type=str, help="Serial port of a board for the link benchmark.")
+    parser.add_argument("--baudrate", type=int, default=115200, help="Baud rate to negotiate for the link benchmark.")
+    parser.add_argument("--pings", type=int, default=50, help="Round trips per link measurement.")
+    parser.add_argument("--ports", type=int, default=200, help="Pseudo-terminals for the pool benchmark.")
+    parser.add_argument("--frames", type=int, default=20, help="Frames per port for the pool benchmark.")
+    parser.add_argument("--capture", type=str, help="Wire capture for the replay benchmark (default: synthetic).")
+    parser.add_argument("--speed", type=float, default=0, help="Replay speed factor; 0 replays as fast as possible.")
+    args = parser.parse_args()
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+    return args
+
+
+def main():
+    """Main function to run the selected benchmarks"""
+    args = parse_arguments()
+    for name in args.names or BENCHMARKS:
+        BENCHMARKS[name](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,47 +1,3729 @@
 # -*- coding: utf-8 -*-
 
+import asyncio
+import bisect
+import collections
+import concurrent.futures
+import queue
+import selectors
+import socket
+import struct
 import threading
+import time
 import serial
 import serial.tools.list_ports
 import json
+import os
 import tkinter as tk
 from tkinter import ttk, scrolledtext
 from tkinter import messagebox
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+try:
+    import simdjson
+except ImportError:
+    simdjson = None
+
+
+class JsonCodec:
+    """
+    JSON codec backed by the standard library `json` module.
+
+    Codecs encode to and decode from `bytes`, so frames never need a separate
+    `.decode()` copy. Faster backends subclass this one and share its name
+    based registry in JSON_CODECS.
+    """
+    name = "json"
+
+    @staticmethod
+    def available():
+        """
+        Returns True if the backend can be used in this interpreter.
+        """
+        return True
+
+    def dumps(self, obj):
+        """
+        Serializes an object to JSON bytes.
+        """
+        return json.dumps(obj).encode()
+
+    def loads(self, data):
+        """
+        Parses JSON from bytes or str; raises ValueError on invalid input.
+        """
+        return json.loads(data)
+
+
+class OrjsonCodec(JsonCodec):
+    """
+    JSON codec backed by orjson.
+    """
+    name = "orjson"
+
+    @staticmethod
+    def available():
+        return orjson is not None
+
+    def dumps(self, obj):
+        return orjson.dumps(obj)
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+
+class SimdjsonCodec(JsonCodec):
+    """
+    JSON codec that decodes with pysimdjson and encodes with the stdlib.
+    """
+    name = "simdjson"
+
+    def __init__(self):
+        self._parser = simdjson.Parser() if simdjson is not None else None
+
+    @staticmethod
+    def available():
+        return simdjson is not None
+
+    def loads(self, data):
+        if isinstance(data, str):
+            data = data.encode()
+        # the parser reuses its buffers, so materialize the result before the next call
+        return self._parser.parse(data, True)
+
+
+class UjsonCodec(JsonCodec):
+    """
+    JSON codec backed by ujson.
+    """
+    name = "ujson"
+
+    @staticmethod
+    def available():
+        return ujson is not None
+
+    def dumps(self, obj):
+        return ujson.dumps(obj, ensure_ascii=False).encode()
+
+    def loads(self, data):
+        return ujson.loads(data)
+
+
+JSON_CODECS = {codec.name: codec for codec in (OrjsonCodec, SimdjsonCodec, UjsonCodec, JsonCodec)}
+
+
+def get_codec(name=None):
+    """
+    Returns a JSON codec instance.
+
+    Parameters
+    ----------
+    name : str or JsonCodec, optional
+        Backend name from JSON_CODECS or a ready codec instance; None picks
+        the fastest installed backend, falling back to the stdlib.
+
+    Returns
+    -------
+    JsonCodec
+        The selected codec.
+
+    Raises
+    ------
+    ValueError
+        If the named backend is unknown or not installed.
+    """
+    if isinstance(name, JsonCodec):
+        return name
+    if name is None:
+        for codec in JSON_CODECS.values():
+            if codec.available():
+                return codec()
+    codec = JSON_CODECS.get(name)
+    if codec is None or not codec.available():
+        raise ValueError(f"JSON codec not available: {name}")
+    return codec()
+
+
+def _parse_frame(frame, codec):
+    """
+    Parses one raw frame into a JSON message.
+
+    Returns
+    -------
+    dict or str or None
+        Parsed message, an error message, or None for blank lines.
+    """
+    try:
+        if not frame.strip():
+            return None
+        return codec.loads(frame)
+    except ValueError:
+        return "Error: Invalid JSON received"
+    except Exception as e:
+        return f"Error: {e}"
+
+
+def _build_command_vocabulary():
+    """
+    Builds every command the host sends routinely: nine MOVEs, three MODEs,
+    RESET, BOARD and PING.
+
+    Returns
+    -------
+    list of dict
+        The command messages, with keys in the order the senders use.
+    """
+    vocabulary = [{"command": "MOVE", "row": row, "col": col} for row in range(3) for col in range(3)]
+    vocabulary += [{"command": "MODE", "mode": mode} for mode in range(3)]
+    vocabulary.append({"command": "RESET"})
+    vocabulary.append({"command": "BOARD"})
+    vocabulary.append({"command": "PING"})
+    return vocabulary
+
+
+COMMAND_VOCABULARY = _build_command_vocabulary()
+
+
+class CommandEncoder:
+    """
+    Encodes outbound commands into ready-to-write frames.
+
+    Commands from a fixed vocabulary are serialized once, when the encoder is
+    created; sending one of them is a single dictionary lookup. Anything else
+    falls back to generic JSON encoding.
+    """
+    def __init__(self, vocabulary=COMMAND_VOCABULARY, codec=None):
+        """
+        Precomputes the frames for a command vocabulary.
+
+        Parameters
+        ----------
+        vocabulary : iterable of dict, optional
+            Commands to pre-serialize (default is COMMAND_VOCABULARY).
+        codec : JsonCodec, optional
+            Codec used for serialization (default is the stdlib codec).
+        """
+        self.codec = codec or JsonCodec()
+        self._cache = {tuple(message.items()): self.encode_generic(message) for message in vocabulary}
+        # the bytes the codec puts between a command's last field and an "id" value
+        base = self.codec.dumps({"command": ""})
+        self._id_separator = self.codec.dumps({"command": "", "id": 0})[len(base) - 1:-2]
+
+    def encode_generic(self, message):
+        """
+        Serializes a command without using the cache.
+
+        Parameters
+        ----------
+        message : dict
+            The command to encode.
+
+        Returns
+        -------
+        tuple of (bytes, str)
+            The newline-terminated frame and its JSON text.
+        """
+        data = self.codec.dumps(message)
+        return data + b"\n", data.decode()
+
+    def encode(self, message):
+        """
+        Serializes a command, using the precomputed frame when there is one.
+
+        Parameters
+        ----------
+        message : dict
+            The command to encode.
+
+        Returns
+        -------
+        tuple of (bytes, str)
+            The newline-terminated frame and its JSON text.
+        """
+        try:
+            return self._cache[tuple(message.items())]
+        except (KeyError, TypeError):
+            return self.encode_generic(message)
+
+    def encode_request(self, message, request_id):
+        """
+        Serializes a command with an "id" field appended.
+
+        For cached commands the id is spliced into the precomputed frame, so
+        the result equals encode_generic(dict(message, id=request_id)) without
+        serializing the command again.
+
+        Parameters
+        ----------
+        message : dict
+            The command to encode, without an "id".
+        request_id : int
+            The sequence number to append.
+
+        Returns
+        -------
+        bytes
+            The newline-terminated frame.
+        """
+        try:
+            frame = self._cache[tuple(message.items())][0]
+        except (KeyError, TypeError):
+            return self.encode_generic(dict(message, id=request_id))[0]
+        return b"%s%s%d}\n" % (frame[:-2], self._id_separator, request_id)
+
+
+DEFAULT_ENCODER = CommandEncoder()
+
+
+def crc8(data, crc=0):
+    """
+    Computes the CRC-8 (polynomial 0x07, initial value 0) of a byte string.
+
+    Parameters
+    ----------
+    data : bytes
+        The bytes to checksum.
+    crc : int, optional
+        A running CRC to continue from (default is 0).
+
+    Returns
+    -------
+    int
+        The 8-bit checksum.
+    """
+    table = _CRC8_TABLE
+    for byte in data:
+        crc = table[crc ^ byte]
+    return crc
+
+
+def _build_crc8_table():
+    table = []
+    for value in range(256):
+        crc = value
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table.append(crc)
+    return bytes(table)
+
+
+_CRC8_TABLE = _build_crc8_table()
+
+
+def add_checksum(frame):
+    """
+    Appends a "*HH" CRC-8 suffix to a newline-terminated JSON frame.
+
+    Parameters
+    ----------
+    frame : bytes
+        The frame including its trailing newline.
+
+    Returns
+    -------
+    bytes
+        The frame with the checksum of everything before the newline.
+    """
+    payload = frame[:-1]
+    return b"%s*%02X\n" % (payload, crc8(payload))
+
+
+def strip_checksum(frame):
+    """
+    Verifies and removes the "*HH" suffix of a received JSON frame.
+
+    Parameters
+    ----------
+    frame : bytes
+        The frame without its delimiter.
+
+    Returns
+    -------
+    bytes or None
+        The payload, or None if the suffix is missing or does not match.
+    """
+    if len(frame) < 3 or frame[-3] != 0x2A:  # "*"
+        return None
+    try:
+        expected = int(frame[-2:], 16)
+    except ValueError:
+        return None
+    payload = frame[:-3]
+    return payload if crc8(payload) == expected else None
+
+
+def cobs_encode(data):
+    """
+    Encodes bytes with Consistent Overhead Byte Stuffing so they contain no zero byte.
+
+    Parameters
+    ----------
+    data : bytes
+        The payload to encode.
+
+    Returns
+    -------
+    bytes
+        The stuffed payload, without the trailing zero delimiter.
+    """
+    out = bytearray()
+    for block in bytes(data).split(b"\x00"):
+        while len(block) >= 254:
+            out.append(255)
+            out += block[:254]
+            block = block[254:]
+        out.append(len(block) + 1)
+        out += block
+    return bytes(out)
+
+
+def cobs_decode(data):
+    """
+    Reverses cobs_encode.
+
+    Parameters
+    ----------
+    data : bytes
+        A stuffed frame without its zero delimiter.
+
+    Returns
+    -------
+    bytes
+        The original payload.
+
+    Raises
+    ------
+    ValueError
+        If the frame is not valid COBS.
+    """
+    out = bytearray()
+    index = 0
+    size = len(data)
+    while index < size:
+        code = data[index]
+        end = index + code
+        if code == 0 or end > size:
+            raise ValueError("Invalid COBS frame")
+        out += data[index + 1:end]
+        index = end
+        if code != 255 and index < size:
+            out.append(0)
+    return bytes(out)
+
+
+def pack_board(board):
+    """
+    Packs a 3x3 board into an 18-bit integer, two bits per cell.
+
+    Cell (row, col) occupies bits 2 * (3 * row + col); 0 is empty, 1 is X
+    and 2 is O.
+
+    Parameters
+    ----------
+    board : list of list of str
+        The board as sent in JSON board frames.
+
+    Returns
+    -------
+    int
+        The packed board.
+    """
+    value = 0
+    for index, cell in enumerate(cell for row in board for cell in row):
+        value |= _CELL_CODES.get(cell, 0) << (2 * index)
+    return value
+
+
+def pack_cells(cells):
+    """
+    Packs nine row-major cells given as bytes, such as BoardMessage.cells,
+    like pack_board().
+    """
+    value = 0
+    for index, cell in enumerate(cells):
+        value |= _CELL_BYTE_CODES.get(cell, 0) << (2 * index)
+    return value
+
+
+def unpack_board(value):
+    """
+    Unpacks an 18-bit board into the nested list form used by JSON frames.
+    """
+    cells = [_CELL_SYMBOLS[(value >> (2 * index)) & 3] for index in range(9)]
+    return [cells[0:3], cells[3:6], cells[6:9]]
+
+
+_CELL_CODES = {"X": 1, "O": 2}
+_CELL_BYTE_CODES = {ord(symbol): code for symbol, code in _CELL_CODES.items()}
+_CELL_SYMBOLS = (" ", "X", "O", " ")
+
+
+class BinaryProtocol:
+    """
+    Compact binary framing spoken by TicTacToeHW after a PROTO handshake.
+
+    Each frame is COBS(payload + CRC8(payload)) followed by a zero byte.
+    Commands are one byte: 0x00-0x08 MOVE to cell 3 * row + col, 0x10-0x12
+    MODE, 0x20 RESET, 0x30 switch back to JSON, 0x40 BOARD and 0x50 PING.
+    Replies start with an opcode: 0x80 carries a packed board in three
+    little-endian bytes, 0x81 a cell delta as (3 * row + col) << 2 | cell
+    code, 0x90 | n is event n of BINARY_EVENTS followed by an optional ASCII
+    argument, 0xA0 acknowledges a switch back to JSON and 0xB0 answers PING.
+    """
+    DELIMITER = b"\x00"
+    OP_MODE = 0x10
+    OP_RESET = 0x20
+    OP_PROTO_JSON = 0x30
+    OP_BOARD_REQUEST = 0x40
+    OP_PING = 0x50
+    OP_BOARD = 0x80
+    OP_CELL = 0x81
+    OP_EVENT = 0x90
+    OP_PROTO_ACK_JSON = 0xA0
+    OP_PONG = 0xB0
+
+    def __init__(self, vocabulary=COMMAND_VOCABULARY):
+        """
+        Precomputes the frames for a command vocabulary.
+
+        Parameters
+        ----------
+        vocabulary : iterable of dict, optional
+            Commands to pre-encode (default is COMMAND_VOCABULARY).
+        """
+        self._cache = {tuple(message.items()): self.encode_generic(message) for message in vocabulary}
+
+    @staticmethod
+    def frame(payload):
+        """
+        Wraps a payload into a delimited frame with a CRC8 trailer.
+        """
+        payload = bytes(payload)
+        return cobs_encode(payload + bytes((crc8(payload),))) + BinaryProtocol.DELIMITER
+
+    @staticmethod
+    def unframe(frame):
+        """
+        Validates and strips a frame produced by frame(), without its delimiter.
+
+        Raises
+        ------
+        ValueError
+            If the frame is malformed or the CRC does not match.
+        """
+        data = cobs_decode(frame)
+        if len(data) < 2 or crc8(data[:-1]) != data[-1]:
+            raise ValueError("CRC mismatch")
+        return data[:-1]
+
+    def encode_generic(self, message):
+        """
+        Encodes a command dict into a binary frame without using the cache.
+
+        Raises
+        ------
+        ValueError
+            If the command has no binary form.
+        """
+        command = message.get("command")
+        if command == "MOVE" and message.get("row") in range(3) and message.get("col") in range(3):
+            opcode = 3 * message["row"] + message["col"]
+        elif command == "MODE" and message.get("mode") in range(3):
+            opcode = self.OP_MODE | message["mode"]
+        elif command == "RESET":
+            opcode = self.OP_RESET
+        elif command == "PROTO" and message.get("proto") == "json":
+            opcode = self.OP_PROTO_JSON
+        elif command == "BOARD":
+            opcode = self.OP_BOARD_REQUEST
+        elif command == "PING":
+            opcode = self.OP_PING
+        else:
+            raise ValueError(f"No binary encoding for {message}")
+        return self.frame((opcode,))
+
+    def encode(self, message):
+        """
+        Encodes a command dict into a binary frame.
+
+        Raises
+        ------
+        ValueError
+            If the command has no binary form.
+        """
+        try:
+            return self._cache[tuple(message.items())]
+        except (KeyError, TypeError):
+            return self.encode_generic(message)
+
+    @classmethod
+    def decode(cls, frame):
+        """
+        Decodes a reply frame into the same dict a JSON reply would produce.
+
+        Returns
+        -------
+        dict or str or None
+            The message, an error message, or None for an empty frame.
+        """
+        if not frame:
+            return None
+        try:
+            payload = cls.unframe(frame)
+        except ValueError as e:
+            return f"Error: {e}"
+        opcode = payload[0]
+        if opcode == cls.OP_BOARD and len(payload) == 4:
+            return {"type": "board", "board": unpack_board(int.from_bytes(payload[1:4], "little"))}
+        if opcode == cls.OP_CELL and len(payload) == 2 and payload[1] >> 2 < 9:
+            row, col = divmod(payload[1] >> 2, 3)
+            return {"type": "cell", "r": row, "c": col, "v": _CELL_SYMBOLS[payload[1] & 3]}
+        if opcode & 0xF0 == cls.OP_EVENT and (opcode & 0x0F) in BINARY_EVENTS:
+            message_type, template = BINARY_EVENTS[opcode & 0x0F]
+            argument = chr(payload[1]) if len(payload) > 1 else ""
+            return {"type": message_type, "message": template.format(argument)}
+        if opcode == cls.OP_PROTO_ACK_JSON:
+            return {"type": "proto", "proto": "json"}
+        if opcode == cls.OP_PONG:
+            return {"type": "pong"}
+        return f"Error: Unknown binary opcode 0x{opcode:02X}"
+
+
+# Event codes shared with TicTacToeHW.ino; "{}" is replaced by the event argument
+BINARY_EVENTS = {
+    0: ("info", "TicTacToe Game Started"),
+    1: ("error", "Invalid move."),
+    2: ("win_status", "Player {} wins!"),
+    3: ("win_status", "It's a draw!"),
+    4: ("game_status", "Game reset."),
+    5: ("game_mode", "Game mode set to {}"),
+}
+
+BINARY_PROTOCOL = BinaryProtocol()
+
+
+class BoardMirror:
+    """
+    Host-side copy of the firmware board.
+
+    Full "board" snapshots replace the copy and "cell" deltas patch a single
+    cell, so the mirror stays current while the firmware only sends deltas
+    after moves.
+
+    Attributes
+    ----------
+    cells : list of str
+        The nine cells in row-major order
+    """
+    def __init__(self):
+        """
+        Initializes an empty board.
+        """
+        self.cells = [" "] * 9
+
+    @property
+    def board(self):
+        """
+        list of list of str: The board in the nested form used by board frames.
+        """
+        cells = self.cells
+        return [cells[0:3], cells[3:6], cells[6:9]]
+
+    def apply(self, message):
+        """
+        Applies a board snapshot or a cell delta.
+
+        Parameters
+        ----------
+        message : dict
+            A received message; other message types are ignored.
+
+        Returns
+        -------
+        bool
+            True if the message was a board update.
+
+        Raises
+        ------
+        ValueError
+            If a snapshot is not a 3x3 board (see BoardMessage.from_rows()) or
+            a delta names a cell outside it.
+        """
+        if "board" in message:
+            self.cells = list(BoardMessage.from_rows(message["board"]).cells.decode("ascii"))
+            return True
+        if message.get("type") == "cell":
+            row, col = message["r"], message["c"]
+            if row not in range(3) or col not in range(3):
+                raise ValueError(f"Invalid cell: {message!r}")
+            self.cells[3 * row + col] = message["v"]
+            return True
+        return False
+
+
+class Message:
+    """
+    Base class of the typed messages produced by to_message().
+
+    Subclasses keep their fields in `__slots__`, compare by value and convert
+    back to the wire dict with to_dict().
+    """
+    __slots__ = ()
+    type = None
+
+    def to_dict(self):
+        """
+        Returns the message in the dict form received from the firmware.
+        """
+        raise NotImplementedError
+
+    def _key(self):
+        raise NotImplementedError
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class BoardMessage(Message):
+    """
+    Full board snapshot.
+
+    Attributes
+    ----------
+    cells : bytes
+        The nine cells in row-major order as b"X", b"O" or b" "; bytes cache
+        their hash, so comparing or hashing boards is cheap
+    """
+    __slots__ = ("cells",)
+    type = "board"
+
+    def __init__(self, cells):
+        """
+        Parameters
+        ----------
+        cells : bytes
+            Nine cell characters in row-major order.
+        """
+        self.cells = cells
+
+    @classmethod
+    def from_rows(cls, board):
+        """
+        Builds a message from the nested list form of JSON board frames.
+
+        Empty cells may be given as " " or "".
+
+        Raises
+        ------
+        ValueError
+            If the board is not 3x3 cells of at most one character each.
+        """
+        if len(board) != 3 or any(len(row) != 3 for row in board):
+            raise ValueError(f"Invalid board: {board!r}")
+        for row in board:
+            for cell in row:
+                if not isinstance(cell, str) or len(cell) > 1:
+                    raise ValueError(f"Invalid board: {board!r}")
+        return cls("".join(cell or " " for row in board for cell in row).encode("ascii"))
+
+    @property
+    def board(self):
+        """
+        list of list of str: The board in the nested form used by board frames.
+        """
+        cells = self.cells.decode("ascii")
+        return [list(cells[0:3]), list(cells[3:6]), list(cells[6:9])]
+
+    @property
+    def packed(self):
+        """
+        int: The board packed into 18 bits like pack_board().
+        """
+        return pack_cells(self.cells)
+
+    def to_dict(self):
+        return {"type": "board", "board": self.board}
+
+    def _key(self):
+        return self.cells
+
+
+class StatusMessage(Message):
+    """
+    Informational message: "info", "game_status" or "game_mode".
+
+    Attributes
+    ----------
+    type : str
+        The message type
+    message : str
+        The human-readable text
+    """
+    __slots__ = ("type", "message")
+
+    def __init__(self, type, message):
+        self.type = type
+        self.message = message
+
+    def to_dict(self):
+        return {"type": self.type, "message": self.message}
+
+    def _key(self):
+        return self.type, self.message
+
+
+class WinStatus(Message):
+    """
+    End of game: a win or a draw.
+
+    Attributes
+    ----------
+    message : str
+        "Player X wins!", "Player O wins!" or "It's a draw!"
+    """
+    __slots__ = ("message",)
+    type = "win_status"
+
+    def __init__(self, message):
+        self.message = message
+
+    @property
+    def winner(self):
+        """
+        str or None: "X" or "O", or None for a draw.
+        """
+        if self.message.startswith("Player ") and self.message.endswith(" wins!"):
+            return self.message[len("Player "):-len(" wins!")]
+        return None
+
+    def to_dict(self):
+        return {"type": "win_status", "message": self.message}
+
+    def _key(self):
+        return self.message
+
+
+class ErrorMessage(Message):
+    """
+    Error reported by the firmware, e.g. "Invalid move.".
+    """
+    __slots__ = ("message",)
+    type = "error"
+
+    def __init__(self, message):
+        self.message = message
+
+    def to_dict(self):
+        return {"type": "error", "message": self.message}
+
+    def _key(self):
+        return self.message
+
+
+def to_message(message):
+    """
+    Converts a received dict into its typed message class.
+
+    Parameters
+    ----------
+    message : dict or str or Message
+        A message as returned by the parsers.
+
+    Returns
+    -------
+    Message or dict or str
+        The typed message; types without a class (cell deltas, pong, proto,
+        baud, ...), malformed messages, error strings and already typed
+        messages are returned unchanged.
+    """
+    if not isinstance(message, dict):
+        return message
+    kind = message.get("type")
+    try:
+        if kind == "board" or "board" in message:
+            return BoardMessage.from_rows(message["board"])
+        if kind in ("info", "game_status", "game_mode"):
+            return StatusMessage(kind, message["message"])
+        if kind == "win_status":
+            return WinStatus(message["message"])
+        if kind == "error":
+            return ErrorMessage(message["message"])
+    except (KeyError, TypeError, ValueError):
+        pass
+    return message
+
+
+def message_type(message):
+    """
+    Returns the dispatch key of a received message.
+
+    Parameters
+    ----------
+    message : dict or Message or str
+        A received message.
+
+    Returns
+    -------
+    str or None
+        The message "type"; "board" for untyped board frames, "text" for
+        status and error strings, None for dicts without a type.
+    """
+    if isinstance(message, Message):
+        return message.type
+    if isinstance(message, dict):
+        return message.get("type") or ("board" if "board" in message else None)
+    return "text"
+
+
+class MessageDispatcher:
+    """
+    Routes received messages to handlers subscribed by message type.
+
+    Handlers of a type are kept in a tuple sorted by priority (highest
+    first, ties in subscription order) that is rebuilt on every
+    (un)subscription, so dispatching is one dict lookup and a loop. A handler
+    that returns True consumes the message: lower-priority handlers are
+    skipped. Handlers subscribed to ANY see every message; handlers
+    subscribed to UNHANDLED see messages no type-specific handler exists for.
+
+    Attributes
+    ----------
+    errors : int
+        Number of handler calls that raised
+    on_error : callable or None
+        Called with (message, exception) when a handler raises; the other
+        handlers still run
+    """
+    ANY = "*"
+    UNHANDLED = None
+
+    def __init__(self):
+        """
+        Initializes a dispatcher without handlers.
+        """
+        self.errors = 0
+        self.on_error = None
+        self._subscriptions = {}
+        self._next_token = 0
+        self._table = {}
+        self._unhandled = ()
+        self._lock = threading.Lock()
+
+    def subscribe(self, msg_type, handler, priority=0):
+        """
+        Registers a handler for one message type.
+
+        Parameters
+        ----------
+        msg_type : str or None
+            A message "type" (see message_type()), ANY or UNHANDLED.
+        handler : callable
+            Called with the message.
+        priority : int, optional
+            Higher priorities run first (default is 0).
+
+        Returns
+        -------
+        int
+            Token for unsubscribe().
+        """
+        with self._lock:
+            token = self._next_token
+            self._next_token += 1
+            self._subscriptions[token] = (msg_type, -priority, token, handler)
+            self._rebuild()
+        return token
+
+    def unsubscribe(self, token):
+        """
+        Removes a handler.
+
+        Returns
+        -------
+        bool
+            False if the token was not subscribed.
+        """
+        with self._lock:
+            if self._subscriptions.pop(token, None) is None:
+                return False
+            self._rebuild()
+        return True
+
+    def _rebuild(self):
+        """
+        Recomputes the per-type handler tuples; called with the lock held.
+        """
+        ordered = sorted(self._subscriptions.values(), key=lambda entry: entry[1:3])
+
+        def handlers(msg_type):
+            return tuple(entry[3] for entry in ordered if entry[0] in (msg_type, self.ANY))
+
+        self._table = {msg_type: handlers(msg_type)
+                       for msg_type in {entry[0] for entry in ordered} - {self.ANY, self.UNHANDLED}}
+        self._unhandled = handlers(self.UNHANDLED)
+
+    def dispatch(self, message):
+        """
+        Calls the handlers subscribed to the message's type.
+
+        Returns
+        -------
+        int
+            Number of handlers called.
+        """
+        called = 0
+        for handler in self._table.get(message_type(message), self._unhandled):
+            called += 1
+            try:
+                if handler(message) is True:
+                    break
+            except Exception as e:
+                self.errors += 1
+                if self.on_error is not None:
+                    self.on_error(message, e)
+        return called
+
+
+class FrameReader:
+    """
+    Incremental framer for newline-terminated frames.
+
+    Bytes are copied into one preallocated `bytearray` that is reused for the
+    whole session; complete frames are cut out of it with `memoryview`
+    slicing, and an incomplete trailing frame is kept for the next read.
+
+    With `checksum` set, newline frames must end in a "*HH" CRC-8 suffix
+    (see add_checksum()); frames that fail the check are dropped and counted
+    without affecting their neighbours, since framing only depends on the
+    delimiter.
+
+    Attributes
+    ----------
+    checksum : bool
+        Verify and strip per-frame checksums on newline frames
+    tap : callable or None
+        Called with every chunk passed to feed(), e.g. to capture the wire
+    bytes_in : int
+        Number of bytes fed in
+    frames_in : int
+        Number of frames yielded
+    overflows : int
+        Number of times an over-long frame was discarded
+    corrupted : int
+        Number of frames dropped for a bad or missing checksum
+    """
+    def __init__(self, capacity=4096, delimiter=b"\n"):
+        """
+        Initializes the framer.
+
+        Parameters
+        ----------
+        capacity : int, optional
+            Size of the receive buffer; longer frames are dropped (default is 4096).
+        delimiter : bytes, optional
+            The one-byte frame terminator (default is b"\\n").
+        """
+        self._buf = bytearray(capacity)
+        self._view = memoryview(self._buf)
+        self.delimiter = delimiter
+        self._start = 0
+        self._end = 0
+        self._skipping = False
+        self.checksum = False
+        self.tap = None
+        self.bytes_in = 0
+        self.frames_in = 0
+        self.overflows = 0
+        self.corrupted = 0
+
+    def __len__(self):
+        return self._end - self._start
+
+    @property
+    def space(self):
+        """
+        int: Bytes that can still be buffered before a frame overflows.
+        """
+        return len(self._buf) - (self._end - self._start)
+
+    def clear(self):
+        """
+        Discards any buffered partial frame.
+        """
+        self._start = self._end = 0
+        self._skipping = False
+
+    def read_from(self, ser):
+        """
+        Reads everything currently waiting on a serial port in a single call.
+
+        Parameters
+        ----------
+        ser : serial.Serial
+            The port to read from.
+
+        Returns
+        -------
+        int
+            Number of bytes read.
+        """
+        waiting = ser.in_waiting
+        if not waiting:
+            return 0
+        data = ser.read(min(waiting, self.space) or 1)
+        self.feed(data)
+        return len(data)
+
+    def feed(self, data):
+        """
+        Appends received bytes to the buffer.
+
+        Parameters
+        ----------
+        data : bytes
+            Raw bytes as read from the port.
+        """
+        self.bytes_in += len(data)
+        if self.tap is not None:
+            self.tap(data)
+        self._append(data)
+
+    def _append(self, data):
+        if self._skipping:
+            # still inside an over-long frame: resume after its delimiter
+            cut = data.find(self.delimiter)
+            if cut < 0:
+                return
+            self._skipping = False
+            data = data[cut + 1:]
+        size = len(data)
+        capacity = len(self._buf)
+        if self._end + size > capacity:
+            pending = self._end - self._start
+            if pending + size > capacity:
+                self.overflows += 1
+                self._start = self._end = 0
+                self._skipping = True
+                self._append(data)
+                return
+            self._buf[:pending] = self._buf[self._start:self._end]
+            self._start, self._end = 0, pending
+        self._view[self._end:self._end + size] = data
+        self._end += size
+
+    def frames(self):
+        """
+        Yields every complete frame currently buffered.
+
+        Yields
+        ------
+        bytes
+            Frame payload without the delimiter or, for newline framing, a
+            trailing carriage return and the checksum suffix.
+        """
+        buf = self._buf
+        while self._start < self._end:
+            cut = buf.find(self.delimiter, self._start, self._end)
+            if cut < 0:
+                break
+            stop = cut
+            if cut > self._start and buf[cut - 1] == 13 and self.delimiter == b"\n":
+                stop -= 1
+            frame = bytes(self._view[self._start:stop])
+            self._start = cut + 1
+            if self.checksum and frame and self.delimiter == b"\n":
+                frame = strip_checksum(frame)
+                if frame is None:
+                    self.corrupted += 1
+                    continue
+            self.frames_in += 1
+            yield frame
+        if self._start == self._end:
+            self._start = self._end = 0
+
+
+class CoalescingWriter:
+    """
+    Gathers frames written within a short window into a single write() call.
+
+    The first frame of a batch opens the window; everything queued before the
+    deadline, or until `max_bytes` is reached, goes out in one write on a
+    background flusher thread.
+
+    Attributes
+    ----------
+    window : float
+        Flush deadline in seconds measured from the first queued frame
+    max_bytes : int
+        Buffered size that triggers an immediate flush
+    error : Exception or None
+        The last exception raised by a background flush, if any
+    """
+    def __init__(self, write, window=0.002, max_bytes=256):
+        """
+        Initializes the writer and starts its flusher thread.
+
+        Parameters
+        ----------
+        write : callable
+            Function that writes bytes to the port, such as `ser.write`.
+        window : float, optional
+            Flush deadline in seconds (default is 0.002).
+        max_bytes : int, optional
+            Buffered size that triggers an immediate flush (default is 256).
+        """
+        self.window = window
+        self.max_bytes = max_bytes
+        self.error = None
+        self._write = write
+        self._buffer = bytearray()
+        self._deadline = None
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="uart-writer", daemon=True)
+        self._thread.start()
+
+    def __len__(self):
+        return len(self._buffer)
+
+    def write(self, frame):
+        """
+        Queues a frame for the next coalesced write.
+
+        Parameters
+        ----------
+        frame : bytes
+            The encoded frame.
+        """
+        with self._condition:
+            if self._closed:
+                raise ValueError("Writer closed")
+            self._buffer += frame
+            if len(self._buffer) >= self.max_bytes:
+                self._flush_locked()
+            elif self._deadline is None:
+                self._deadline = time.monotonic() + self.window
+                self._condition.notify()
+
+    def flush(self):
+        """
+        Writes everything queued right away.
+        """
+        with self._condition:
+            self._flush_locked()
+
+    def close(self):
+        """
+        Flushes pending frames and stops the flusher thread.
+        """
+        with self._condition:
+            self._flush_locked()
+            self._closed = True
+            self._condition.notify()
+        if self._thread is not threading.current_thread():
+            self._thread.join(1.0)
+
+    def _flush_locked(self):
+        self._deadline = None
+        if not self._buffer:
+            return
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        self._write(data)
+
+    def _run(self):
+        with self._condition:
+            while not self._closed:
+                if self._deadline is None:
+                    self._condition.wait()
+                    continue
+                remaining = self._deadline - time.monotonic()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+                try:
+                    self._flush_locked()
+                except Exception as e:
+                    self.error = e
+
+
+class OutboundScheduler:
+    """
+    Bounded command queue that coalesces commands before they are paced out.
+
+    Commands are sent one at a time by a worker thread through `send`, which
+    may block to pace the link. While they wait:
+
+    * RESET goes to its own lane, which is always drained first, and
+      supersedes every pending MOVE and RESET;
+    * MODE supersedes pending MOVEs and an earlier pending MODE;
+    * a command identical to one already pending (e.g. a double-clicked
+      MOVE) is merged into it.
+
+    MODE and RESET change the firmware state and are never reordered: a
+    RESET submitted while a MODE is pending queues behind it in the normal
+    lane instead.
+
+    Attributes
+    ----------
+    capacity : int
+        Maximum number of pending commands in the normal lane
+    sent, merged, superseded, rejected, errors : int
+        Counters of commands sent, merged into a pending duplicate, dropped
+        by a later RESET or MODE, refused because the queue was full, and
+        failed in `send`
+    error : Exception or None
+        The last exception raised by `send`
+    """
+    def __init__(self, send, capacity=32):
+        """
+        Initializes the scheduler; call start() to begin sending.
+
+        Parameters
+        ----------
+        send : callable
+            Called with each command dict on the worker thread.
+        capacity : int, optional
+            Maximum number of pending commands (default is 32).
+        """
+        self.capacity = capacity
+        self.sent = self.merged = self.superseded = self.rejected = self.errors = 0
+        self.error = None
+        self._send = send
+        self._urgent = collections.deque()
+        self._normal = collections.deque()
+        self._busy = False
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def __len__(self):
+        return len(self._urgent) + len(self._normal)
+
+    def start(self):
+        """
+        Starts the worker thread.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="uart-scheduler", daemon=True)
+        self._thread.start()
+
+    def submit(self, message):
+        """
+        Queues a command, coalescing it with the pending ones.
+
+        Parameters
+        ----------
+        message : dict
+            The command to send.
+
+        Returns
+        -------
+        str
+            "Queued", "Merged" or an error status.
+        """
+        command = message.get("command")
+        with self._condition:
+            if self._closed:
+                return "Error: Scheduler closed"
+            if message in self._urgent or message in self._normal:
+                self.merged += 1
+                return "Merged"
+            if command in ("RESET", "MODE"):
+                superseded = ("MOVE", "RESET") if command == "RESET" else ("MOVE", "MODE")
+                for lane in (self._urgent, self._normal):
+                    kept = [pending for pending in lane if pending.get("command") not in superseded]
+                    self.superseded += len(lane) - len(kept)
+                    lane.clear()
+                    lane.extend(kept)
+            if command == "RESET":
+                if any(pending.get("command") == "MODE" for pending in self._normal):
+                    self._normal.append(message)
+                else:
+                    self._urgent.append(message)
+            elif len(self._normal) >= self.capacity:
+                self.rejected += 1
+                return "Error: Outbound queue full"
+            else:
+                self._normal.append(message)
+            self._condition.notify_all()
+        return "Queued"
+
+    def drain(self, timeout=None):
+        """
+        Waits until every queued command has been sent.
+
+        Returns
+        -------
+        bool
+            False if the timeout expired first.
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: not (self._urgent or self._normal or self._busy), timeout)
+
+    def close(self):
+        """
+        Drops pending commands and stops the worker thread.
+        """
+        with self._condition:
+            self._closed = True
+            self._urgent.clear()
+            self._normal.clear()
+            self._condition.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(1.0)
+        self._thread = None
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._busy = False
+                self._condition.notify_all()
+                self._condition.wait_for(lambda: self._closed or self._urgent or self._normal)
+                if self._closed:
+                    return
+                message = (self._urgent or self._normal).popleft()
+                self._busy = True
+            try:
+                self._send(message)
+                self.sent += 1
+            except Exception as e:
+                self.errors += 1
+                self.error = e
+
+
+# USB (vendor id, product id) pairs of Arduino boards and common USB-serial
+# bridges on clones; a product id of None matches any product of the vendor
+ARDUINO_USB_IDS = {
+    (0x2341, None),    # Arduino SA
+    (0x2A03, None),    # Arduino.org
+    (0x1A86, 0x7523),  # WCH CH340
+    (0x1A86, 0x5523),  # WCH CH341
+    (0x0403, 0x6001),  # FTDI FT232R
+    (0x10C4, 0xEA60),  # Silicon Labs CP210x
+}
+
+
+def is_arduino_port(info):
+    """
+    Tells whether a port belongs to an Arduino or a typical clone bridge.
+
+    Parameters
+    ----------
+    info : serial.tools.list_ports_common.ListPortInfo
+        A port as returned by `comports()`.
+
+    Returns
+    -------
+    bool
+        True if the port's VID/PID is in ARDUINO_USB_IDS.
+    """
+    return (info.vid, info.pid) in ARDUINO_USB_IDS or (info.vid, None) in ARDUINO_USB_IDS
+
+
+def _device_signature():
+    """
+    Returns a cheap value that changes when serial devices come or go.
+
+    On Linux and macOS device nodes live in /dev, whose modification time
+    changes whenever one is added or removed; elsewhere None is returned and
+    only the periodic rescan applies.
+    """
+    try:
+        return os.stat("/dev").st_mtime_ns
+    except OSError:
+        return None
+
+
+class PortRegistry:
+    """
+    Cached serial port list refreshed on a background thread.
+
+    `comports()` walks sysfs for every tty, which is slow on busy hosts, so
+    the scan runs off the GUI thread: once at start, whenever the device
+    signature changes (a node appears in or leaves /dev) and otherwise every
+    `rescan_interval` seconds. Readers always get the cached result.
+
+    Attributes
+    ----------
+    version : int
+        Incremented every time the port list changes
+    """
+    def __init__(self, poll_interval=0.5, rescan_interval=30.0, on_change=None, signature=_device_signature):
+        """
+        Initializes an empty registry; call start() or refresh() to fill it.
+
+        Parameters
+        ----------
+        poll_interval : float, optional
+            Seconds between change checks (default is 0.5).
+        rescan_interval : float, optional
+            Seconds between unconditional rescans (default is 30.0).
+        on_change : callable, optional
+            Called with the new list of port infos after a change, on the
+            refresh thread.
+        signature : callable, optional
+            Change detector returning a value that differs after hot-plug.
+        """
+        self.poll_interval = poll_interval
+        self.rescan_interval = rescan_interval
+        self.on_change = on_change
+        self.version = 0
+        self._signature = signature
+        self._infos = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """
+        Starts the background refresh thread; the first scan runs immediately.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="port-registry", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the background refresh thread.
+        """
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(2.0)
+        self._thread = None
+
+    def refresh(self):
+        """
+        Rescans the ports now.
+
+        Returns
+        -------
+        bool
+            True if the port list changed.
+        """
+        infos = sorted(serial.tools.list_ports.comports(), key=lambda info: info.device)
+        key = [(info.device, info.vid, info.pid, info.serial_number) for info in infos]
+        with self._lock:
+            changed = key != [(info.device, info.vid, info.pid, info.serial_number) for info in self._infos]
+            if changed:
+                self._infos = infos
+                self.version += 1
+        if changed and self.on_change is not None:
+            self.on_change(infos)
+        return changed
+
+    def infos(self, arduino_only=False):
+        """
+        Returns the cached port infos.
+
+        Parameters
+        ----------
+        arduino_only : bool, optional
+            Keep only ports matching ARDUINO_USB_IDS (default is False).
+
+        Returns
+        -------
+        list of ListPortInfo
+            The ports, sorted by device name.
+        """
+        with self._lock:
+            infos = list(self._infos)
+        return [info for info in infos if is_arduino_port(info)] if arduino_only else infos
+
+    def ports(self, arduino_only=False):
+        """
+        Returns the cached device names.
+
+        Parameters
+        ----------
+        arduino_only : bool, optional
+            Keep only ports matching ARDUINO_USB_IDS (default is False).
+
+        Returns
+        -------
+        list of str
+            Port device names.
+        """
+        return [info.device for info in self.infos(arduino_only)]
+
+    def _run(self):
+        last_signature = self._signature()
+        last_scan = None
+        while not self._stop.is_set():
+            signature = self._signature()
+            now = time.monotonic()
+            if last_scan is None or signature != last_signature or now - last_scan >= self.rescan_interval:
+                last_signature, last_scan = signature, now
+                try:
+                    self.refresh()
+                except Exception:
+                    pass
+            self._stop.wait(self.poll_interval)
+
+
+CAPTURE_MAGIC = b"TTTCAP1\n"
+CAPTURE_IN = 0
+CAPTURE_OUT = 1
+_CAPTURE_RECORD = struct.Struct("<QBI")
+
+
+class WireRecorder:
+    """
+    Appends timestamped wire traffic to a capture file.
+
+    The file starts with CAPTURE_MAGIC followed by records of a little-endian
+    header (monotonic timestamp in ns: u64, direction: u8, length: u32) and
+    the raw bytes. Inbound records hold the chunks as read from the port,
+    outbound records the frames as written, so a capture reproduces framing
+    and corruption problems exactly. Existing files are appended to.
+    """
+    def __init__(self, path):
+        """
+        Opens the capture file for appending.
+
+        Parameters
+        ----------
+        path : str
+            The capture file.
+        """
+        self.path = path
+        self.records = 0
+        self._lock = threading.Lock()
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(CAPTURE_MAGIC)
+
+    def record(self, direction, data):
+        """
+        Appends one record stamped with the current monotonic time.
+
+        Parameters
+        ----------
+        direction : int
+            CAPTURE_IN or CAPTURE_OUT.
+        data : bytes
+            The bytes read or written.
+        """
+        header = _CAPTURE_RECORD.pack(time.monotonic_ns(), direction, len(data))
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(header)
+            self._file.write(data)
+            self.records += 1
+
+    def close(self):
+        """
+        Flushes and closes the capture file.
+        """
+        with self._lock:
+            file, self._file = self._file, None
+        if file is not None:
+            file.close()
+
+
+def read_capture(path):
+    """
+    Reads the records of a capture file.
+
+    A record cut short at the end of the file (e.g. by a crash while
+    recording) is ignored.
+
+    Parameters
+    ----------
+    path : str
+        The capture file.
+
+    Yields
+    ------
+    tuple of (int, int, bytes)
+        Timestamp in ns, direction and data of each record.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a capture.
+    """
+    with open(path, "rb") as file:
+        if file.read(len(CAPTURE_MAGIC)) != CAPTURE_MAGIC:
+            raise ValueError(f"{path} is not a wire capture")
+        while True:
+            header = file.read(_CAPTURE_RECORD.size)
+            if len(header) < _CAPTURE_RECORD.size:
+                return
+            timestamp, direction, length = _CAPTURE_RECORD.unpack(header)
+            data = file.read(length)
+            if len(data) < length:
+                return
+            yield timestamp, direction, data
+
+
+class ReplaySerial:
+    """
+    Serial port stand-in that plays back the inbound side of a capture.
+
+    Assign it to `UARTCommunication.ser` (or use open_replay()) to feed a
+    recorded session to auto_receive(), the reader thread or tests. Bytes
+    become readable at their recorded time scaled by `speed`; outbound writes
+    are collected in `written` and otherwise ignored.
+
+    Attributes
+    ----------
+    speed : float or None
+        Playback speed: 1.0 is real time, 10.0 ten times faster and None as
+        fast as possible
+    written : bytearray
+        Everything written to the port
+    """
+    def __init__(self, path, speed=1.0, timeout=1.0):
+        """
+        Loads the inbound records of a capture.
+
+        Parameters
+        ----------
+        path : str
+            The capture file.
+        speed : float or None, optional
+            Playback speed (default is 1.0); None or 0 replays at maximum speed.
+        timeout : float, optional
+            Seconds read() blocks for the first byte (default is 1.0).
+        """
+        records = [(timestamp, data) for timestamp, direction, data in read_capture(path)
+                   if direction == CAPTURE_IN]
+        first = records[0][0] if records else 0
+        self.speed = speed or None
+        self.timeout = timeout
+        self.is_open = True
+        self.written = bytearray()
+        self._records = collections.deque((timestamp - first, data) for timestamp, data in records)
+        self._buffer = bytearray()
+        self._started = time.monotonic_ns()
+
+    @property
+    def finished(self):
+        """
+        bool: True once every recorded byte has been read.
+        """
+        return not self._records and not self._buffer
+
+    def _release(self):
+        """
+        Moves the records whose time has come into the read buffer.
+        """
+        if self.speed is None:
+            elapsed = None
+        else:
+            elapsed = (time.monotonic_ns() - self._started) * self.speed
+        records = self._records
+        while records and (elapsed is None or records[0][0] <= elapsed):
+            self._buffer += records.popleft()[1]
+
+    def _next_due(self):
+        """
+        Returns the seconds until the next record is due, or None if none is left.
+        """
+        if not self._records:
+            return None
+        if self.speed is None:
+            return 0.0
+        due = self._started + self._records[0][0] / self.speed
+        return max(due - time.monotonic_ns(), 0) / 1e9
+
+    @property
+    def in_waiting(self):
+        self._release()
+        return len(self._buffer)
+
+    def read(self, size=1):
+        """
+        Reads up to `size` bytes, blocking up to `timeout` for the first one.
+        """
+        deadline = time.monotonic() + self.timeout
+        self._release()
+        while not self._buffer and self.is_open:
+            wait = self._next_due()
+            remaining = deadline - time.monotonic()
+            if wait is None or remaining <= 0:
+                break
+            time.sleep(min(wait, remaining))
+            self._release()
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def write(self, data):
+        self.written += data
+        return len(data)
+
+    def reset_input_buffer(self):
+        self._buffer.clear()
+
+    def close(self):
+        self.is_open = False
+
+
+FIRMWARE_BANNER = "TicTacToe Game Started"
+# seconds the firmware waits for a PING at a new baud rate before rolling
+# back; BAUD_COMMIT_TIMEOUT_MS in TicTacToeHW.ino
+BAUD_COMMIT_TIMEOUT = 2.0
+
+
+def is_banner(message):
+    """
+    Tells whether a message is the firmware's boot banner.
+
+    Parameters
+    ----------
+    message : dict or str or Message
+        A received message.
+
+    Returns
+    -------
+    bool
+        True for the "info" frame TicTacToeHW sends from setup().
+    """
+    if isinstance(message, StatusMessage):
+        return message.type == "info" and message.message == FIRMWARE_BANNER
+    return isinstance(message, dict) and message.get("type") == "info" and message.get("message") == FIRMWARE_BANNER
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket histogram of round-trip times.
+
+    Recording is a bisect and a few additions, so it can stay enabled on
+    every request.
+
+    Attributes
+    ----------
+    BOUNDS : tuple of float
+        Upper bounds of the buckets in seconds; a last bucket takes the rest
+    count : int
+        Number of recorded samples
+    """
+    BOUNDS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0)
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.buckets = [0] * (len(self.BOUNDS) + 1)
+
+    def record(self, seconds):
+        """
+        Adds one round-trip time in seconds.
+        """
+        self.buckets[bisect.bisect_left(self.BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if self.max is None or seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, fraction):
+        """
+        Returns the upper bound of the bucket holding the given fraction of samples.
+
+        Parameters
+        ----------
+        fraction : float
+            E.g. 0.5 for the median or 0.99.
+
+        Returns
+        -------
+        float or None
+            The bound in seconds (the maximum for the last bucket), or None
+            without samples.
+        """
+        if not self.count:
+            return None
+        seen = 0
+        for index, bucket in enumerate(self.buckets):
+            seen += bucket
+            if seen >= fraction * self.count:
+                return self.BOUNDS[index] if index < len(self.BOUNDS) else self.max
+        return self.max
+
+    def snapshot(self):
+        """
+        Returns the histogram as a plain dict.
+
+        Returns
+        -------
+        dict
+            "count", "mean", "min", "max", "p50", "p99" (seconds) and
+            "buckets", a list of (upper bound, count) pairs with None as the
+            bound of the last bucket.
+        """
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.percentile(0.5),
+            "p99": self.percentile(0.99),
+            "buckets": list(zip(self.BOUNDS + (None,), self.buckets)),
+        }
+
+
+class _PendingRequest:
+    """
+    Bookkeeping for one in-flight request of UARTCommunication.request().
+    """
+    __slots__ = ("future", "expect_type", "size", "deadline", "command", "sent")
+
+    def __init__(self, future, expect_type, size, deadline, command=None):
+        self.future = future
+        self.expect_type = expect_type
+        self.size = size
+        self.deadline = deadline
+        self.command = command
+        self.sent = time.perf_counter()
+
+
+class ReconnectSupervisor:
+    """
+    Reopens a UARTCommunication port after the device disappears.
+
+    When the reader thread hits an I/O error the port is closed and the
+    supervisor thread looks for the same device (by USB VID, PID and serial
+    number, so a new /dev/ttyACM* name is fine) with exponential backoff.
+    Once it is back the port is reopened, the firmware banner awaited and a
+    BOARD snapshot requested to resync the GUI. Progress is reported as
+    status strings through the normal receive calls.
+
+    Attributes
+    ----------
+    reconnects : int
+        Number of successful reconnects
+    identity : tuple or None
+        (vid, pid, serial_number) of the supervised device
+    """
+    def __init__(self, uart, initial_delay=0.5, max_delay=10.0, ready_timeout=5.0, identity=None):
+        """
+        Starts supervising a port.
+
+        Parameters
+        ----------
+        uart : UARTCommunication
+            The connection to supervise; its port must have been opened once.
+        initial_delay : float, optional
+            First retry delay in seconds (default is 0.5).
+        max_delay : float, optional
+            Upper bound for the doubling retry delay (default is 10.0).
+        ready_timeout : float, optional
+            Seconds to wait for the firmware after reopening (default is 5.0).
+        identity : tuple, optional
+            (vid, pid, serial_number) to look for; by default it is read from
+            the port list for the currently open device.
+        """
+        self.uart = uart
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.ready_timeout = ready_timeout
+        self.identity = identity
+        self.reconnects = 0
+        self._lost = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="uart-supervisor", daemon=True)
+        self._thread.start()
+
+    def notify_failure(self):
+        """
+        Tells the supervisor that the port failed; called by UARTCommunication.
+        """
+        self._lost.set()
+
+    def stop(self):
+        """
+        Stops the supervisor thread.
+        """
+        self._stop.set()
+        self._lost.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join(1.0)
+
+    @staticmethod
+    def identify(device):
+        """
+        Looks up the USB identity of a port.
+
+        Returns
+        -------
+        tuple or None
+            (vid, pid, serial_number), or None if the port is unknown or not USB.
+        """
+        for info in serial.tools.list_ports.comports():
+            if info.device == device and info.vid is not None:
+                return info.vid, info.pid, info.serial_number
+        return None
+
+    def find_device(self):
+        """
+        Finds the current device name of the supervised board.
+
+        A board that reported a serial number only matches a port with the
+        same one, so a second board of the same model is never picked up.
+        Boards without a serial number can only be matched by VID/PID.
+
+        Returns
+        -------
+        str or None
+            The device name, or None while the board is absent.
+        """
+        for info in serial.tools.list_ports.comports():
+            if self.identity is None:
+                if info.device == self.uart.port:
+                    return info.device
+            elif (info.vid, info.pid) != self.identity[:2]:
+                continue
+            elif self.identity[2] is None or info.serial_number == self.identity[2]:
+                return info.device
+        return None
+
+    def _run(self):
+        if self.identity is None and self.uart.port:
+            self.identity = self.identify(self.uart.port)
+        while not self._stop.is_set():
+            self._lost.wait()
+            if self._stop.is_set():
+                return
+            self._lost.clear()
+            self._reconnect()
+
+    def _reconnect(self):
+        uart = self.uart
+        uart._post(f"Error: Connection to {uart.port} lost, waiting for the device")
+        delay = self.initial_delay
+        while not self._stop.is_set():
+            device = self.find_device()
+            if device is not None:
+                if self.identity is not None and self.identity[2] is None:
+                    uart._post(f"Warning: {device} matched by VID/PID only, the board has no serial number")
+                status = uart.open_port(device, uart.baud_rate or 9600)
+                if status.startswith("Connected") and uart._wait_for_firmware(self.ready_timeout):
+                    uart.ready.set()
+                    self.reconnects += 1
+                    uart._post(f"Reconnected to {device}")
+                    uart.send_message({"command": "BOARD"})
+                    return
+                if uart.ser is not None:
+                    try:
+                        uart.ser.close()
+                    except Exception:
+                        pass
+                    uart.ser = None
+            self._stop.wait(delay)
+            delay = min(delay * 2, self.max_delay)
+
 
 class UARTCommunication:
     """
-    A class to handle UART communication with serial devices.
+    A class to handle UART communication with serial devices.
+
+    Attributes
+    ----------
+    ser : serial.Serial
+        Serial object for communication
+    permission_error_shown : bool
+        Flag to track if the permission error has been shown
+    stop_auto_receive : bool
+        Flag to stop the auto-receive loop
+    codec : JsonCodec
+        JSON backend used to decode inbound and encode outbound frames
+    encoder : CommandEncoder
+        Encoder that turns command dicts into frames
+    inbound : queue.Queue
+        Bounded queue of parsed messages filled by the reader thread
+    protocol : str
+        Wire protocol in use, "json" (default) or "binary"
+    board : BoardMirror
+        Mirror of the firmware board, updated from snapshots and cell deltas
+    writer : CoalescingWriter or None
+        Optional writer that batches outbound frames into fewer writes
+    window_bytes : int
+        Unacknowledged request bytes allowed in flight; matches the 64-byte
+        Arduino RX buffer by default, which fits one MOVE request at a time
+    ready : threading.Event
+        Set once open_port_async() has seen the firmware answer
+    port : str or None
+        Device name passed to the last open_port() call
+    baud_rate : int or None
+        Baud rate passed to the last open_port() call
+    supervisor : ReconnectSupervisor or None
+        Optional supervisor that reopens the device after I/O failures
+    """
+    def __init__(self, inbound_size=256, codec=None, typed=False):
+        """
+        Initializes UARTCommunication with default settings.
+
+        Parameters
+        ----------
+        inbound_size : int, optional
+            Capacity of the inbound message queue (default is 256).
+        codec : str or JsonCodec, optional
+            JSON backend for this instance; None picks the fastest installed one.
+        typed : bool, optional
+            Deliver received messages as Message objects (see to_message())
+            instead of dicts (default is False). Request futures always
+            resolve to dicts.
+        """
+        self.ser = None
+        self.typed = typed
+        self.codec = get_codec(codec)
+        self.encoder = DEFAULT_ENCODER if self.codec.name == "json" else CommandEncoder(codec=self.codec)
+        self.inbound = queue.Queue(maxsize=inbound_size)
+        self.framer = FrameReader()
+        self._pending = collections.deque()
+        self.protocol = "json"
+        self.checksums = False
+        self.bytes_out = 0
+        self.frames_out = 0
+        self.parse_errors = 0
+        self.latency = collections.defaultdict(LatencyHistogram)
+        self.recorder = None
+        # called without arguments from the reader or reconnect thread
+        # whenever messages are queued, e.g. TkWakeup.notify
+        self.on_receive = None
+        self.board = BoardMirror()
+        self.dispatcher = MessageDispatcher()
+        self.writer = None
+        self.scheduler = None
+        self.window_bytes = 64
+        self.pacing_interval = 0.01
+        self.ready = threading.Event()
+        self.port = None
+        self.baud_rate = None
+        self.supervisor = None
+        self._requests = {}
+        self._waiters = []
+        self._next_request_id = 0
+        self._in_flight_bytes = 0
+        self._request_lock = threading.Condition()
+        self._reader_thread = None
+        self._reader_stop = threading.Event()
+
+    def list_ports(self):
+        """
+        Lists available serial ports.
+
+        Returns
+        -------
+        list of str
+            A list of port device names.
+        """
+        return [port.device for port in serial.tools.list_ports.comports()]
+        
+    def open_port(self, port, baud_rate=9600):
+        """
+        Opens a serial port.
+
+        Parameters
+        ----------
+        port : str
+            The name of the port to open.
+        baud_rate : int, optional
+            The baud rate for communication (default is 9600).
+
+        Returns
+        -------
+        str
+            Connection status message.
+        """
+        try:
+            self.ready.clear()
+            self.port, self.baud_rate = port, baud_rate
+            ser = serial.Serial(port, baud_rate, timeout=1)
+            self._set_protocol("json")
+            self._set_checksums(False)
+            # reset the framer before publishing the handle, so a running reader
+            # never mixes bytes left from the previous one into the new stream;
+            # messages still queued, e.g. the supervisor's status, stay for the GUI
+            self.framer.clear()
+            self.ser = ser
+            return f"Connected to {port}"
+        except Exception as e:
+            self.ser = None
+            return f"Error: {e}"
+
+    def open_replay(self, path, speed=1.0):
+        """
+        Plays a wire capture back in place of a serial port.
+
+        The port that is open, if any, is closed first.
+
+        Parameters
+        ----------
+        path : str
+            A capture written by start_capture().
+        speed : float or None, optional
+            Playback speed; None replays as fast as possible (default is 1.0).
+
+        Returns
+        -------
+        str
+            Connection status message.
+        """
+        try:
+            ser = ReplaySerial(path, speed)
+        except Exception as e:
+            return f"Error: {e}"
+        # release the live port, its reader and its supervisor; a capture that
+        # fails to open above leaves the connection untouched
+        self.close_port()
+        self.ready.clear()
+        self.port, self.baud_rate = path, None
+        self.ser = ser
+        self._set_protocol("json")
+        self._set_checksums(False)
+        self.framer.clear()
+        self._pending.clear()
+        self.ready.set()
+        return f"Connected to {path}"
+
+    def start_capture(self, path):
+        """
+        Records every byte read and every frame written to a capture file.
+
+        Parameters
+        ----------
+        path : str
+            The capture file; an existing capture is appended to.
+
+        Returns
+        -------
+        str
+            Capture status message.
+        """
+        self.stop_capture()
+        try:
+            recorder = WireRecorder(path)
+        except Exception as e:
+            return f"Error: {e}"
+        self.recorder = recorder
+        self.framer.tap = lambda data: recorder.record(CAPTURE_IN, data)
+        return f"Capturing to {path}"
+
+    def stop_capture(self):
+        """
+        Stops recording and closes the capture file.
+        """
+        recorder, self.recorder = self.recorder, None
+        self.framer.tap = None
+        if recorder is not None:
+            recorder.close()
+
+    def open_port_async(self, port, baud_rate=9600, timeout=5.0):
+        """
+        Opens a serial port on a worker thread and waits for the firmware to boot.
+
+        Opening the port resets the Arduino through DTR. The port is reported
+        ready as soon as the "TicTacToe Game Started" banner arrives; boards
+        that do not reset on open are accepted if they answer a PING instead.
+        The banner still reaches the normal receive calls.
+
+        Parameters
+        ----------
+        port : str
+            The name of the port to open.
+        baud_rate : int, optional
+            The baud rate for communication (default is 9600).
+        timeout : float, optional
+            Seconds to wait for the firmware (default is 5.0).
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Resolves to the connection status message; on failure the port is
+            closed again and the message starts with "Error".
+        """
+        future = concurrent.futures.Future()
+
+        def connect():
+            status = self.open_port(port, baud_rate)
+            if status.startswith("Connected"):
+                if self._wait_for_firmware(timeout):
+                    self.ready.set()
+                else:
+                    self.close_port()
+                    status = f"Error: No answer from firmware on {port}"
+            future.set_result(status)
+
+        threading.Thread(target=connect, name="uart-open", daemon=True).start()
+        return future
+
+    def _wait_for_firmware(self, timeout):
+        """
+        Waits for the boot banner, falling back to a PING when none comes.
+
+        Returns
+        -------
+        bool
+            True if the firmware answered in time.
+        """
+        deadline = time.monotonic() + timeout
+        if self.wait_for_message(is_banner, min(timeout, 2.5)) is not None:
+            return True
+        # some boards do not reset on open and never print the banner
+        return self.ping(max(deadline - time.monotonic(), 0.1)) is not None
+
+    @classmethod
+    def discover(cls, ports=None, baud_rate=9600, timeout=3.0, codec=None, exclude=(), arduino_only=False):
+        """
+        Probes serial ports in parallel for TicTacToe firmware.
+
+        Every port is opened on its own thread and accepted when it prints the
+        boot banner or answers a PING, so discovery takes as long as the
+        slowest port rather than the sum of all of them. Probed ports are
+        closed again, which resets boards that reset on open.
+
+        Parameters
+        ----------
+        ports : list of str, optional
+            Ports to probe (default is every port the system reports).
+        baud_rate : int, optional
+            The baud rate for communication (default is 9600).
+        timeout : float, optional
+            Seconds each probe may take (default is 3.0).
+        codec : str or JsonCodec, optional
+            JSON codec of the probing connections.
+        exclude : iterable of str, optional
+            Ports not to touch, e.g. the one already in use: probing it would
+            open it a second time and steal bytes from the live session.
+        arduino_only : bool, optional
+            Only probe ports with an Arduino or USB-serial bridge id (default
+            is False).
+
+        Returns
+        -------
+        list of dict
+            One {"port", "banner", "arduino", "latency"} entry per device
+            found, best match first: boards that printed the banner, then
+            ports with an Arduino USB id, then the quickest to answer.
+        """
+        infos = {info.device: info for info in serial.tools.list_ports.comports()}
+        if ports is None:
+            ports = sorted(infos)
+        exclude = set(exclude)
+        ports = [port for port in ports if port not in exclude
+                 and not (arduino_only and not (port in infos and is_arduino_port(infos[port])))]
+        if not ports:
+            return []
+
+        def probe(port):
+            uart = cls(codec=codec)
+            started = time.monotonic()
+            try:
+                if not uart.open_port(port, baud_rate).startswith("Connected"):
+                    return None
+                banner = uart.wait_for_message(is_banner, min(timeout, 2.5)) is not None
+                if not banner and uart.ping(max(started + timeout - time.monotonic(), 0.1)) is None:
+                    return None
+                return {"port": port, "banner": banner,
+                        "arduino": port in infos and is_arduino_port(infos[port]),
+                        "latency": time.monotonic() - started}
+            except Exception:
+                return None
+            finally:
+                uart.close_port()
+
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=len(ports), thread_name_prefix="uart-probe")
+        try:
+            futures = [executor.submit(probe, port) for port in ports]
+            done, _ = concurrent.futures.wait(futures, timeout=timeout + 1.0)
+        finally:
+            executor.shutdown(wait=False)
+        found = [future.result() for future in futures if future in done and future.result() is not None]
+        return sorted(found, key=lambda entry: (not entry["banner"], not entry["arduino"], entry["latency"]))
+
+    def close_port(self):
+        """
+        Stops the reader thread, the outbound scheduler, the reconnect
+        supervisor and any wire capture, flushes pending output and closes the
+        serial port.
+        """
+        self.disable_auto_reconnect()
+        self.disable_scheduler()
+        self.stop_reader()
+        self.disable_write_coalescing()
+        self.stop_capture()
+        self._fail_requests(ConnectionError("Port closed"))
+        if self.ser:
+            try:
+                self.ser.close()
+            except Exception:
+                pass
+        self.ser = None
+
+    @property
+    def reader_running(self):
+        """
+        bool: True while the background reader thread is alive.
+        """
+        return self._reader_thread is not None and self._reader_thread.is_alive()
+
+    def start_reader(self):
+        """
+        Starts a background thread that reads and parses frames off the GUI thread.
+
+        Parsed messages (or error strings) are pushed into `inbound`. When the
+        queue is full the reader waits for consumers instead of dropping frames;
+        unread bytes stay in the OS serial buffer meanwhile.
+        """
+        if self.reader_running:
+            return
+        self._reader_stop.clear()
+        self._reader_thread = threading.Thread(target=self._reader_loop, name="uart-reader", daemon=True)
+        self._reader_thread.start()
+
+    def stop_reader(self, timeout=2.0):
+        """
+        Stops the background reader thread.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            Seconds to wait for the thread to exit (default is 2.0).
+        """
+        self._reader_stop.set()
+        if self._reader_thread is not None and self._reader_thread is not threading.current_thread():
+            self._reader_thread.join(timeout)
+        self._reader_thread = None
+
+    def _reader_loop(self):
+        """
+        Body of the reader thread: bulk-reads the port and queues every complete frame.
+        """
+        while not self._reader_stop.is_set():
+            ser = self.ser
+            if not (ser and ser.is_open):
+                self._reader_stop.wait(0.05)
+                continue
+            try:
+                # block for the first byte, then take everything already waiting
+                data = ser.read(min(ser.in_waiting, self.framer.space) or 1)
+            except (serial.SerialException, OSError) as e:
+                self._enqueue(f"Error: {e}")
+                self._handle_io_error(ser, e)
+                continue
+            except Exception as e:
+                self._enqueue(f"Error: {e}")
+                self._reader_stop.wait(0.1)
+                continue
+            if not data:
+                continue
+            self.framer.feed(data)
+            for frame in self.framer.frames():
+                message = self._parse_line(frame)
+                if message is not None:
+                    self._enqueue(message)
+
+    def _handle_io_error(self, ser, error):
+        """
+        Closes a port that failed with an I/O error and hands it to the supervisor.
+
+        Parameters
+        ----------
+        ser : serial.Serial
+            The port object that failed.
+        error : Exception
+            The I/O error.
+        """
+        if self.ser is not ser:
+            return
+        self.ser = None
+        self.ready.clear()
+        try:
+            ser.close()
+        except Exception:
+            pass
+        self._fail_requests(ConnectionError(f"Connection lost: {error}"))
+        if self.supervisor is not None:
+            self.supervisor.notify_failure()
+
+    def enable_auto_reconnect(self, **options):
+        """
+        Starts a ReconnectSupervisor for the currently open port.
+
+        Parameters
+        ----------
+        **options
+            Keyword arguments for ReconnectSupervisor.
+        """
+        self.disable_auto_reconnect()
+        self.supervisor = ReconnectSupervisor(self, **options)
+
+    def disable_auto_reconnect(self):
+        """
+        Stops the reconnect supervisor, if any.
+        """
+        supervisor, self.supervisor = self.supervisor, None
+        if supervisor is not None:
+            supervisor.stop()
+
+    def _enqueue(self, item):
+        """
+        Puts an item into the inbound queue, blocking while it is full.
+        """
+        while not self._reader_stop.is_set():
+            try:
+                self.inbound.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        self._notify()
+
+    def _post(self, item):
+        """
+        Queues a status message from a helper thread for the receive calls.
+        """
+        self._pending.append(item)
+        self._notify()
+
+    def _notify(self):
+        """
+        Tells the consumer, through `on_receive`, that messages are waiting.
+        """
+        on_receive = self.on_receive
+        if on_receive is not None:
+            try:
+                on_receive()
+            except Exception:
+                pass
+
+    def _parse_line(self, line):
+        """
+        Parses one raw frame with the active protocol.
+
+        A protocol acknowledgement switches the framer immediately, so the
+        bytes that follow it in the same read are framed correctly.
+
+        Returns
+        -------
+        dict or Message or str or None
+            Parsed message, an error message, or None for blank lines and
+            replies consumed by an expect() waiter.
+        """
+        if self.protocol == "binary":
+            message = BINARY_PROTOCOL.decode(line)
+        else:
+            message = _parse_frame(line, self.codec)
+        if isinstance(message, dict):
+            if "id" in message:
+                self._resolve_request(message)
+            if message.get("type") == "proto":
+                self._set_protocol(message.get("proto"))
+            elif message.get("type") == "crc":
+                self._set_checksums(bool(message.get("enable")))
+            else:
+                try:
+                    self.board.apply(message)
+                except ValueError:
+                    self.parse_errors += 1  # malformed board or cell outside the board
+                except (LookupError, TypeError):
+                    pass
+        elif message is not None:
+            self.parse_errors += 1
+        if message is None or (self._waiters and self._match_waiters(message)):
+            return None
+        return to_message(message) if self.typed else message
+
+    def _set_protocol(self, protocol):
+        """
+        Switches the wire protocol and the framer delimiter together.
+        """
+        if protocol not in ("json", "binary"):
+            return
+        self.protocol = protocol
+        self.framer.delimiter = BinaryProtocol.DELIMITER if protocol == "binary" else b"\n"
+
+    def _set_checksums(self, enable):
+        """
+        Turns JSON frame checksums on or off for both directions.
+        """
+        self.checksums = enable
+        self.framer.checksum = enable
+
+    def enable_checksums(self, enable=True, timeout=1.0):
+        """
+        Asks the firmware to add a CRC-8 to every JSON frame.
+
+        Once acknowledged, both directions carry a "*HH" suffix; frames that
+        fail the check are dropped by the framer and counted in
+        `framer.corrupted` instead of surfacing as JSON errors. The firmware
+        acknowledges with the old setting, so the acknowledgement itself is
+        always readable. Binary frames always carry a CRC.
+
+        Parameters
+        ----------
+        enable : bool, optional
+            True to turn checksums on, False to turn them off (default is True).
+        timeout : float, optional
+            Seconds to wait for the acknowledgement (default is 1.0).
+
+        Returns
+        -------
+        bool
+            True if the link now uses the requested setting.
+        """
+        if self.checksums == enable:
+            return True
+        future = self.expect(lambda m: isinstance(m, dict) and m.get("type") == "crc", consume=True)
+        status = self._send_now({"command": "CRC", "enable": enable})
+        if not status.startswith("Sent"):
+            self._cancel_waiter(future)
+            return False
+        reply = self._await_message(future, timeout)
+        return reply is not None and self.checksums == enable
+
+    def negotiate_protocol(self, protocol="binary", timeout=1.0):
+        """
+        Asks the firmware to switch the wire protocol.
+
+        The request is sent in the current protocol and the firmware answers
+        in it before switching; older firmware that ignores the request simply
+        leaves the link on JSON.
+
+        Parameters
+        ----------
+        protocol : str, optional
+            "binary" or "json" (default is "binary").
+        timeout : float, optional
+            Seconds to wait for the acknowledgement (default is 1.0).
+
+        Returns
+        -------
+        bool
+            True if the link now uses the requested protocol.
+        """
+        if self.protocol == protocol:
+            return True
+        future = self.expect(lambda m: isinstance(m, dict) and m.get("type") == "proto", consume=True)
+        status = self._send_now({"command": "PROTO", "proto": protocol})
+        if not status.startswith("Sent"):
+            self._cancel_waiter(future)
+            return False
+        reply = self._await_message(future, timeout)
+        return reply is not None and self.protocol == protocol
+
+    def negotiate_baud(self, baud_rate=115200, timeout=1.0, rollback=BAUD_COMMIT_TIMEOUT):
+        """
+        Switches the link to a higher baud rate with a BAUD handshake.
+
+        The firmware acknowledges at the current rate and switches; the host
+        follows and confirms the new rate with PINGs until the firmware's
+        rollback window closes. If no PONG comes back the host returns to the
+        previous rate only after the window, when the firmware has rolled back
+        too, and checks it with a PING. A firmware that stays silent there
+        committed on a PING whose PONG was lost, so the new rate is tried once
+        more before giving up.
+
+        Parameters
+        ----------
+        baud_rate : int, optional
+            The proposed rate, up to 1000000 (default is 115200).
+        timeout : float, optional
+            Seconds to wait for the acknowledgement and for each PONG (default is 1.0).
+        rollback : float, optional
+            The firmware's rollback window in seconds (default is BAUD_COMMIT_TIMEOUT).
+
+        Returns
+        -------
+        bool
+            True if the link now runs at `baud_rate`.
+        """
+        if not (self.ser and self.ser.is_open):
+            return False
+        previous = self.ser.baudrate
+        if previous == baud_rate:
+            return True
+        future = self.expect(lambda m: isinstance(m, dict) and m.get("type") == "baud", consume=True)
+        status = self._send_now({"command": "BAUD", "baud": baud_rate})
+        if not status.startswith("Sent"):
+            self._cancel_waiter(future)
+            return False
+        reply = self._await_message(future, timeout)
+        if reply is None or reply.get("baud") != baud_rate:
+            return False
+        # the firmware started its window before sending the acknowledgement
+        deadline = time.monotonic() + rollback
+        try:
+            self._switch_baud(baud_rate)
+            remaining = rollback
+            while remaining > 0:
+                if self.ping(min(timeout, remaining)) is not None:
+                    return True
+                remaining = deadline - time.monotonic()
+            self._switch_baud(previous)
+            if self.ping(timeout) is not None:
+                return False
+            self._switch_baud(baud_rate)
+            if self.ping(timeout) is not None:
+                return True
+            self._switch_baud(previous)
+        except Exception:
+            pass
+        return False
+
+    def _switch_baud(self, baud_rate):
+        self.ser.baudrate = baud_rate
+        self.ser.reset_input_buffer()
+        # terminate any garbage the firmware saw while both sides were switching
+        self._write(b"\n")
+
+    def ping(self, timeout=1.0):
+        """
+        Sends a PING and waits for the PONG.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            Seconds to wait (default is 1.0).
+
+        Returns
+        -------
+        float or None
+            Round-trip time in seconds, or None if no PONG arrived.
+        """
+        future = self.expect(lambda m: isinstance(m, dict) and m.get("type") == "pong", consume=True)
+        start = time.perf_counter()
+        if not self._send_now({"command": "PING"}).startswith("Sent"):
+            self._cancel_waiter(future)
+            return None
+        reply = self._await_message(future, timeout)
+        if reply is None:
+            return None
+        rtt = time.perf_counter() - start
+        self.latency["PING"].record(rtt)
+        return rtt
+
+    def measure_link(self, count=50, timeout=1.0):
+        """
+        Measures round-trip latency and throughput of the link with PINGs.
+
+        Parameters
+        ----------
+        count : int, optional
+            Number of PINGs (default is 50).
+        timeout : float, optional
+            Seconds to wait for each PONG (default is 1.0).
+
+        Returns
+        -------
+        dict
+            "baud", "round_trips", "lost", "rtt_ms" (mean) and
+            "bytes_per_second" (payload bytes moved in both directions).
+        """
+        ping_bytes = len(self._encode({"command": "PING"})[0])
+        pong_bytes = len(b'{"type":"pong"}\r\n') if self.protocol == "json" else 4
+        times = []
+        started = time.perf_counter()
+        for _ in range(count):
+            rtt = self.ping(timeout)
+            if rtt is not None:
+                times.append(rtt)
+        elapsed = time.perf_counter() - started
+        return {
+            "baud": self.ser.baudrate if self.ser else None,
+            "round_trips": len(times),
+            "lost": count - len(times),
+            "rtt_ms": 1000 * sum(times) / len(times) if times else None,
+            "bytes_per_second": len(times) * (ping_bytes + pong_bytes) / elapsed if elapsed else 0.0,
+        }
+
+    def expect(self, match, consume=False):
+        """
+        Returns a future for the next received message accepted by `match`.
+
+        Messages are matched as they are parsed, by the reader thread or by
+        whoever reads the port, so waiting never competes with the receive
+        calls for queued messages. Register before sending the command whose
+        reply is awaited.
+
+        Parameters
+        ----------
+        match : callable
+            Predicate called with each parsed message.
+        consume : bool, optional
+            Keep the matching message out of the receive stream, e.g. for
+            link-control replies such as PONG (default is False).
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Resolves to the matching message.
+        """
+        future = concurrent.futures.Future()
+        with self._request_lock:
+            self._waiters.append((match, consume, future))
+        return future
+
+    def _cancel_waiter(self, future):
+        with self._request_lock:
+            self._waiters = [waiter for waiter in self._waiters if waiter[2] is not future]
+        future.cancel()
+
+    def _match_waiters(self, message):
+        """
+        Resolves the waiters accepting a parsed message.
+
+        Returns
+        -------
+        bool
+            True if a consuming waiter took the message.
+        """
+        matched = []
+        with self._request_lock:
+            for waiter in self._waiters:
+                try:
+                    if waiter[0](message):
+                        matched.append(waiter)
+                except Exception:
+                    continue
+            if matched:
+                self._waiters = [waiter for waiter in self._waiters if waiter not in matched]
+        for _, _, future in matched:
+            if future.set_running_or_notify_cancel():
+                future.set_result(message)
+        return any(consume for _, consume, _ in matched)
+
+    def _await_message(self, future, timeout):
+        """
+        Waits for a future from expect(), reading the port itself when no
+        reader thread runs. Messages read meanwhile are queued in order.
+
+        Returns
+        -------
+        dict or Message or str or None
+            The matching message, or None on timeout.
+        """
+        deadline = time.monotonic() + timeout
+        try:
+            while not future.done():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                if self.reader_running:
+                    try:
+                        return future.result(remaining)
+                    except (concurrent.futures.TimeoutError, concurrent.futures.CancelledError):
+                        return None
+                if not (self.ser and self.ser.is_open):
+                    return None
+                try:
+                    if self.framer.read_from(self.ser):
+                        for frame in self.framer.frames():
+                            message = self._parse_line(frame)
+                            if message is not None:
+                                self._pending.append(message)
+                        continue
+                except Exception as e:
+                    self._pending.append(f"Error: {e}")
+                    return None
+                time.sleep(0.005)
+            return None if future.cancelled() else future.result()
+        finally:
+            if not future.done():
+                self._cancel_waiter(future)
+
+    def wait_for_message(self, match, timeout=1.0):
+        """
+        Waits for the first message accepted by `match`.
+
+        Messages already queued are checked first; the matching message and
+        every other one stay queued, in order, for the normal receive calls.
+
+        Parameters
+        ----------
+        match : callable
+            Predicate called with each received message.
+        timeout : float, optional
+            Seconds to wait (default is 1.0).
+
+        Returns
+        -------
+        dict or str or None
+            The matching message, or None on timeout.
+        """
+        future = self.expect(match)
+        with self.inbound.mutex:
+            queued = list(self._pending) + list(self.inbound.queue)
+        for message in queued:
+            if match(message):
+                self._cancel_waiter(future)
+                return message
+        return self._await_message(future, timeout)
+
+    def send_message(self, message):
+        """
+        Sends a JSON-formatted message via UART.
+
+        Parameters
+        ----------
+        message : dict
+            The message to send.
+
+        Returns
+        -------
+        str
+            Message status; with the outbound scheduler enabled the status of
+            queueing the message.
+        """
+        scheduler = self.scheduler
+        if scheduler is not None:
+            if not (self.ser and self.ser.is_open):
+                return "Port not opened"
+            return scheduler.submit(message)
+        return self._send_now(message)
+
+    def _send_now(self, message):
+        """
+        Encodes and writes a message right away.
+        """
+        if self.ser and self.ser.is_open:
+            try:
+                frame, json_message = self._encode(message)
+                self._write(frame)
+                return f"Sent: {json_message}"
+            except Exception as e:
+                return f"Error: {e}"
+        return "Port not opened"
+
+    def enable_scheduler(self, capacity=32, pacing_interval=0.01):
+        """
+        Routes send_message() through a coalescing OutboundScheduler.
+
+        Commands are paced to the firmware's 64-byte RX buffer: with the JSON
+        protocol they go out as requests, so at most `window_bytes` are
+        unacknowledged at any time; binary frames carry no id and are spaced
+        `pacing_interval` seconds apart instead.
+
+        Parameters
+        ----------
+        capacity : int, optional
+            Maximum number of pending commands (default is 32).
+        pacing_interval : float, optional
+            Delay after each binary frame in seconds (default is 0.01).
+        """
+        self.disable_scheduler()
+        self.pacing_interval = pacing_interval
+        self.scheduler = OutboundScheduler(self._send_paced, capacity)
+        self.scheduler.start()
+
+    def disable_scheduler(self):
+        """
+        Stops the outbound scheduler, dropping commands not sent yet.
+        """
+        scheduler, self.scheduler = self.scheduler, None
+        if scheduler is not None:
+            scheduler.close()
+
+    def _send_paced(self, message):
+        """
+        Sends one scheduled command, blocking while the firmware buffer is full.
+        """
+        if self.protocol == "json":
+            # a request waits while window_bytes are unacknowledged
+            future = self.request(message, timeout=1.0)
+            if future.done() and future.exception() is not None:
+                raise future.exception()
+            return
+        status = self._send_now(message)
+        if not status.startswith("Sent"):
+            raise ConnectionError(status)
+        time.sleep(self.pacing_interval)
+
+    def request(self, message, expect_type=None, timeout=2.0):
+        """
+        Sends a command tagged with a sequence "id" and returns a future for its reply.
+
+        The firmware echoes the id in every reply to the command, so several
+        requests may be in flight at once. Sending waits while the
+        unacknowledged bytes would exceed `window_bytes`; a request counts as
+        acknowledged once its first reply arrives. Replies are matched by the
+        reader thread, or by whoever calls the receive methods, and still
+        reach the normal receive stream. Requests need the JSON protocol.
+
+        A MOVE with its id takes about 50 bytes on the wire, so the default
+        64-byte window holds a single MOVE and only shorter commands such as
+        PING overlap with it; raise `window_bytes` to pipeline MOVEs.
+
+        Parameters
+        ----------
+        message : dict
+            The command to send; an "id" field is added to a copy.
+        expect_type : str, optional
+            Reply "type" that resolves the future; None takes the first reply.
+            An "error" reply always resolves it.
+        timeout : float, optional
+            Seconds to wait for window space and for the reply (default is 2.0).
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Resolves to the reply dict, or fails with ConnectionError,
+            TimeoutError or the write error.
+        """
+        future = concurrent.futures.Future()
+        if not (self.ser and self.ser.is_open):
+            future.set_exception(ConnectionError("Port not opened"))
+            return future
+        if self.protocol != "json":
+            future.set_exception(ValueError("Requests need the JSON protocol"))
+            return future
+        deadline = time.monotonic() + timeout
+        expired = []
+        admitted = False
+        with self._request_lock:
+            request_id = self._next_request_id
+            self._next_request_id = (request_id + 1) % 0x10000
+            frame = self.encoder.encode_request(message, request_id)
+            if self.checksums:
+                frame = add_checksum(frame)
+            while self._in_flight_bytes and self._in_flight_bytes + len(frame) > self.window_bytes:
+                expired += self._expire_requests_locked()
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._request_lock.wait(min(remaining, 0.05))
+            else:
+                self._requests[request_id] = _PendingRequest(future, expect_type, len(frame), deadline,
+                                                             message.get("command"))
+                self._in_flight_bytes += len(frame)
+                admitted = True
+        for expired_future in expired:
+            expired_future.set_exception(TimeoutError("No reply to request"))
+        if not admitted:
+            future.set_exception(TimeoutError("Request window full"))
+            return future
+        try:
+            self._write(frame)
+        except Exception as e:
+            with self._request_lock:
+                self._release_request_locked(request_id)
+            future.set_exception(e)
+        return future
+
+    @property
+    def pending_requests(self):
+        """
+        int: Number of requests still waiting for their reply.
+        """
+        return len(self._requests)
+
+    def _resolve_request(self, message):
+        """
+        Acknowledges the request named by a reply's "id" and resolves it if the type matches.
+        """
+        with self._request_lock:
+            pending = self._requests.get(message["id"])
+            if pending is not None:
+                if pending.size:  # first reply: the command's round trip
+                    self.latency[pending.command].record(time.perf_counter() - pending.sent)
+                self._in_flight_bytes -= pending.size
+                pending.size = 0
+                self._request_lock.notify_all()
+                message_type = message.get("type")
+                if pending.expect_type not in (None, message_type) and message_type != "error":
+                    pending = None
+                else:
+                    del self._requests[message["id"]]
+            expired = self._expire_requests_locked()
+        if pending is not None and not pending.future.done():
+            pending.future.set_result(message)
+        for future in expired:
+            future.set_exception(TimeoutError("No reply to request"))
+
+    def _release_request_locked(self, request_id):
+        pending = self._requests.pop(request_id, None)
+        if pending is not None:
+            self._in_flight_bytes -= pending.size
+            self._request_lock.notify_all()
+        return pending
+
+    def _expire_requests_locked(self):
+        """
+        Drops requests past their deadline and returns their futures for failing.
+        """
+        now = time.monotonic()
+        expired = [request_id for request_id, pending in self._requests.items() if pending.deadline <= now]
+        return [self._release_request_locked(request_id).future for request_id in expired]
+
+    def _fail_requests(self, error):
+        """
+        Fails every pending request with the given exception.
+        """
+        with self._request_lock:
+            pending = [self._release_request_locked(request_id) for request_id in list(self._requests)]
+        for request in pending:
+            if not request.future.done():
+                request.future.set_exception(error)
+
+    def send_messages(self, messages):
+        """
+        Sends several messages with a single write.
+
+        Parameters
+        ----------
+        messages : iterable of dict
+            The messages to send, in order.
+
+        Returns
+        -------
+        list of str
+            One status per message. Messages that cannot be encoded are
+            reported and skipped; a failed write is reported for all of them.
+        """
+        messages = list(messages)
+        if not (self.ser and self.ser.is_open):
+            return ["Port not opened"] * len(messages)
+        statuses = []
+        frames = []
+        for message in messages:
+            try:
+                frame, json_message = self._encode(message)
+            except Exception as e:
+                statuses.append(f"Error: {e}")
+                continue
+            frames.append(frame)
+            statuses.append(f"Sent: {json_message}")
+        try:
+            if frames:
+                self._write(b"".join(frames), len(frames))
+        except Exception as e:
+            return [f"Error: {e}"] * len(messages)
+        return statuses
+
+    def enable_write_coalescing(self, window=0.002, max_bytes=256):
+        """
+        Routes outbound frames through a CoalescingWriter.
+
+        Parameters
+        ----------
+        window : float, optional
+            Flush deadline in seconds (default is 0.002).
+        max_bytes : int, optional
+            Buffered size that triggers an immediate flush (default is 256).
+        """
+        self.disable_write_coalescing()
+        self.writer = CoalescingWriter(lambda data: self.ser.write(data), window, max_bytes)
+
+    def disable_write_coalescing(self):
+        """
+        Flushes and removes the coalescing writer, if any.
+        """
+        writer, self.writer = self.writer, None
+        if writer is not None:
+            try:
+                writer.close()
+            except Exception:
+                pass
+
+    def flush(self):
+        """
+        Writes any frames held by the coalescing writer immediately.
+
+        Returns
+        -------
+        str
+            Flush status.
+        """
+        if self.writer is None:
+            return "Flushed"
+        try:
+            self.writer.flush()
+            return "Flushed"
+        except Exception as e:
+            return f"Error: {e}"
+
+    def _encode(self, message):
+        """
+        Encodes a message for the active protocol.
+
+        Returns
+        -------
+        tuple of (bytes, str)
+            The frame to write and the message's JSON text for status reports.
+        """
+        frame, json_message = self.encoder.encode(message)
+        if self.protocol == "binary":
+            frame = BINARY_PROTOCOL.encode(message)
+        elif self.checksums:
+            frame = add_checksum(frame)
+        return frame, json_message
+
+    def _write(self, frame, frames=1):
+        """
+        Writes one or more encoded frames directly or through the coalescing writer.
+        """
+        writer = self.writer
+        if writer is None:
+            self.ser.write(frame)
+        else:
+            error, writer.error = writer.error, None
+            if error is not None:
+                raise error
+            writer.write(frame)
+        self.bytes_out += len(frame)
+        self.frames_out += frames
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.record(CAPTURE_OUT, frame)
+
+    def stats(self):
+        """
+        Returns a snapshot of the link counters.
+
+        The counters are plain attributes updated inline by the I/O paths;
+        this method only collects them.
+
+        Returns
+        -------
+        dict
+            "bytes_in", "bytes_out", "frames_in", "frames_out",
+            "parse_errors", "corrupted" (checksum failures), "overflows"
+            (over-long frames), "resyncs" (both), "reconnects"; the queue
+            depths "inbound", "pending", "outbound", "requests" and
+            "in_flight_bytes"; and "latency", one LatencyHistogram snapshot
+            per command sent with request() or ping().
+        """
+        framer = self.framer
+        scheduler = self.scheduler
+        return {
+            "bytes_in": framer.bytes_in,
+            "bytes_out": self.bytes_out,
+            "frames_in": framer.frames_in,
+            "frames_out": self.frames_out,
+            "parse_errors": self.parse_errors,
+            "corrupted": framer.corrupted,
+            "overflows": framer.overflows,
+            "resyncs": framer.corrupted + framer.overflows,
+            "reconnects": self.supervisor.reconnects if self.supervisor is not None else 0,
+            "inbound": self.inbound.qsize(),
+            "pending": len(self._pending),
+            "outbound": len(scheduler) if scheduler is not None else 0,
+            "requests": len(self._requests),
+            "in_flight_bytes": self._in_flight_bytes,
+            "latency": {command: histogram.snapshot() for command, histogram in list(self.latency.items())},
+        }
+
+    def receive_messages(self, max_count=None, max_time=None):
+        """
+        Receives every complete message that is already buffered.
+
+        Parameters
+        ----------
+        max_count : int, optional
+            Maximum number of messages to return; None returns all of them.
+        max_time : float, optional
+            Time budget in seconds; parsing stops once it is spent.
+
+        Returns
+        -------
+        list of dict or str
+            Parsed JSON messages and error messages in arrival order. Frames
+            beyond the caps stay buffered for the next call.
+        """
+        messages = []
+        deadline = None if max_time is None else time.monotonic() + max_time
+
+        def full():
+            return ((max_count is not None and len(messages) >= max_count)
+                    or (deadline is not None and time.monotonic() >= deadline))
+
+        while self._pending and not full():
+            messages.append(self._pending.popleft())
+        if self.reader_running:
+            while not full():
+                try:
+                    messages.append(self.inbound.get_nowait())
+                except queue.Empty:
+                    break
+            return messages
+        if full() or not (self.ser and self.ser.is_open):
+            return messages
+        try:
+            self.framer.read_from(self.ser)
+            for frame in self.framer.frames():
+                message = self._parse_line(frame)
+                if message is None:
+                    continue
+                if full():
+                    self._pending.append(message)
+                else:
+                    messages.append(message)
+        except Exception as e:
+            messages.append(f"Error: {e}")
+        return messages
+
+    def subscribe(self, msg_type, handler, priority=0):
+        """
+        Registers a handler for received messages of one type.
+
+        Handlers run on the thread calling dispatch_messages(), see
+        MessageDispatcher.subscribe().
+
+        Returns
+        -------
+        int
+            Token for unsubscribe().
+        """
+        return self.dispatcher.subscribe(msg_type, handler, priority)
+
+    def unsubscribe(self, token):
+        """
+        Removes a handler registered with subscribe().
+
+        Returns
+        -------
+        bool
+            False if the token was not subscribed.
+        """
+        return self.dispatcher.unsubscribe(token)
+
+    def dispatch_messages(self, max_count=None, max_time=None):
+        """
+        Receives the buffered messages and hands each to its subscribers.
+
+        Parameters are those of receive_messages(); `max_time` covers the
+        handlers as well. At least one message is dispatched per call, and
+        messages left over once the time is spent stay queued, in order, for
+        the next call (see `backlog`).
+
+        Returns
+        -------
+        int
+            Number of messages dispatched.
+        """
+        deadline = None if max_time is None else time.monotonic() + max_time
+        messages = self.receive_messages(max_count, max_time)
+        dispatch = self.dispatcher.dispatch
+        for index, message in enumerate(messages):
+            dispatch(message)
+            if deadline is not None and time.monotonic() >= deadline and index + 1 < len(messages):
+                self._pending.extendleft(reversed(messages[index + 1:]))
+                return index + 1
+        return len(messages)
+
+    @property
+    def backlog(self):
+        """
+        int: Messages already received and waiting for the receive calls.
+        """
+        return len(self._pending) + self.inbound.qsize()
+
+    def receive_message(self):
+        """
+        Receives and parses a JSON message from UART.
+
+        Returns
+        -------
+        dict or str or None
+            Parsed JSON message if valid, or an error message. When the reader
+            thread is running the message is taken from `inbound` without
+            blocking, and None is returned if nothing is queued.
+        """
+        if self._pending:
+            return self._pending.popleft()
+        if self.reader_running:
+            try:
+                return self.inbound.get_nowait()
+            except queue.Empty:
+                return None
+        if self.ser and self.ser.is_open:
+            try:
+                if self.framer.read_from(self.ser):
+                    for frame in self.framer.frames():
+                        message = self._parse_line(frame)
+                        if message is not None:
+                            self._pending.append(message)
+                    if self._pending:
+                        return self._pending.popleft()
+                return None
+            except Exception as e:
+                return f"Error: {e}"
+        return "Port not opened"
+
+
+class AsyncUARTCommunication:
+    """
+    An asyncio counterpart of UARTCommunication.
+
+    The serial file descriptor is registered with the event loop via
+    `loop.add_reader`, so many ports can be served from one loop without
+    threads or polling. This requires a selector-based event loop on a POSIX
+    system; the Windows proactor loop cannot watch serial handles.
+
+    Attributes
+    ----------
+    ser : serial.Serial
+        Serial object for communication, opened in non-blocking mode
+    """
+    def __init__(self, inbound_size=256, codec=None):
+        """
+        Initializes AsyncUARTCommunication with default settings.
+
+        Parameters
+        ----------
+        inbound_size : int, optional
+            Capacity of the inbound message queue (default is 256).
+        codec : str or JsonCodec, optional
+            JSON backend for this instance; None picks the fastest installed one.
+        """
+        self.ser = None
+        self.codec = get_codec(codec)
+        self.encoder = DEFAULT_ENCODER if self.codec.name == "json" else CommandEncoder(codec=self.codec)
+        self._inbound_size = inbound_size
+        self._inbound = None
+        self._loop = None
+        self._framer = FrameReader()
+        self._paused = False
+        self._waiters = []
+        self._backlog = collections.deque()
+        self._write_lock = None
+
+    async def open_port(self, port, baud_rate=9600):
+        """
+        Opens a serial port and starts watching it on the running event loop.
+
+        Parameters
+        ----------
+        port : str
+            The name of the port to open.
+        baud_rate : int, optional
+            The baud rate for communication (default is 9600).
+
+        Returns
+        -------
+        str
+            Connection status message.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._inbound = asyncio.Queue(maxsize=self._inbound_size)
+        self._backlog.clear()
+        self._paused = False
+        # one writer at a time: concurrent senders would replace each other's add_writer callback
+        self._write_lock = asyncio.Lock()
+        try:
+            self.ser = serial.Serial(port, baud_rate, timeout=0, write_timeout=0)
+            self._loop.add_reader(self.ser.fileno(), self._on_readable)
+            return f"Connected to {port}"
+        except Exception as e:
+            self.ser = None
+            return f"Error: {e}"
+
+    def close_port(self):
+        """
+        Stops watching the port, closes it and fails any pending requests.
+        """
+        if self.ser:
+            try:
+                self._loop.remove_reader(self.ser.fileno())
+                self._loop.remove_writer(self.ser.fileno())
+            except Exception:
+                pass
+            try:
+                self.ser.close()
+            except Exception:
+                pass
+        self.ser = None
+        for _, future in self._waiters:
+            if not future.done():
+                future.set_exception(ConnectionError("Port closed"))
+        self._waiters.clear()
+        if self._inbound is not None:
+            # end of stream: wakes up iterators waiting on an empty queue
+            if self._backlog or self._inbound.full():
+                self._backlog.append(None)
+            else:
+                self._inbound.put_nowait(None)
+
+    async def send_message(self, message):
+        """
+        Sends a JSON-formatted message, waiting until it is fully written.
+
+        Concurrent calls are written one after another, never interleaved.
+
+        Parameters
+        ----------
+        message : dict
+            The message to send.
+
+        Returns
+        -------
+        str
+            Message status.
+        """
+        if not (self.ser and self.ser.is_open):
+            return "Port not opened"
+        try:
+            data, json_message = self.encoder.encode(message)
+            async with self._write_lock:
+                written = self.ser.write(data)
+                while written < len(data):
+                    data = data[written:]
+                    await self._wait_writable()
+                    written = self.ser.write(data)
+            return f"Sent: {json_message}"
+        except Exception as e:
+            return f"Error: {e}"
+
+    send = send_message
+
+    def _wait_writable(self):
+        """
+        Returns a future resolved once the port can accept more output.
+        """
+        future = self._loop.create_future()
+        fd = self.ser.fileno()
+
+        def on_writable():
+            self._loop.remove_writer(fd)
+            if not future.done():
+                future.set_result(None)
+
+        self._loop.add_writer(fd, on_writable)
+        return future
+
+    async def receive_message(self, timeout=None):
+        """
+        Waits for the next parsed message.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            Seconds to wait; None waits indefinitely.
+
+        Returns
+        -------
+        dict or str or None
+            Parsed JSON message, an error message, or None on timeout.
+        """
+        if self._inbound is None:
+            return "Port not opened"
+        try:
+            message = await asyncio.wait_for(self._inbound.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        self._resume_reading()
+        if message is None:
+            return "Port not opened"
+        return message
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not (self.ser and self.ser.is_open) and (self._inbound is None or self._inbound.empty()):
+            raise StopAsyncIteration
+        message = await self.receive_message()
+        if message == "Port not opened":
+            raise StopAsyncIteration
+        return message
+
+    async def request(self, message, expect_type=None, timeout=2.0):
+        """
+        Sends a command and waits for the first reply of the expected type.
+
+        The matching reply is handed to this caller only and does not appear
+        in `receive_message()` or the async iterator.
+
+        Parameters
+        ----------
+        message : dict
+            The command to send.
+        expect_type : str, optional
+            The reply "type" to wait for; None accepts any JSON reply.
+        timeout : float, optional
+            Seconds to wait for the reply (default is 2.0).
+
+        Returns
+        -------
+        dict
+            The reply message.
+
+        Raises
+        ------
+        ConnectionError
+            If the port is not open or is closed while waiting.
+        asyncio.TimeoutError
+            If no matching reply arrives in time.
+        """
+        if not (self.ser and self.ser.is_open):
+            raise ConnectionError("Port not opened")
+        waiter = (expect_type, self._loop.create_future())
+        self._waiters.append(waiter)
+        try:
+            status = await self.send_message(message)
+            if status.startswith("Error"):
+                raise ConnectionError(status)
+            return await asyncio.wait_for(asyncio.shield(waiter[1]), timeout)
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def _on_readable(self):
+        """
+        Event loop callback: reads the available bytes and queues complete frames.
+        """
+        try:
+            data = self.ser.read(min(self.ser.in_waiting, self._framer.space) or 1)
+        except Exception as e:
+            # the device is gone (e.g. unplugged): report it and end the stream
+            self._deliver(f"Error: {e}")
+            self.close_port()
+            return
+        if not data:
+            return
+        self._framer.feed(data)
+        for frame in self._framer.frames():
+            message = _parse_frame(frame, self.codec)
+            if message is not None:
+                self._deliver(message)
+
+    def _deliver(self, message):
+        """
+        Hands a message to a matching request waiter or to the inbound queue.
+        """
+        if isinstance(message, dict):
+            for waiter in self._waiters:
+                expect_type, future = waiter
+                if not future.done() and expect_type in (None, message.get("type")):
+                    self._waiters.remove(waiter)
+                    future.set_result(message)
+                    return
+        if self._backlog or self._inbound.full():
+            self._backlog.append(message)
+        else:
+            self._inbound.put_nowait(message)
+        if self._inbound.full() and not self._paused and self.ser:
+            # apply backpressure: leave further bytes in the OS buffer
+            self._loop.remove_reader(self.ser.fileno())
+            self._paused = True
+
+    def _resume_reading(self):
+        """
+        Refills the queue from the backlog and re-registers the reader once
+        a consumer has made room.
+        """
+        while self._backlog and not self._inbound.full():
+            self._inbound.put_nowait(self._backlog.popleft())
+        if self._paused and not self._backlog and self.ser and self.ser.is_open and not self._inbound.full():
+            self._paused = False
+            self._loop.add_reader(self.ser.fileno(), self._on_readable)
+
+
+class _PooledPort:
+    """
+    Per-port state of a UARTPool.
+    """
+    __slots__ = ("name", "ser", "fd", "framer", "callback", "inbound", "bytes_in", "bytes_out",
+                 "frames_in", "frames_out", "errors", "dropped")
 
-    Attributes
-    ----------
-    ser : serial.Serial
-        Serial object for communication
-    permission_error_shown : bool
-        Flag to track if the permission error has been shown
-    stop_auto_receive : bool
-        Flag to stop the auto-receive loop
+    def __init__(self, name, ser, callback, queue_size):
+        self.name = name
+        self.ser = ser
+        self.fd = ser.fileno()
+        self.framer = FrameReader()
+        self.callback = callback
+        self.inbound = queue.Queue(maxsize=queue_size)
+        self.bytes_in = self.bytes_out = 0
+        self.frames_in = self.frames_out = 0
+        self.errors = self.dropped = 0
+
+
+class UARTPool:
     """
-    def __init__(self):
+    Serves many serial ports from a single selector-driven I/O thread.
+
+    Every open port's file descriptor is registered with one `selectors`
+    selector (epoll on Linux); the I/O thread reads whatever is ready, frames
+    and parses it, and routes each message to the port's callback or to its
+    bounded queue. Writes happen on the caller's thread. Serial descriptors
+    cannot be selected on Windows, so the pool is POSIX-only.
+    """
+    def __init__(self, codec=None, queue_size=256):
         """
-        Initializes UARTCommunication with default settings.
+        Initializes an empty pool.
+
+        Parameters
+        ----------
+        codec : str or JsonCodec, optional
+            JSON backend shared by all ports; None picks the fastest installed one.
+        queue_size : int, optional
+            Capacity of each port's inbound queue (default is 256).
         """
-        self.ser = None
+        self.codec = get_codec(codec)
+        self.encoder = DEFAULT_ENCODER if self.codec.name == "json" else CommandEncoder(codec=self.codec)
+        self.queue_size = queue_size
+        self._ports = {}
+        self._selector = selectors.DefaultSelector()
+        self._changes = collections.deque()
+        self._wakeup_recv, self._wakeup_send = socket.socketpair()
+        self._wakeup_recv.setblocking(False)
+        self._selector.register(self._wakeup_recv, selectors.EVENT_READ, None)
+        self._stop = threading.Event()
+        self._thread = None
 
-    def list_ports(self):
+    def __len__(self):
+        return len(self._ports)
+
+    @property
+    def ports(self):
         """
-        Lists available serial ports.
+        list of str: Names of the open ports.
+        """
+        return list(self._ports)
 
-        Returns
-        -------
-        list of str
-            A list of port device names.
+    def start(self):
         """
-        return [port.device for port in serial.tools.list_ports.comports()]
-        
-    def open_port(self, port, baud_rate=9600):
+        Starts the I/O thread.
         """
-        Opens a serial port.
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="uart-pool", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the I/O thread and closes every port.
+        """
+        self._stop.set()
+        self._wakeup()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(2.0)
+        self._thread = None
+        for name in list(self._ports):
+            self._unregister(name)
+        self._run_changes()
+
+    def open_port(self, port, baud_rate=9600, callback=None):
+        """
+        Opens a port and adds it to the pool.
 
         Parameters
         ----------
@@ -49,63 +3731,191 @@ class UARTCommunication:
             The name of the port to open.
         baud_rate : int, optional
             The baud rate for communication (default is 9600).
+        callback : callable, optional
+            Called as callback(port, message) on the I/O thread for every
+            message; without one, messages go to the port's queue.
 
         Returns
         -------
         str
             Connection status message.
         """
+        if port in self._ports:
+            return f"Error: {port} is already open"
         try:
-            self.ser = serial.Serial(port, baud_rate, timeout=1)
-            return f"Connected to {port}"
+            ser = serial.Serial(port, baud_rate, timeout=0)
         except Exception as e:
-            self.ser = None
             return f"Error: {e}"
+        entry = _PooledPort(port, ser, callback, self.queue_size)
+        self._ports[port] = entry
+        self._schedule(lambda: self._selector.register(entry.fd, selectors.EVENT_READ, entry))
+        return f"Connected to {port}"
 
-    def send_message(self, message):
+    def close_port(self, port):
         """
-        Sends a JSON-formatted message via UART.
+        Removes a port from the pool and closes it.
+        """
+        if port in self._ports:
+            self._unregister(port)
 
-        Parameters
-        ----------
-        message : dict
-            The message to send.
+    def send_message(self, port, message):
+        """
+        Sends a JSON-formatted message to one port.
 
         Returns
         -------
         str
             Message status.
         """
-        if self.ser and self.ser.is_open:
+        entry = self._ports.get(port)
+        if entry is None or not entry.ser.is_open:
+            return "Port not opened"
+        try:
+            frame, json_message = self.encoder.encode(message)
+            entry.ser.write(frame)
+            entry.bytes_out += len(frame)
+            entry.frames_out += 1
+            return f"Sent: {json_message}"
+        except Exception as e:
+            entry.errors += 1
+            return f"Error: {e}"
+
+    def broadcast(self, message):
+        """
+        Sends a message to every port.
+
+        Returns
+        -------
+        dict
+            Status per port name.
+        """
+        return {port: self.send_message(port, message) for port in list(self._ports)}
+
+    def receive_messages(self, port, max_count=None):
+        """
+        Drains the queued messages of a port without a callback.
+
+        Returns
+        -------
+        list of dict or str
+            Parsed messages and error messages in arrival order.
+        """
+        entry = self._ports.get(port)
+        messages = []
+        while entry is not None and (max_count is None or len(messages) < max_count):
             try:
-                json_message = json.dumps(message)
-                self.ser.write((json_message + "\n").encode())
-                return f"Sent: {json_message}"
-            except Exception as e:
-                return f"Error: {e}"
-        return "Port not opened"
+                messages.append(entry.inbound.get_nowait())
+            except queue.Empty:
+                break
+        return messages
 
-    def receive_message(self):
+    def stats(self):
         """
-        Receives and parses a JSON message from UART.
+        Returns aggregate and per-port I/O counters.
 
         Returns
         -------
-        dict or str
-            Parsed JSON message if valid, or an error message.
+        dict
+            "ports" plus the totals of "bytes_in", "bytes_out", "frames_in",
+            "frames_out", "errors" and "dropped", and "per_port" with the same
+            counters for each port.
         """
-        if self.ser and self.ser.is_open:
+        fields = ("bytes_in", "bytes_out", "frames_in", "frames_out", "errors", "dropped")
+        per_port = {name: {field: getattr(entry, field) for field in fields}
+                    for name, entry in list(self._ports.items())}
+        totals = {field: sum(counters[field] for counters in per_port.values()) for field in fields}
+        return dict(totals, ports=len(per_port), per_port=per_port)
+
+    def _schedule(self, change):
+        """
+        Runs a selector change on the I/O thread, or right away if it is not running.
+        """
+        self._changes.append(change)
+        if self._thread is not None and self._thread.is_alive():
+            self._wakeup()
+        else:
+            self._run_changes()
+
+    def _run_changes(self):
+        while self._changes:
             try:
-                if self.ser.in_waiting > 0:
-                    response = self.ser.readline().decode().strip()
-                    if response:
-                        json_response = json.loads(response)
-                        return json_response
-            except json.JSONDecodeError:
-                return "Error: Invalid JSON received"
-            except Exception as e:
-                return f"Error: {e}"
-        return "Port not opened"
+                self._changes.popleft()()
+            except (KeyError, ValueError, OSError):
+                pass
+
+    def _wakeup(self):
+        try:
+            self._wakeup_send.send(b"\0")
+        except OSError:
+            pass
+
+    def _unregister(self, port):
+        entry = self._ports.pop(port, None)
+        if entry is None:
+            return
+
+        def change():
+            try:
+                self._selector.unregister(entry.fd)
+            finally:
+                entry.ser.close()
+
+        self._schedule(change)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._run_changes()
+            for key, _ in self._selector.select(timeout=1.0):
+                entry = key.data
+                if entry is None:
+                    try:
+                        self._wakeup_recv.recv(4096)
+                    except OSError:
+                        pass
+                    continue
+                self._read(entry)
+        self._run_changes()
+
+    def _read(self, entry):
+        """
+        Reads and routes everything waiting on one port.
+        """
+        try:
+            # one os.read on the non-blocking descriptor; pyserial's read() would
+            # add an ioctl and a select() that cannot handle descriptors >= 1024
+            data = os.read(entry.fd, entry.framer.space or 1)
+            if not data:
+                raise serial.SerialException("device disconnected")
+        except BlockingIOError:
+            return
+        except Exception as e:
+            entry.errors += 1
+            self._deliver(entry, f"Error: {e}")
+            self._unregister(entry.name)
+            return
+        entry.bytes_in += len(data)
+        entry.framer.feed(data)
+        for frame in entry.framer.frames():
+            message = _parse_frame(frame, self.codec)
+            if message is None:
+                continue
+            if isinstance(message, str):
+                entry.errors += 1
+            entry.frames_in += 1
+            self._deliver(entry, message)
+
+    def _deliver(self, entry, message):
+        if entry.callback is not None:
+            try:
+                entry.callback(entry.name, message)
+            except Exception:
+                entry.errors += 1
+            return
+        try:
+            entry.inbound.put_nowait(message)
+        except queue.Full:
+            # never stall the shared I/O thread on one slow consumer
+            entry.dropped += 1
 
 
 def update_game_board(board, buttons):
@@ -120,6 +3930,16 @@ def update_game_board(board, buttons):
             buttons[i][j].config(text=board[i][j])
 
 
+def update_game_cell(message, buttons):
+    """
+    Updates the single GUI cell named by a cell delta message.
+
+    @param message A {"type": "cell", "r": row, "c": col, "v": symbol} message.
+    @param buttons The GUI button widgets for each cell in the game board.
+    """
+    buttons[message["r"]][message["c"]].config(text=message["v"])
+
+
 def send_move(uart, row, col):
     """
     Sends a MOVE command with the selected row and column to the UART.
@@ -143,6 +3963,16 @@ def set_mode(uart, mode):
     uart.send_message(message)
 
 
+def request_board(uart):
+    """
+    Sends a BOARD command asking the firmware for a full board snapshot.
+
+    @param uart The UARTCommunication instance for sending the command.
+    """
+    message = {"command": "BOARD"}
+    uart.send_message(message)
+
+
 def reset_game(uart):
     """
     Sends a RESET command to the UART to reset the game.
@@ -153,38 +3983,414 @@ def reset_game(uart):
     uart.send_message(message)
 
 
-def auto_receive(uart, buttons, output_text, root):
+def show_board(message, buttons, output_text):
     """
-    Periodically checks for incoming messages on the UART and updates the GUI accordingly.
+    Display handler for full board snapshots; raises ValueError for a
+    malformed board.
     """
-    try:
-        if uart.ser and uart.ser.is_open:
-            response = uart.receive_message()
-            if response and response != "Port not opened":
-                if isinstance(response, dict):
-                    if "board" in response:
-                        update_game_board(response["board"], buttons)
-                    else:
-                        output_text.insert(tk.END, f"Game status: {response['message']}\n")
-
-                    if response.get("type") == "win_status":
-                        thread = threading.Thread(target=messagebox.showinfo, args=("Win Status",
-                                                                                    response.get("message")))
-                        thread.start()
+    if not isinstance(message, BoardMessage):
+        message = BoardMessage.from_rows(message["board"])
+    update_game_board(message.board, buttons)
 
-                else:
-                    output_text.insert(tk.END, f"Received: {response}\n")
+
+def show_cell(message, buttons, output_text):
+    """
+    Display handler for cell deltas.
+    """
+    update_game_cell(message, buttons)
+
+
+def show_status(message, buttons, output_text):
+    """
+    Display handler for status, mode and error messages.
+    """
+    text = message.message if isinstance(message, Message) else message.get('message', message)
+    output_text.insert(tk.END, f"Game status: {text}\n")
+
+
+def show_win(message, buttons, output_text):
+    """
+    Display handler for the end of a game: logs it and pops up a message box.
+    """
+    message = to_message(message)
+    show_status(message, buttons, output_text)
+    thread = threading.Thread(target=messagebox.showinfo, args=("Win Status", message.message))
+    thread.start()
+
+
+def show_text(message, buttons, output_text):
+    """
+    Display handler for connection status and error strings.
+    """
+    output_text.insert(tk.END, f"Received: {message}\n")
+
+
+# message type -> display handler; other types are logged by show_status
+DISPLAY_HANDLERS = {
+    "board": show_board,
+    "cell": show_cell,
+    "win_status": show_win,
+    "text": show_text,
+}
+
+
+def display_message(response, buttons, output_text):
+    """
+    Shows one received message in the GUI.
+
+    @param response A parsed message (dict or Message) or an error string.
+    @param buttons The GUI button widgets for each cell in the game board.
+    @param output_text The text widget used as the message log.
+    """
+    DISPLAY_HANDLERS.get(message_type(response), show_status)(response, buttons, output_text)
+
+
+class BoardRenderer:
+    """
+    Coalesces board updates into at most one paint per display frame.
+
+    Board snapshots and cell deltas only update a target board; flush()
+    paints it, touching just the buttons whose text changed, at most once
+    every `frame_interval` seconds, and defers the paint otherwise. However
+    many boards are queued, only the newest is drawn.
+
+    With `moves_per_second` set, the board instead steps through the
+    received states at that rate, one move at a time, for demos. Snapshots
+    that clear cells (a reset) are shown in one step.
+
+    Attributes
+    ----------
+    paints : int
+        Number of paints so far
+    """
+    def __init__(self, buttons, root, frame_interval=1 / 60, moves_per_second=None):
+        """
+        Parameters
+        ----------
+        buttons : list of list of tk.Button
+            The board buttons.
+        root : tk.Tk
+            The Tk root used to schedule deferred paints.
+        frame_interval : float, optional
+            Minimum time between paints in seconds (default is 1/60).
+        moves_per_second : float, optional
+            Animate at this many moves per second instead (default is None).
+        """
+        self.buttons = buttons
+        self.root = root
+        self.frame_interval = frame_interval
+        self.moves_per_second = moves_per_second
+        self.paints = 0
+        self._target = None  # nothing received yet
+        self._shown = [None] * 9
+        self._steps = collections.deque(maxlen=256)
+        self._last_paint = None
+        self._after = None
+
+    def show_board(self, message):
+        """
+        Dispatcher handler for full board snapshots.
+
+        Raises ValueError for a malformed board, which is then neither
+        painted nor queued.
+        """
+        if not isinstance(message, BoardMessage):
+            message = BoardMessage.from_rows(message["board"])
+        cells = list(message.cells.decode("ascii"))
+        if self.moves_per_second:
+            previous = self._target or [" "] * 9
+            if all(old == new or old == " " for old, new in zip(previous, cells)):
+                # only additions: play them one move at a time
+                state = list(previous)
+                for index, cell in enumerate(cells):
+                    if cell != state[index]:
+                        state[index] = cell
+                        self._steps.append(list(state))
+            else:
+                self._steps.append(cells)
+        self._target = cells
+
+    def show_cell(self, message):
+        """
+        Dispatcher handler for cell deltas; raises ValueError for a cell
+        outside the board or a value longer than one character.
+        """
+        row, col, value = message["r"], message["c"], message["v"] or " "
+        if row not in range(3) or col not in range(3) or not isinstance(value, str) or len(value) != 1:
+            raise ValueError(f"Invalid cell: {message!r}")
+        cells = list(self._target or [" "] * 9)
+        cells[3 * row + col] = value
+        if self.moves_per_second:
+            self._steps.append(cells)
+        self._target = cells
+
+    def flush(self):
+        """
+        Paints the newest board now, or schedules it for the next frame.
+        """
+        if self._after is not None:
+            return
+        if self.moves_per_second:
+            self._step()
+            return
+        if self._target is None or self._shown == self._target:
+            return
+        wait = 0 if self._last_paint is None else self._last_paint + self.frame_interval - time.monotonic()
+        if wait <= 0:
+            self._paint(self._target)
+        else:
+            self._after = self.root.after(int(wait * 1000) + 1, self._deferred)
+
+    def close(self):
+        """
+        Cancels any scheduled paint.
+        """
+        if self._after is not None:
+            try:
+                self.root.after_cancel(self._after)
+            except tk.TclError:
+                pass
+            self._after = None
+
+    def _deferred(self):
+        self._after = None
+        self.flush()
+
+    def _step(self):
+        self._after = None
+        if not self._steps:
+            return
+        self._paint(self._steps.popleft())
+        if self._steps:
+            self._after = self.root.after(max(int(1000 / self.moves_per_second), 1), self._step)
+
+    def _paint(self, cells):
+        buttons, shown = self.buttons, self._shown
+        for index, cell in enumerate(cells):
+            if shown[index] != cell:
+                buttons[index // 3][index % 3].config(text=cell)
+                shown[index] = cell
+        self.paints += 1
+        self._last_paint = time.monotonic()
+
+
+def subscribe_display(uart, buttons, output_text, priority=0, renderer=None):
+    """
+    Subscribes the GUI display handlers to the messages of a UART.
+
+    @param uart The UARTCommunication instance to listen to.
+    @param buttons The GUI button widgets for each cell in the game board.
+    @param output_text The text widget used as the message log.
+    @param priority Dispatch priority of the display handlers.
+    @param renderer Optional BoardRenderer receiving board and cell updates
+           instead of painting them directly.
+    @return The subscription tokens.
+    """
+    handlers = dict(DISPLAY_HANDLERS)
+    if renderer is not None:
+        handlers["board"] = lambda message, buttons, output_text: renderer.show_board(message)
+        handlers["cell"] = lambda message, buttons, output_text: renderer.show_cell(message)
+    tokens = [uart.subscribe(msg_type, lambda message, show=show: show(message, buttons, output_text), priority)
+              for msg_type, show in handlers.items()]
+    tokens.append(uart.subscribe(MessageDispatcher.UNHANDLED,
+                                 lambda message: show_status(message, buttons, output_text), priority))
+    return tokens
+
+
+class TkWakeup:
+    """
+    Wakes the Tk event loop from other threads when messages arrive.
+
+    notify() writes a byte to a pipe whose read end is registered with
+    `createfilehandler`, so Tk runs `callback` as soon as a frame is queued
+    and sleeps while the line is idle. Where file handlers are unavailable
+    (Windows), notify() only sets a thread-safe flag, which the Tk thread
+    checks every `min_interval` ms; no Tk call is ever made from another
+    thread. When `event_driven` is False, `callback` itself is polled: every
+    `min_interval` ms while it reports messages, backing off to
+    `max_interval` ms when idle.
+
+    Attributes
+    ----------
+    mode : str
+        "pipe", "flag" or "poll"
+    """
+    def __init__(self, root, callback, event_driven=True, min_interval=10, max_interval=100):
+        """
+        Starts waiting for notifications or polling.
+
+        Parameters
+        ----------
+        root : tk.Tk
+            The Tk root whose event loop runs `callback`; create the TkWakeup
+            on the Tk thread.
+        callback : callable
+            Handles the waiting messages and returns how many there were.
+        event_driven : bool, optional
+            Wait for notify() instead of polling `callback` (default is True).
+        min_interval, max_interval : int, optional
+            Polling interval bounds in milliseconds (defaults are 10 and 100).
+        """
+        self.root = root
+        self.callback = callback
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.mode = "poll"
+        self._signalled = False
+        self._flag = threading.Event()
+        self._tk_thread = threading.get_ident()
+        self._pipe = None
+        self._after = None
+        if event_driven:
+            try:
+                self._pipe = os.pipe()
+                for fd in self._pipe:
+                    os.set_blocking(fd, False)
+                root.tk.createfilehandler(self._pipe[0], tk.READABLE, self._on_readable)
+                self.mode = "pipe"
+            except (AttributeError, OSError, tk.TclError):
+                self._close_pipe()
+                self.mode = "flag"
+                self._after = root.after(min_interval, self._check_flag)
+        if self.mode == "poll":
+            self._interval = min_interval
+            self._after = root.after(0, self._tick)
+
+    def notify(self):
+        """
+        Schedules `callback` on the Tk thread; safe to call from any thread.
+        """
+        if self.mode == "flag":
+            self._flag.set()
+            return
+        if self.mode == "poll":
+            self._interval = self.min_interval
+            if threading.get_ident() == self._tk_thread and self._after is not None:
+                # poll right away instead of waiting out a backed-off interval
+                self._cancel_after()
+                self._after = self.root.after(self.min_interval, self._tick)
+            return
+        if self._signalled:
+            return
+        self._signalled = True
+        try:
+            os.write(self._pipe[1], b"\0")
+        except OSError:
+            pass
+
+    def close(self):
+        """
+        Stops polling and unregisters the pipe.
+        """
+        self._cancel_after()
+        if self._pipe is not None:
+            try:
+                self.root.tk.deletefilehandler(self._pipe[0])
+            except (AttributeError, tk.TclError):
+                pass
+            self._close_pipe()
+
+    def _cancel_after(self):
+        if self._after is not None:
+            try:
+                self.root.after_cancel(self._after)
+            except tk.TclError:
+                pass
+            self._after = None
+
+    def _close_pipe(self):
+        pipe, self._pipe = self._pipe, None
+        for fd in pipe or ():
+            os.close(fd)
+
+    def _on_readable(self, fd, mask):
+        try:
+            while os.read(fd, 512):
+                pass
+        except OSError:
+            pass
+        # clear before handling so frames queued meanwhile signal again
+        self._signalled = False
+        self.callback()
+
+    def _check_flag(self):
+        if self._flag.is_set():
+            self._flag.clear()
+            self.callback()
+        self._after = self.root.after(self.min_interval, self._check_flag)
+
+    def _tick(self):
+        if self.callback():
+            self._interval = self.min_interval
+        else:
+            self._interval = min(self._interval * 2, self.max_interval)
+        self._after = self.root.after(self._interval, self._tick)
+
+
+def auto_receive(uart, buttons, output_text, root, budget=0.008, moves_per_second=None):
+    """
+    Shows incoming UART messages in the GUI as they arrive.
+
+    Subscribes the display handlers and shows whatever is already buffered.
+    With the reader thread running, later messages wake the Tk loop through
+    a TkWakeup (a pipe, or a flag checked by the Tk thread on Windows);
+    otherwise the port is polled adaptively. Each wakeup
+    dispatches as many queued messages as fit in `budget` seconds; a larger
+    burst, such as an AI vs AI game, continues on the next idle slot so
+    clicks and redraws are handled in between. Board updates go through a
+    BoardRenderer, so the board is painted at most once per display frame.
+
+    @param budget Time per pump in seconds (default 8 ms).
+    @param moves_per_second Animate the board at this rate instead (demo mode).
+    @return The TkWakeup driving the updates; close() it to stop.
+    """
+    renderer = BoardRenderer(buttons, root, moves_per_second=moves_per_second)
+    subscribe_display(uart, buttons, output_text, renderer=renderer)
+    uart.dispatcher.on_error = lambda message, error: output_text.insert(tk.END, f"Error: {str(error)}\n")
+    resume = [None]  # id of the after_idle pump queued while a backlog is being drained
+
+    def pump():
+        if resume[0] is not None:
+            # a wakeup got here first: drop the queued pump instead of chaining another one
+            try:
+                root.after_cancel(resume[0])
+            except tk.TclError:
+                pass
+            resume[0] = None
+        try:
+            # also runs while the port is down so reconnect status messages get shown
+            count = uart.dispatch_messages(max_time=budget)
+            if count:
                 output_text.see(tk.END)
-    except Exception as e:
-        output_text.insert(tk.END, f"Error: {str(e)}\n")
-    root.after(100, lambda: auto_receive(uart, buttons, output_text, root))
+        except Exception as e:
+            output_text.insert(tk.END, f"Error: {str(e)}\n")
+            count = 0
+        try:
+            renderer.flush()
+        except Exception as e:
+            output_text.insert(tk.END, f"Error: {str(e)}\n")
+        if uart.backlog:
+            resume[0] = root.after_idle(pump)
+        return count
 
+    pump()
+    wakeup = TkWakeup(root, pump, event_driven=uart.reader_running)
+    uart.on_receive = wakeup.notify
+    if uart.inbound.qsize() or uart._pending:
+        wakeup.notify()  # messages queued while subscribing
+    return wakeup
 
-def start_gui():
+
+def start_gui(moves_per_second=None):
     """
     Initializes and starts the GUI for the Tic-Tac-Toe game.
+
+    @param moves_per_second Animate the board at this many moves per second
+           (demo mode); by default it shows the latest state right away.
     """
-    uart = UARTCommunication()
+    uart = UARTCommunication(typed=True)
+    registry = PortRegistry()
+    registry.start()  # scan ports while the window is being built
 
     root = tk.Tk()
     root.title("TicTacToe Game Interface")
@@ -197,19 +4403,49 @@ def start_gui():
     port_label = tk.Label(root, text="Select Port:", font=font_style, bg="#f0f0f0")
     port_label.grid(row=0, column=0, padx=10, pady=10)
     port_var = tk.StringVar()
-    port_combobox = ttk.Combobox(root, textvariable=port_var, values=uart.list_ports(), state="readonly", font=font_style)
+    port_combobox = ttk.Combobox(root, textvariable=port_var, values=[], state="readonly", font=font_style)
     port_combobox.grid(row=0, column=1, padx=10, pady=10)
 
+    def refresh_port_list(version=-1):
+        """
+        Copies the registry's cached ports into the combobox whenever they change.
+        """
+        if registry.version != version:
+            version = registry.version
+            port_combobox.config(values=registry.ports(arduino_only=True) or registry.ports())
+        root.after(500, lambda: refresh_port_list(version))
+
+    refresh_port_list()
+
+    receiving = []  # holds the TkWakeup once auto_receive runs
+
     def open_port_callback():
         """
-        Opens the selected port and starts auto-receive if successful.
+        Opens the selected port in the background and starts auto-receive once the firmware is ready.
         """
-        status = uart.open_port(port_var.get())
-        status_label.config(text=status)
-        if "Connected" in status:
-            auto_receive(uart, buttons, output_text, root)
-        else:
-            output_text.insert(tk.END, f"Failed to connect: {status}\n")
+        port = port_var.get()
+        status_label.config(text=f"Connecting to {port}...")
+        open_button.config(state=tk.DISABLED)
+        future = uart.open_port_async(port)
+
+        def check_connected():
+            if not future.done():
+                root.after(50, check_connected)
+                return
+            open_button.config(state=tk.NORMAL)
+            status = future.result()
+            status_label.config(text=status)
+            if "Connected" in status:
+                uart.start_reader()
+                uart.enable_auto_reconnect()
+                uart.enable_scheduler()
+                if not receiving:
+                    receiving.append(auto_receive(uart, buttons, output_text, root,
+                                                  moves_per_second=moves_per_second))
+            else:
+                output_text.insert(tk.END, f"Failed to connect: {status}\n")
+
+        check_connected()
 
     open_button = tk.Button(root, text="Open Port", command=open_port_callback, font=font_style, relief="solid", 
                             width=12, height=2, bg="#4CAF50", fg="white", bd=2, activebackground="#45a049")
@@ -245,6 +4481,38 @@ def start_gui():
                              width=12, height=2, bg="#f44336", fg="white", bd=2, activebackground="#e53935")
     reset_button.grid(row=5, column=1, padx=10, pady=10)
 
+    def auto_detect_callback():
+        """
+        Probes the Arduino ports in the background and connects to the best match.
+
+        The port already open is left alone.
+        """
+        status_label.config(text="Searching for the game board...")
+        detect_button.config(state=tk.DISABLED)
+        future = concurrent.futures.Future()
+        in_use = [uart.port] if uart.ser is not None and uart.ser.is_open else []
+        threading.Thread(target=lambda: future.set_result(UARTCommunication.discover(
+                             registry.ports(arduino_only=True) or None, exclude=in_use, arduino_only=True)),
+                         name="uart-discover", daemon=True).start()
+
+        def check_found():
+            if not future.done():
+                root.after(100, check_found)
+                return
+            detect_button.config(state=tk.NORMAL)
+            found = future.result()
+            if not found:
+                status_label.config(text="No game board found")
+                return
+            port_var.set(found[0]["port"])
+            open_port_callback()
+
+        check_found()
+
+    detect_button = tk.Button(root, text="Auto-detect", command=auto_detect_callback, font=font_style, relief="solid",
+                              width=12, height=2, bg="#4CAF50", fg="white", bd=2, activebackground="#45a049")
+    detect_button.grid(row=5, column=0, padx=10, pady=10)
+
     output_text = scrolledtext.ScrolledText(root, width=50, height=10, wrap=tk.WORD, font=("Courier New", 10), 
                                             bg="#f4f4f4", fg="#333333")
     output_text.grid(row=6, column=0, columnspan=3, padx=10, pady=10)
@@ -253,7 +4521,17 @@ def start_gui():
     status_label.grid(row=7, column=0, columnspan=3, padx=10, pady=10)
 
     root.mainloop()
+    registry.stop()
+    uart.on_receive = None
+    for wakeup in receiving:
+        wakeup.close()
+    uart.close_port()
 
 
 if __name__ == "__main__":
-    start_gui()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="TicTacToe GUI for the Arduino board.")
+    parser.add_argument("--animate", type=float, metavar="N",
+                        help="Replay board updates at N moves per second (demo mode).")
+    start_gui(parser.parse_args().animate)
@@ -2,36 +2,50 @@
 
 import unittest
 import serial
-import json
 import time
 import argparse
 import sys
 
+from Game import BINARY_PROTOCOL, BinaryProtocol, UARTCommunication, add_checksum, get_codec, is_banner, strip_checksum
+
 class TestTicTacToe(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
+        cls.codec = get_codec()
         cls.ser = serial.Serial(cls.port, cls.baudrate, timeout=1)
-        time.sleep(2)  # Allow time for the Arduino to reset
+        # Opening the port resets the Arduino; wait for its boot banner instead of a fixed delay
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            line = cls.ser.readline().strip()
+            try:
+                if line and is_banner(cls.codec.loads(line)):
+                    break
+            except ValueError:
+                continue
 
     @classmethod
     def tearDownClass(cls):
         cls.ser.close()
 
     def send_game_command(self, command_dict):
-        self.ser.write((json.dumps(command_dict) + '\n').encode())
+        self.ser.write(self.codec.dumps(command_dict) + b'\n')
         time.sleep(0.5)  # Small delay to allow Arduino to process
 
     def receive_game_response(self):
         if self.ser.in_waiting > 0:
             line = self.ser.readline()
             try:
-                decoded_line = line.decode("utf-8").strip()
-                return json.loads(decoded_line)
+                return self.codec.loads(line.strip())
             except UnicodeDecodeError:
                 return None
 
         return None
 
+    def disable_checksums(self):
+        self.ser.write(add_checksum(self.codec.dumps({"command": "CRC", "enable": False}) + b'\n'))
+        time.sleep(0.5)
+        self.ser.reset_input_buffer()
+
     def test_initialize_board(self):
         self.send_game_command({"command": "RESET"})
         response1 = self.receive_game_response()
@@ -65,6 +79,67 @@ class TestTicTacToe(unittest.TestCase):
         else:
             self.assertEqual(response["type"], "board")
 
+    def test_move_sends_cell_delta(self):
+        self.send_game_command({"command": "MODE", "mode": 0})
+        self.ser.reset_input_buffer()
+        self.send_game_command({"command": "RESET"})
+        self.ser.reset_input_buffer()
+
+        self.send_game_command({"command": "MOVE", "row": 1, "col": 1})
+        response = self.receive_game_response()
+        self.assertEqual(response, {"type": "cell", "r": 1, "c": 1, "v": "X"})
+
+        self.send_game_command({"command": "BOARD"})
+        response = self.receive_game_response()
+        self.assertEqual(response["type"], "board")
+        self.assertEqual(response["board"][1][1], "X")
+
+    def test_pipelined_requests(self):
+        uart = UARTCommunication()
+        uart.ser = self.ser
+        self.ser.reset_input_buffer()
+        uart.start_reader()
+        try:
+            mode = uart.request({"command": "MODE", "mode": 0}, expect_type="board")
+            self.assertEqual(mode.result(2)["board"], [[" "] * 3 for _ in range(3)])
+
+            moves = [uart.request({"command": "MOVE", "row": 0, "col": col}, expect_type="cell")
+                     for col in range(2)]
+            replies = [move.result(2) for move in moves]
+            self.assertEqual([(reply["c"], reply["v"]) for reply in replies], [(0, "X"), (1, "O")])
+        finally:
+            uart.stop_reader()
+
+    def test_ping(self):
+        self.ser.reset_input_buffer()
+        self.send_game_command({"command": "PING"})
+        self.assertEqual(self.receive_game_response(), {"type": "pong"})
+
+    def test_checksums(self):
+        self.ser.reset_input_buffer()
+        self.send_game_command({"command": "CRC", "enable": True})
+        self.assertEqual(self.receive_game_response(), {"type": "crc", "enable": True})
+
+        try:
+            self.ser.write(add_checksum(self.codec.dumps({"command": "PING"}) + b'\n'))
+            time.sleep(0.5)
+            payload = strip_checksum(self.ser.readline().strip())
+            self.assertIsNotNone(payload)
+            self.assertEqual(self.codec.loads(payload), {"type": "pong"})
+        finally:
+            self.disable_checksums()
+
+    def test_checksums_reject_unsuffixed_lines(self):
+        self.ser.reset_input_buffer()
+        self.send_game_command({"command": "CRC", "enable": True})
+        self.assertEqual(self.receive_game_response(), {"type": "crc", "enable": True})
+
+        try:
+            self.send_game_command({"command": "PING"})
+            self.assertEqual(self.ser.in_waiting, 0)
+        finally:
+            self.disable_checksums()
+
     def test_game_mode_switch(self):
         self.send_game_command({"command": "MODE", "mode": 1})
         responses = {"game_mode": False, "game_status": False, "board": False}
@@ -117,6 +192,25 @@ class TestTicTacToe(unittest.TestCase):
                 self.assertIn(response["message"], ["Player X wins!", "Player O wins!", "It's a draw!"])
                 break
 
+    def test_binary_protocol(self):
+        self.send_game_command({"command": "PROTO", "proto": "binary"})
+        response = self.receive_game_response()
+        self.assertEqual(response, {"type": "proto", "proto": "binary"})
+
+        try:
+            self.ser.write(BINARY_PROTOCOL.encode({"command": "RESET"}))
+            time.sleep(0.5)
+            replies = []
+            while self.ser.in_waiting > 0:
+                frame = self.ser.read_until(BinaryProtocol.DELIMITER)
+                replies.append(BinaryProtocol.decode(frame[:-1]))
+            self.assertIn({"type": "game_status", "message": "Game reset."}, replies)
+            self.assertIn({"type": "board", "board": [[" "] * 3 for _ in range(3)]}, replies)
+        finally:
+            self.ser.write(BINARY_PROTOCOL.encode({"command": "PROTO", "proto": "json"}))
+            time.sleep(0.5)
+            self.ser.reset_input_buffer()
+
 
 def parse_arguments():
     """Parse command-line arguments for port and baudrate"""
@@ -1,5 +1,22 @@
+import asyncio
+import json
+import os
+import serial
+import struct
+import tempfile
+import threading
+from types import SimpleNamespace
 import unittest
 from unittest.mock import MagicMock, patch
+import time
+from Game import (BINARY_PROTOCOL, BinaryProtocol, add_checksum, cobs_decode, cobs_encode, crc8, pack_board,
+                  unpack_board)
+from Game import AsyncUARTCommunication, CommandEncoder, FrameReader, JSON_CODECS, JsonCodec, get_codec
+from Game import BoardMirror, CoalescingWriter, OutboundScheduler, PortRegistry, UARTPool, display_message, request_board
+from Game import BoardRenderer, LatencyHistogram, TkWakeup, strip_checksum
+from Game import CAPTURE_IN, CAPTURE_MAGIC, CAPTURE_OUT, ReplaySerial, WireRecorder, read_capture
+from Game import (BoardMessage, ErrorMessage, MessageDispatcher, StatusMessage, WinStatus, is_banner, pack_board,
+                  pack_cells, to_message)
 from Game import UARTCommunication, update_game_board, send_move, set_mode, reset_game, auto_receive
 from tkinter import Tk
 from io import StringIO
@@ -41,8 +58,8 @@ class TestUARTCommunication(unittest.TestCase):
     def test_receive_message_successfully(self, mock_serial):
         self.uart.ser = mock_serial()
         self.uart.ser.is_open = True
-        self.uart.ser.in_waiting = 1
-        self.uart.ser.readline.return_value = b'{"board": [["X", "", ""], ["", "O", ""], ["", "", ""]]}'
+        self.uart.ser.in_waiting = 57
+        self.uart.ser.read.return_value = b'{"board": [["X", "", ""], ["", "O", ""], ["", "", ""]]}\r\n'
         result = self.uart.receive_message()
         self.assertEqual(result, {"board": [["X", "", ""], ["", "O", ""], ["", "", ""]]})
 
@@ -54,12 +71,1526 @@ class TestUARTCommunication(unittest.TestCase):
     def test_receive_message_with_invalid_json(self):
         self.uart.ser = MagicMock()
         self.uart.ser.is_open = True
-        self.uart.ser.in_waiting = 1
-        self.uart.ser.readline.return_value = b'Invalid JSON'
+        self.uart.ser.in_waiting = 14
+        self.uart.ser.read.return_value = b'Invalid JSON\r\n'
         result = self.uart.receive_message()
         self.assertIn("Error:", result)
 
 
+class TestJsonCodecs(unittest.TestCase):
+    FRAME = b'{"type":"board","board":[["X"," "," "],[" ","O"," "],[" "," ","X"]]}'
+
+    def test_default_codec_falls_back_to_an_available_backend(self):
+        codec = get_codec()
+        self.assertTrue(codec.available())
+        self.assertEqual(codec.loads(self.FRAME)["board"][1][1], "O")
+
+    def test_stdlib_codec_round_trips_bytes(self):
+        codec = get_codec("json")
+        self.assertEqual(codec.loads(codec.dumps({"command": "RESET"})), {"command": "RESET"})
+
+    def test_unknown_codec_is_rejected(self):
+        with self.assertRaises(ValueError):
+            get_codec("no-such-codec")
+
+    def test_codec_is_selected_per_instance(self):
+        class RecordingCodec(JsonCodec):
+            def __init__(self):
+                self.frames = []
+
+            def loads(self, data):
+                self.frames.append(data)
+                return super().loads(data)
+
+        codec = RecordingCodec()
+        uart = UARTCommunication(codec=codec)
+        uart.ser = MagicMock(is_open=True, in_waiting=len(self.FRAME) + 2)
+        uart.ser.read.return_value = self.FRAME + b'\r\n'
+        self.assertEqual(uart.receive_message()["type"], "board")
+        self.assertEqual(codec.frames, [self.FRAME])
+        self.assertIs(UARTCommunication(codec="json").codec.__class__, JsonCodec)
+
+    def test_invalid_json_is_reported_for_every_backend(self):
+        for name, codec in JSON_CODECS.items():
+            if not codec.available():
+                continue
+            uart = UARTCommunication(codec=name)
+            uart.ser = MagicMock(is_open=True, in_waiting=5)
+            uart.ser.read.return_value = b'{"a\n'
+            self.assertEqual(uart.receive_message(), "Error: Invalid JSON received", name)
+
+
+class TestCommandEncoder(unittest.TestCase):
+    def test_vocabulary_frames_match_json(self):
+        encoder = CommandEncoder()
+        message = {"command": "MOVE", "row": 2, "col": 0}
+        frame, text = encoder.encode(message)
+        self.assertEqual(frame, (json.dumps(message) + "\n").encode())
+        self.assertEqual(text, json.dumps(message))
+        self.assertIs(encoder.encode({"command": "MOVE", "row": 2, "col": 0})[0], frame)
+
+    def test_unknown_commands_fall_back_to_generic_encoding(self):
+        encoder = CommandEncoder()
+        self.assertEqual(encoder.encode({"command": "MOVE", "row": 5, "col": 0})[0],
+                         b'{"command": "MOVE", "row": 5, "col": 0}\n')
+        self.assertEqual(encoder.encode({"command": "X", "data": [1]})[0], b'{"command": "X", "data": [1]}\n')
+
+    def test_request_frames_splice_the_id_into_cached_frames(self):
+        for name in JSON_CODECS:
+            try:
+                encoder = CommandEncoder(codec=get_codec(name))
+            except ValueError:
+                continue
+            for message in ({"command": "MOVE", "row": 1, "col": 2}, {"command": "RESET"}, {"command": "X"}):
+                self.assertEqual(encoder.encode_request(message, 300), encoder.encode_generic(dict(message, id=300))[0])
+
+    def test_send_message_writes_cached_frame(self):
+        uart = UARTCommunication(codec="json")
+        uart.ser = MagicMock(is_open=True)
+        self.assertEqual(uart.send_message({"command": "RESET"}), 'Sent: {"command": "RESET"}')
+        uart.ser.write.assert_called_once_with(b'{"command": "RESET"}\n')
+
+
+class TestBinaryProtocol(unittest.TestCase):
+    BOARD = [["X", "O", " "], [" ", "X", " "], ["O", " ", "X"]]
+
+    def test_crc8_check_value(self):
+        self.assertEqual(crc8(b"123456789"), 0xF4)
+
+    def test_cobs_round_trip(self):
+        for payload in (b"", b"\x00", b"\x00\x00", b"\x11\x00\x22", bytes(range(1, 255)) * 2 + b"\x00\x05"):
+            encoded = cobs_encode(payload)
+            self.assertNotIn(0, encoded)
+            self.assertEqual(cobs_decode(encoded), payload)
+        with self.assertRaises(ValueError):
+            cobs_decode(b"\x05\x01")
+
+    def test_board_packs_into_18_bits(self):
+        packed = pack_board(self.BOARD)
+        self.assertLess(packed, 1 << 18)
+        self.assertEqual(unpack_board(packed), self.BOARD)
+
+    def test_commands_are_one_byte(self):
+        frame = BINARY_PROTOCOL.encode({"command": "MOVE", "row": 2, "col": 1})
+        self.assertEqual(frame[-1], 0)
+        self.assertEqual(BinaryProtocol.unframe(frame[:-1]), bytes((7,)))
+        self.assertLessEqual(len(frame), 4)
+        self.assertEqual(BinaryProtocol.unframe(BINARY_PROTOCOL.encode({"command": "RESET"})[:-1]), b"\x20")
+        with self.assertRaises(ValueError):
+            BINARY_PROTOCOL.encode({"command": "MOVE", "row": 3, "col": 0})
+
+    def test_decode_replies(self):
+        board = BinaryProtocol.frame(b"\x80" + pack_board(self.BOARD).to_bytes(3, "little"))[:-1]
+        self.assertEqual(BinaryProtocol.decode(board), {"type": "board", "board": self.BOARD})
+        win = BinaryProtocol.frame(b"\x92O")[:-1]
+        self.assertEqual(BinaryProtocol.decode(win), {"type": "win_status", "message": "Player O wins!"})
+        corrupted = bytearray(win)
+        corrupted[1] ^= 0x01
+        self.assertEqual(BinaryProtocol.decode(bytes(corrupted)), "Error: CRC mismatch")
+
+    def test_negotiation_switches_framing_mid_read(self):
+        uart = UARTCommunication(codec="json")
+        uart.ser = MagicMock(is_open=True)
+        board_frame = BinaryProtocol.frame(b"\x80" + pack_board(self.BOARD).to_bytes(3, "little"))
+        data = b'{"type":"proto","proto":"binary"}\r\n' + board_frame
+        uart.ser.in_waiting = len(data)
+        uart.ser.read.return_value = data
+        self.assertTrue(uart.negotiate_protocol("binary"))
+        uart.ser.write.assert_called_with(b'{"command": "PROTO", "proto": "binary"}\n')
+        self.assertEqual(uart.receive_message(), {"type": "board", "board": self.BOARD})
+        uart.send_message({"command": "MOVE", "row": 0, "col": 0})
+        uart.ser.write.assert_called_with(BINARY_PROTOCOL.encode({"command": "MOVE", "row": 0, "col": 0}))
+
+    def test_negotiation_falls_back_when_firmware_is_silent(self):
+        uart = UARTCommunication()
+        uart.ser = MagicMock(is_open=True, in_waiting=0)
+        self.assertFalse(uart.negotiate_protocol("binary", timeout=0.05))
+        self.assertEqual(uart.protocol, "json")
+
+
+class TestBoardDeltas(unittest.TestCase):
+    def test_mirror_applies_snapshots_and_deltas(self):
+        mirror = BoardMirror()
+        self.assertTrue(mirror.apply({"type": "cell", "r": 1, "c": 2, "v": "X"}))
+        self.assertEqual(mirror.board[1], [" ", " ", "X"])
+        self.assertTrue(mirror.apply({"type": "board", "board": [["O"] * 3] * 3}))
+        self.assertEqual(mirror.cells, ["O"] * 9)
+        self.assertFalse(mirror.apply({"type": "game_status", "message": "Game reset."}))
+
+    def test_mirror_rejects_cells_outside_the_board(self):
+        mirror = BoardMirror()
+        for row, col in ((-1, 0), (0, 3), (3, 0)):
+            with self.assertRaises(ValueError):
+                mirror.apply({"type": "cell", "r": row, "c": col, "v": "X"})
+        self.assertEqual(mirror.cells, [" "] * 9)
+
+    def test_uart_mirror_follows_received_frames(self):
+        uart = UARTCommunication()
+        uart.ser = MagicMock(is_open=True)
+        data = (b'{"type":"board","board":[[" "," "," "],[" "," "," "],[" "," "," "]]}\r\n'
+                b'{"type":"cell","r":0,"c":0,"v":"X"}\r\n{"type":"cell","r":2,"c":1,"v":"O"}\r\n')
+        uart.ser.in_waiting = len(data)
+        uart.ser.read.return_value = data
+        self.assertEqual(len(uart.receive_messages()), 3)
+        self.assertEqual(uart.board.board, [["X", " ", " "], [" ", " ", " "], [" ", "O", " "]])
+
+    def test_binary_cell_delta(self):
+        frame = BinaryProtocol.frame(bytes((0x81, (7 << 2) | 2)))[:-1]
+        self.assertEqual(BinaryProtocol.decode(frame), {"type": "cell", "r": 2, "c": 1, "v": "O"})
+
+    def test_display_message_repaints_only_the_changed_cell(self):
+        buttons = [[MagicMock() for _ in range(3)] for _ in range(3)]
+        display_message({"type": "cell", "r": 1, "c": 0, "v": "O"}, buttons, MagicMock())
+        buttons[1][0].config.assert_called_once_with(text="O")
+        self.assertEqual(sum(b.config.call_count for row in buttons for b in row), 1)
+
+    @patch.object(UARTCommunication, 'send_message')
+    def test_request_board(self, mock_send_message):
+        request_board(UARTCommunication())
+        mock_send_message.assert_called_with({"command": "BOARD"})
+
+
+class TestTypedMessages(unittest.TestCase):
+    BOARD = [["X", " ", " "], [" ", "O", " "], [" ", " ", "X"]]
+
+    def test_board_round_trip(self):
+        message = to_message({"type": "board", "board": self.BOARD})
+        self.assertIsInstance(message, BoardMessage)
+        self.assertEqual(message.cells, b"X   O   X")
+        self.assertEqual(message.packed, pack_board(self.BOARD))
+        self.assertEqual(pack_cells(b"X   O   X"), pack_board(self.BOARD))
+        self.assertEqual(message.to_dict(), {"type": "board", "board": self.BOARD})
+
+    def test_boards_compare_and_hash_by_value(self):
+        first = BoardMessage.from_rows(self.BOARD)
+        second = to_message({"type": "board", "board": self.BOARD})
+        self.assertEqual(first, second)
+        self.assertEqual(len({first, second}), 1)
+        self.assertNotEqual(first, BoardMessage(b" " * 9))
+
+    def test_status_win_and_error(self):
+        self.assertEqual(to_message({"type": "game_mode", "message": "Game mode set to 1"}),
+                         StatusMessage("game_mode", "Game mode set to 1"))
+        win = to_message({"type": "win_status", "message": "Player O wins!"})
+        self.assertEqual(win.winner, "O")
+        self.assertIsNone(WinStatus("It's a draw!").winner)
+        self.assertEqual(to_message({"type": "error", "message": "Invalid move."}), ErrorMessage("Invalid move."))
+        self.assertTrue(is_banner(StatusMessage("info", "TicTacToe Game Started")))
+
+    def test_board_shape_and_empty_cells(self):
+        message = to_message({"board": [["X", "", ""], ["", "O", ""], ["", "", ""]]})
+        self.assertEqual(message.cells, b"X   O    ")
+        for board in ([["X", "O", "X"], ["O", "X", "O"]], [["XO", " ", " "], [" "] * 3, [" "] * 3],
+                      [["X", None, " "], [" "] * 3, [" "] * 3]):
+            with self.assertRaises(ValueError):
+                BoardMessage.from_rows(board)
+            self.assertEqual(to_message({"type": "board", "board": board}), {"type": "board", "board": board})
+
+    def test_malformed_board_is_reported_by_the_display(self):
+        dispatcher = MessageDispatcher()
+        errors = []
+        dispatcher.on_error = lambda message, error: errors.append(error)
+        buttons = [[MagicMock() for _ in range(3)] for _ in range(3)]
+        dispatcher.subscribe("board", lambda message: display_message(message, buttons, MagicMock()))
+        dispatcher.dispatch({"board": [["X", "O", "X"], ["O", "X", "O"]]})
+        self.assertIsInstance(errors[0], ValueError)
+        self.assertFalse(any(button.config.called for row in buttons for button in row))
+
+    def test_messages_have_no_instance_dict(self):
+        for message in (BoardMessage(b" " * 9), StatusMessage("info", "x"), WinStatus("x"), ErrorMessage("x")):
+            self.assertFalse(hasattr(message, "__dict__"))
+
+    def test_other_messages_pass_through(self):
+        cell = {"type": "cell", "r": 1, "c": 1, "v": "X"}
+        self.assertIs(to_message(cell), cell)
+        self.assertEqual(to_message("Error: Invalid JSON received"), "Error: Invalid JSON received")
+
+    def test_typed_receive(self):
+        uart = UARTCommunication(typed=True)
+        frames = b'{"type":"board","board":[["X"," "," "],[" ","O"," "],[" "," ","X"]]}\n{"type":"pong"}\n'
+        uart.ser = MagicMock(is_open=True, in_waiting=len(frames))
+        uart.ser.read.return_value = frames
+        self.assertEqual(uart.receive_messages(), [BoardMessage(b"X   O   X"), {"type": "pong"}])
+        self.assertEqual(uart.board.board, self.BOARD)
+
+
+class TestMessageDispatcher(unittest.TestCase):
+    def test_handlers_run_by_priority_and_type(self):
+        dispatcher = MessageDispatcher()
+        calls = []
+        dispatcher.subscribe("board", lambda message: calls.append("log"))
+        dispatcher.subscribe("board", lambda message: calls.append("gui"), priority=10)
+        dispatcher.subscribe("cell", lambda message: calls.append("cell"))
+        dispatcher.subscribe(MessageDispatcher.ANY, lambda message: calls.append("any"), priority=5)
+        self.assertEqual(dispatcher.dispatch({"type": "board", "board": []}), 3)
+        self.assertEqual(calls, ["gui", "any", "log"])
+
+    def test_unhandled_and_text_messages(self):
+        dispatcher = MessageDispatcher()
+        seen = []
+        dispatcher.subscribe(MessageDispatcher.UNHANDLED, seen.append)
+        dispatcher.subscribe("text", lambda message: seen.append(("text", message)))
+        dispatcher.dispatch({"type": "pong"})
+        dispatcher.dispatch("Port not opened")
+        dispatcher.dispatch(StatusMessage("info", "hi"))
+        self.assertEqual(seen, [{"type": "pong"}, ("text", "Port not opened"), StatusMessage("info", "hi")])
+
+    def test_consuming_handler_stops_propagation(self):
+        dispatcher = MessageDispatcher()
+        seen = []
+        dispatcher.subscribe("error", lambda message: True, priority=1)
+        dispatcher.subscribe("error", seen.append)
+        dispatcher.dispatch(ErrorMessage("Invalid move."))
+        self.assertEqual(seen, [])
+
+    def test_unsubscribe(self):
+        dispatcher = MessageDispatcher()
+        seen = []
+        token = dispatcher.subscribe("cell", seen.append)
+        self.assertTrue(dispatcher.unsubscribe(token))
+        self.assertFalse(dispatcher.unsubscribe(token))
+        self.assertEqual(dispatcher.dispatch({"type": "cell"}), 0)
+        self.assertEqual(seen, [])
+
+    def test_failing_handler_does_not_stop_others(self):
+        dispatcher = MessageDispatcher()
+        errors, seen = [], []
+        dispatcher.on_error = lambda message, error: errors.append(str(error))
+        dispatcher.subscribe("cell", lambda message: 1 / 0, priority=1)
+        dispatcher.subscribe("cell", seen.append)
+        dispatcher.dispatch({"type": "cell"})
+        self.assertEqual(seen, [{"type": "cell"}])
+        self.assertEqual((dispatcher.errors, errors), (1, ["division by zero"]))
+
+    def test_uart_dispatches_received_messages(self):
+        uart = UARTCommunication()
+        frames = b'{"type":"pong"}\n{"type":"cell","r":0,"c":0,"v":"X"}\n'
+        uart.ser = MagicMock(is_open=True, in_waiting=len(frames))
+        uart.ser.read.return_value = frames
+        cells = []
+        uart.subscribe("cell", cells.append)
+        self.assertEqual(uart.dispatch_messages(), 2)
+        self.assertEqual(cells, [{"type": "cell", "r": 0, "c": 0, "v": "X"}])
+
+
+class TestWriteCoalescing(unittest.TestCase):
+    def setUp(self):
+        self.uart = UARTCommunication(codec="json")
+        self.uart.ser = MagicMock(is_open=True)
+
+    def tearDown(self):
+        self.uart.close_port()
+
+    def test_send_messages_uses_one_write(self):
+        statuses = self.uart.send_messages([{"command": "RESET"}, {"command": "MODE", "mode": 1},
+                                            {"command": "MOVE", "row": 0, "col": 0}])
+        self.assertEqual(len(statuses), 3)
+        self.assertTrue(all(status.startswith("Sent:") for status in statuses))
+        self.uart.ser.write.assert_called_once_with(
+            b'{"command": "RESET"}\n{"command": "MODE", "mode": 1}\n{"command": "MOVE", "row": 0, "col": 0}\n')
+
+    def test_send_messages_without_open_port(self):
+        self.assertEqual(UARTCommunication().send_messages([{"command": "RESET"}] * 2), ["Port not opened"] * 2)
+
+    def test_coalescing_writer_merges_frames_until_flush(self):
+        ser = self.uart.ser
+        self.uart.enable_write_coalescing(window=60)
+        self.uart.send_message({"command": "RESET"})
+        self.uart.send_message({"command": "MOVE", "row": 1, "col": 1})
+        ser.write.assert_not_called()
+        self.assertEqual(self.uart.flush(), "Flushed")
+        ser.write.assert_called_once_with(b'{"command": "RESET"}\n{"command": "MOVE", "row": 1, "col": 1}\n')
+
+    def test_coalescing_writer_flushes_at_deadline(self):
+        written = []
+        writer = CoalescingWriter(written.append, window=0.01)
+        writer.write(b"a")
+        writer.write(b"b")
+        deadline = time.monotonic() + 1
+        while not written and time.monotonic() < deadline:
+            time.sleep(0.005)
+        writer.close()
+        self.assertEqual(written, [b"ab"])
+
+    def test_coalescing_writer_flushes_when_full(self):
+        written = []
+        writer = CoalescingWriter(written.append, window=60, max_bytes=4)
+        writer.write(b"abc")
+        writer.write(b"de")
+        self.assertEqual(written, [b"abcde"])
+        writer.close()
+
+
+class TestOutboundScheduler(unittest.TestCase):
+    def move(self, row, col):
+        return {"command": "MOVE", "row": row, "col": col}
+
+    def test_duplicate_moves_are_merged(self):
+        scheduler = OutboundScheduler(MagicMock())
+        self.assertEqual(scheduler.submit(self.move(0, 0)), "Queued")
+        self.assertEqual(scheduler.submit(self.move(0, 0)), "Merged")
+        self.assertEqual(scheduler.submit(self.move(0, 1)), "Queued")
+        self.assertEqual((len(scheduler), scheduler.merged), (2, 1))
+
+    def test_reset_supersedes_moves_and_jumps_the_queue(self):
+        sent = []
+        scheduler = OutboundScheduler(sent.append)
+        scheduler.submit({"command": "BOARD"})
+        scheduler.submit(self.move(0, 0))
+        scheduler.submit(self.move(1, 1))
+        scheduler.submit({"command": "RESET"})
+        scheduler.submit(self.move(2, 2))
+        self.assertEqual(scheduler.superseded, 2)
+        scheduler.start()
+        self.assertTrue(scheduler.drain(1))
+        scheduler.close()
+        self.assertEqual(sent, [{"command": "RESET"}, {"command": "BOARD"}, self.move(2, 2)])
+
+    def test_reset_does_not_overtake_a_pending_mode(self):
+        sent = []
+        scheduler = OutboundScheduler(sent.append)
+        scheduler.submit({"command": "MODE", "mode": 1})
+        scheduler.submit({"command": "RESET"})
+        scheduler.start()
+        self.assertTrue(scheduler.drain(1))
+        scheduler.close()
+        self.assertEqual(sent, [{"command": "MODE", "mode": 1}, {"command": "RESET"}])
+
+    def test_mode_supersedes_moves_and_older_mode(self):
+        scheduler = OutboundScheduler(MagicMock())
+        scheduler.submit({"command": "MODE", "mode": 1})
+        scheduler.submit(self.move(0, 0))
+        scheduler.submit({"command": "MODE", "mode": 2})
+        self.assertEqual(list(scheduler._normal), [{"command": "MODE", "mode": 2}])
+
+    def test_queue_is_bounded(self):
+        scheduler = OutboundScheduler(MagicMock(), capacity=2)
+        scheduler.submit(self.move(0, 0))
+        scheduler.submit(self.move(0, 1))
+        self.assertEqual(scheduler.submit(self.move(0, 2)), "Error: Outbound queue full")
+        self.assertEqual(scheduler.submit({"command": "RESET"}), "Queued")
+        self.assertEqual((len(scheduler), scheduler.rejected), (1, 1))
+
+    def test_json_commands_wait_for_the_firmware_window(self):
+        uart = UARTCommunication(codec="json")
+        uart.ser = MagicMock(is_open=True)
+        uart.enable_scheduler()
+        try:
+            for col in range(3):
+                uart.send_message(self.move(0, col))
+            time.sleep(0.05)
+            # each MOVE frame with its id is over 32 bytes: only one fits the 64-byte window
+            self.assertEqual(uart.ser.write.call_count, 1)
+            uart._resolve_request({"type": "cell", "id": 0, "r": 0, "c": 0, "v": "X"})
+            time.sleep(0.05)
+            self.assertEqual(uart.ser.write.call_count, 2)
+        finally:
+            uart.close_port()
+
+    def test_link_control_bypasses_scheduler(self):
+        uart = UARTCommunication()
+        uart.ser = FakeBaudSerial()
+        uart.enable_scheduler()
+        try:
+            self.assertIsNotNone(uart.ping(timeout=0.1))
+        finally:
+            uart.disable_scheduler()
+
+
+class TestRequestPipelining(unittest.TestCase):
+    def setUp(self):
+        self.uart = UARTCommunication(codec="json")
+        self.uart.ser = MagicMock(is_open=True, in_waiting=0)
+
+    def feed(self, data):
+        self.uart.ser.in_waiting = len(data)
+        self.uart.ser.read.return_value = data
+        messages = self.uart.receive_messages()
+        self.uart.ser.in_waiting = 0
+        return messages
+
+    def test_replies_are_matched_by_id(self):
+        self.uart.window_bytes = 256
+        first = self.uart.request({"command": "MOVE", "row": 0, "col": 0})
+        second = self.uart.request({"command": "RESET"}, expect_type="board")
+        self.assertEqual(self.uart.ser.write.call_args_list[0][0][0],
+                         b'{"command": "MOVE", "row": 0, "col": 0, "id": 0}\n')
+        self.assertEqual(self.uart.pending_requests, 2)
+        messages = self.feed(b'{"type":"game_status","message":"Game reset.","id":1}\r\n'
+                             b'{"type":"cell","r":0,"c":0,"v":"X","id":0}\r\n')
+        self.assertEqual(len(messages), 2)
+        self.assertEqual(first.result(0)["type"], "cell")
+        self.assertFalse(second.done())
+        self.feed(b'{"type":"board","board":[],"id":1}\r\n')
+        self.assertEqual(second.result(0), {"type": "board", "board": [], "id": 1})
+        self.assertEqual(self.uart.pending_requests, 0)
+
+    def test_window_limits_bytes_in_flight(self):
+        self.uart.window_bytes = 64
+        first = self.uart.request({"command": "RESET"})
+        blocked = self.uart.request({"command": "MOVE", "row": 1, "col": 1}, timeout=0.05)
+        with self.assertRaises(TimeoutError):
+            blocked.result(1)
+        self.assertEqual(self.uart.ser.write.call_count, 1)
+        self.feed(b'{"type":"game_status","message":"Game reset.","id":0}\r\n')
+        self.assertTrue(first.done())
+        self.uart.request({"command": "MOVE", "row": 1, "col": 1})
+        self.assertEqual(self.uart.ser.write.call_count, 2)
+
+    def test_default_window_holds_one_move(self):
+        self.uart.request({"command": "MOVE", "row": 0, "col": 0})
+        self.assertEqual(len(self.uart.ser.write.call_args[0][0]), 49)
+        self.uart.request({"command": "MOVE", "row": 0, "col": 1}, timeout=0.05)
+        self.assertEqual(self.uart.ser.write.call_count, 1)
+        self.uart.window_bytes = 128
+        self.uart.request({"command": "MOVE", "row": 0, "col": 2})
+        self.assertEqual(self.uart.ser.write.call_count, 2)
+        self.assertEqual(self.uart.pending_requests, 2)
+
+    def test_error_reply_resolves_request(self):
+        future = self.uart.request({"command": "MOVE", "row": 0, "col": 0}, expect_type="cell")
+        self.feed(b'{"type":"error","message":"Invalid move.","id":0}\r\n')
+        self.assertEqual(future.result(0)["type"], "error")
+
+    def test_close_fails_pending_requests(self):
+        future = self.uart.request({"command": "RESET"})
+        self.uart.close_port()
+        with self.assertRaises(ConnectionError):
+            future.result(0)
+
+    def test_request_without_open_port(self):
+        with self.assertRaises(ConnectionError):
+            UARTCommunication().request({"command": "RESET"}).result(0)
+
+
+class FakeBaudSerial:
+    """Serial double that answers BAUD, CRC and PING like TicTacToeHW.
+
+    With `confirm` False PINGs at an unconfirmed rate are lost; `rollback`
+    enables the firmware's return to the old rate and `pong_loss` drops the
+    PONGs sent during the first seconds after a BAUD.
+    """
+    def __init__(self, confirm=True, rollback=None, pong_loss=0.0):
+        self.is_open = True
+        self.baudrate = 9600
+        self.firmware_baud = 9600
+        self.previous_baud = None
+        self.confirm = confirm
+        self.rollback = rollback
+        self.pong_loss = pong_loss
+        self.switched_at = 0.0
+        self.crc = False
+        self.rx = bytearray()
+
+    def reply(self, payload):
+        self.rx += (add_checksum(payload + b'\n')[:-1] if self.crc else payload) + b'\r\n'
+
+    @property
+    def in_waiting(self):
+        return len(self.rx)
+
+    def read(self, size=1):
+        if not self.rx:
+            time.sleep(0.001)  # like a port timeout, keeps a reader thread from spinning
+        data = bytes(self.rx[:size])
+        del self.rx[:size]
+        return data
+
+    def reset_input_buffer(self):
+        self.rx.clear()
+
+    def write(self, data):
+        for line in data.splitlines():
+            line = strip_checksum(line) or line
+            message = json.loads(line) if line.strip() else {}
+            now = time.monotonic()
+            if self.previous_baud is not None and self.rollback is not None and now - self.switched_at >= self.rollback:
+                self.firmware_baud, self.previous_baud = self.previous_baud, None
+            if message.get("command") == "BAUD":
+                self.reply(b'{"type":"baud","baud":%d}' % message["baud"])
+                self.firmware_baud, self.previous_baud = message["baud"], self.firmware_baud
+                self.switched_at = now
+            elif message.get("command") == "CRC":
+                self.reply(b'{"type":"crc","enable":%s}' % json.dumps(message["enable"]).encode())
+                self.crc = message["enable"]
+            elif message.get("command") == "PING" and self.baudrate == self.firmware_baud:
+                if self.previous_baud is not None and not self.confirm:
+                    continue
+                self.previous_baud = None
+                if now - self.switched_at >= self.pong_loss:
+                    self.reply(b'{"type":"pong"}')
+        return len(data)
+
+
+class TestFrameChecksums(unittest.TestCase):
+    def test_round_trip(self):
+        frame = add_checksum(b'{"type":"pong"}\n')
+        self.assertEqual(frame, b'{"type":"pong"}*%02X\n' % crc8(b'{"type":"pong"}'))
+        self.assertEqual(strip_checksum(frame[:-1]), b'{"type":"pong"}')
+        self.assertIsNone(strip_checksum(b'{"type":"pong"}'))
+
+    def test_corrupted_frame_costs_only_itself(self):
+        framer = FrameReader()
+        framer.checksum = True
+        good = add_checksum(b'{"type":"pong"}\n')
+        bad = bytearray(add_checksum(b'{"type":"cell","r":0,"c":0,"v":"X"}\n'))
+        bad[10] ^= 0x20
+        framer.feed(good + bytes(bad) + good.replace(b'\n', b'\r\n'))
+        self.assertEqual(list(framer.frames()), [b'{"type":"pong"}', b'{"type":"pong"}'])
+        self.assertEqual(framer.corrupted, 1)
+
+    def test_enable_checksums(self):
+        uart = UARTCommunication(codec="json")
+        uart.ser = FakeBaudSerial()
+        self.assertTrue(uart.enable_checksums(timeout=0.1))
+        self.assertTrue(uart.framer.checksum)
+        self.assertEqual(uart._encode({"command": "RESET"})[0], add_checksum(uart.encoder.encode({"command": "RESET"})[0]))
+        self.assertIsNotNone(uart.ping(timeout=0.1))
+        uart.ser.rx += b'{"type":"pong"}*00\r\n'
+        self.assertEqual(uart.receive_messages(), [])
+        self.assertEqual(uart.framer.corrupted, 1)
+        self.assertTrue(uart.enable_checksums(False, timeout=0.1))
+        self.assertFalse(uart.framer.checksum)
+
+
+class TestLinkStats(unittest.TestCase):
+    def test_histogram(self):
+        histogram = LatencyHistogram()
+        for seconds in (0.0005, 0.003, 0.004, 0.004, 2.0):
+            histogram.record(seconds)
+        snapshot = histogram.snapshot()
+        self.assertEqual((snapshot["count"], snapshot["min"], snapshot["max"]), (5, 0.0005, 2.0))
+        self.assertEqual(snapshot["p50"], 0.005)
+        self.assertEqual(snapshot["p99"], 2.0)
+        self.assertEqual(dict(snapshot["buckets"])[None], 1)
+        self.assertIsNone(LatencyHistogram().snapshot()["p50"])
+
+    def test_counters(self):
+        uart = UARTCommunication(codec="json")
+        frames = b'{"type":"pong"}\r\n{bad json}\r\n\r\n'
+        uart.ser = MagicMock(is_open=True, in_waiting=len(frames))
+        uart.ser.read.return_value = frames
+        uart.receive_messages()
+        uart.send_messages([{"command": "RESET"}, {"command": "BOARD"}])
+        stats = uart.stats()
+        self.assertEqual(stats["bytes_in"], len(frames))
+        self.assertEqual(stats["frames_in"], 3)
+        self.assertEqual(stats["parse_errors"], 1)
+        self.assertEqual(stats["frames_out"], 2)
+        self.assertEqual(stats["bytes_out"], len(uart.ser.write.call_args[0][0]))
+        self.assertEqual((stats["inbound"], stats["requests"], stats["resyncs"]), (0, 0, 0))
+
+    def test_round_trip_latency_per_command(self):
+        uart = UARTCommunication()
+        uart.ser = FakeBaudSerial()
+        uart.ping(timeout=0.1)
+        future = uart.request({"command": "MOVE", "row": 0, "col": 0})
+        uart._resolve_request({"type": "cell", "id": 0})
+        self.assertEqual(future.result(0)["type"], "cell")
+        latency = uart.stats()["latency"]
+        self.assertEqual(latency["PING"]["count"], 1)
+        self.assertEqual(latency["MOVE"]["count"], 1)
+
+
+class TestWireCapture(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".cap")
+        os.close(handle)
+        os.remove(self.path)
+
+    def tearDown(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def write_capture(self, records):
+        with open(self.path, "wb") as file:
+            file.write(CAPTURE_MAGIC)
+            for timestamp, direction, data in records:
+                file.write(struct.pack("<QBI", timestamp, direction, len(data)) + data)
+
+    def test_session_is_recorded_in_both_directions(self):
+        uart = UARTCommunication(codec="json")
+        frames = b'{"type":"pong"}\r\n'
+        uart.ser = MagicMock(is_open=True, in_waiting=len(frames))
+        uart.ser.read.return_value = frames
+        self.assertEqual(uart.start_capture(self.path), f"Capturing to {self.path}")
+        uart.send_message({"command": "PING"})
+        uart.receive_messages()
+        uart.stop_capture()
+        records = list(read_capture(self.path))
+        self.assertEqual([(direction, data) for _, direction, data in records],
+                         [(CAPTURE_OUT, b'{"command": "PING"}\n'), (CAPTURE_IN, frames)])
+        self.assertLessEqual(records[0][0], records[1][0])
+
+    def test_truncated_record_is_ignored(self):
+        recorder = WireRecorder(self.path)
+        recorder.record(CAPTURE_IN, b'{"type":"pong"}\n')
+        recorder.close()
+        with open(self.path, "ab") as file:
+            file.write(struct.pack("<QBI", 1, CAPTURE_IN, 100) + b"partial")
+        self.assertEqual(len(list(read_capture(self.path))), 1)
+
+    def test_rejects_other_files(self):
+        with open(self.path, "wb") as file:
+            file.write(b"not a capture")
+        with self.assertRaises(ValueError):
+            list(read_capture(self.path))
+        self.assertIn("Error", UARTCommunication().open_replay(self.path))
+
+    def test_replay_at_max_speed(self):
+        self.write_capture([(0, CAPTURE_IN, b'{"type":"info","message":"TicTacToe Game Started"}\r\n{"ty'),
+                            (5 * 10**9, CAPTURE_OUT, b'{"command":"BOARD"}\n'),
+                            (10 * 10**9, CAPTURE_IN, b'pe":"pong"}\r\n')])
+        uart = UARTCommunication()
+        self.assertEqual(uart.open_replay(self.path, speed=None), f"Connected to {self.path}")
+        self.assertEqual(uart.receive_messages(), [{"type": "info", "message": "TicTacToe Game Started"},
+                                                   {"type": "pong"}])
+        self.assertTrue(uart.ser.finished)
+
+    def test_replay_closes_the_live_port(self):
+        self.write_capture([(0, CAPTURE_IN, b'{"type":"pong"}\n')])
+        uart = UARTCommunication()
+        live = MagicMock(is_open=True, in_waiting=0)
+        live.read.return_value = b''
+        uart.ser = live
+        uart.start_reader()
+        self.assertEqual(uart.open_replay(self.path, speed=None), f"Connected to {self.path}")
+        live.close.assert_called_once()
+        self.assertFalse(uart.reader_running)
+        self.assertIsInstance(uart.ser, ReplaySerial)
+
+    def test_replay_speed_scales_recorded_gaps(self):
+        self.write_capture([(0, CAPTURE_IN, b'{"type":"pong"}\n'), (2 * 10**9, CAPTURE_IN, b'{"type":"pong"}\n')])
+        ser = ReplaySerial(self.path, speed=20, timeout=0.5)
+        self.assertEqual(ser.in_waiting, 16)
+        ser.read(16)
+        self.assertEqual(ser.in_waiting, 0)
+        started = time.monotonic()
+        self.assertEqual(ser.read(16), b'{"type":"pong"}\n')
+        self.assertAlmostEqual(time.monotonic() - started, 0.1, delta=0.08)
+
+
+class TestBaudNegotiation(unittest.TestCase):
+    def test_switches_after_confirming_ping(self):
+        uart = UARTCommunication()
+        uart.ser = FakeBaudSerial()
+        self.assertTrue(uart.negotiate_baud(115200, timeout=0.1))
+        self.assertEqual(uart.ser.baudrate, 115200)
+        self.assertEqual(uart.frames_out, 3)  # BAUD, the resync newline and PING
+
+    def test_falls_back_when_ping_fails(self):
+        uart = UARTCommunication()
+        uart.ser = FakeBaudSerial(confirm=False)
+        self.assertFalse(uart.negotiate_baud(1000000, timeout=0.02, rollback=0.05))
+        self.assertEqual(uart.ser.baudrate, 9600)
+
+    def test_returns_to_the_old_rate_after_the_rollback_window(self):
+        uart = UARTCommunication()
+        uart.ser = FakeBaudSerial(confirm=False, rollback=0.1)
+        started = time.monotonic()
+        self.assertFalse(uart.negotiate_baud(1000000, timeout=0.02, rollback=0.1))
+        self.assertGreaterEqual(time.monotonic() - started, 0.1)
+        self.assertEqual((uart.ser.baudrate, uart.ser.firmware_baud), (9600, 9600))
+        self.assertIsNotNone(uart.ping(0.02))
+
+    def test_adopts_the_new_rate_when_only_the_pong_was_lost(self):
+        uart = UARTCommunication()
+        uart.ser = FakeBaudSerial(rollback=0.1, pong_loss=0.12)
+        self.assertTrue(uart.negotiate_baud(1000000, timeout=0.05, rollback=0.1))
+        self.assertEqual((uart.ser.baudrate, uart.ser.firmware_baud), (1000000, 1000000))
+
+    def test_measure_link_reports_round_trips(self):
+        uart = UARTCommunication()
+        uart.ser = FakeBaudSerial()
+        result = uart.measure_link(count=5, timeout=0.1)
+        self.assertEqual(result["round_trips"], 5)
+        self.assertEqual(result["lost"], 0)
+        self.assertGreater(result["bytes_per_second"], 0)
+
+
+class TestWaitForMessage(unittest.TestCase):
+    BANNER = {"type": "info", "message": "TicTacToe Game Started"}
+
+    def setUp(self):
+        self.uart = UARTCommunication(codec="json")
+        self.uart.ser = FakeBaudSerial()
+
+    def tearDown(self):
+        self.uart.stop_reader()
+
+    def test_waiting_does_not_compete_with_the_pump(self):
+        self.uart.start_reader()
+        received, stop = [], threading.Event()
+
+        def pump():
+            while not stop.is_set():
+                received.extend(self.uart.receive_messages())
+                time.sleep(0.001)
+
+        thread = threading.Thread(target=pump)
+        thread.start()
+        try:
+            self.assertIsNotNone(self.uart.ping(timeout=1))
+            threading.Timer(0.05, self.uart.ser.reply, [b'{"type":"info","message":"TicTacToe Game Started"}']).start()
+            self.assertEqual(self.uart.wait_for_message(is_banner, timeout=1), self.BANNER)
+            time.sleep(0.05)
+        finally:
+            stop.set()
+            thread.join()
+        self.assertEqual(received, [self.BANNER])  # the PONG is consumed, the banner still shown
+
+    def test_queued_messages_keep_their_order(self):
+        self.uart._post("Error: Connection to COM3 lost, waiting for the device")
+        self.uart.ser.reply(b'{"type":"board","board":[["X"," "," "],[" "," "," "],[" "," "," "]]}')
+        self.uart.ser.reply(b'{"type":"info","message":"TicTacToe Game Started"}')
+        self.assertEqual(self.uart.wait_for_message(is_banner, timeout=0.5), self.BANNER)
+        messages = self.uart.receive_messages()
+        self.assertEqual(messages[0], "Error: Connection to COM3 lost, waiting for the device")
+        self.assertEqual([m.get("type") for m in messages[1:]], ["board", "info"])
+
+    def test_typed_messages(self):
+        uart = UARTCommunication(codec="json", typed=True)
+        uart.ser = FakeBaudSerial()
+        uart.start_reader()
+        try:
+            self.assertIsNotNone(uart.ping(timeout=1))
+            threading.Timer(0.05, uart.ser.reply, [b'{"type":"info","message":"TicTacToe Game Started"}']).start()
+            banner = StatusMessage("info", "TicTacToe Game Started")
+            self.assertEqual(uart.wait_for_message(is_banner, timeout=1), self.BANNER)
+            time.sleep(0.05)
+            self.assertEqual(uart.receive_messages(), [banner])  # the PONG is consumed
+        finally:
+            uart.stop_reader()
+
+    def test_timeout_leaves_no_waiter(self):
+        self.assertIsNone(self.uart.wait_for_message(is_banner, timeout=0.02))
+        self.assertEqual(self.uart._waiters, [])
+
+
+class TestOpenPortAsync(unittest.TestCase):
+    @patch('serial.Serial')
+    def test_ready_when_banner_arrives(self, mock_serial):
+        banner = b'{"type":"info","message":"TicTacToe Game Started"}\r\n'
+        mock_serial.return_value = MagicMock(is_open=True, in_waiting=len(banner))
+        mock_serial.return_value.read.return_value = banner
+        uart = UARTCommunication()
+        future = uart.open_port_async('COM3', timeout=1)
+        self.assertEqual(future.result(2), "Connected to COM3")
+        self.assertTrue(uart.ready.is_set())
+        self.assertEqual(uart.receive_message(), {"type": "info", "message": "TicTacToe Game Started"})
+
+    @patch('serial.Serial')
+    def test_typed_connection_sees_the_banner(self, mock_serial):
+        banner = b'{"type":"info","message":"TicTacToe Game Started"}\r\n'
+        mock_serial.return_value = MagicMock(is_open=True, in_waiting=len(banner))
+        mock_serial.return_value.read.return_value = banner
+        uart = UARTCommunication(typed=True)
+        self.assertEqual(uart.open_port_async('COM3', timeout=1).result(2), "Connected to COM3")
+        self.assertEqual(uart.receive_message(), StatusMessage("info", "TicTacToe Game Started"))
+
+    @patch('serial.Serial')
+    def test_silent_port_times_out_and_closes(self, mock_serial):
+        mock_serial.return_value = MagicMock(is_open=True, in_waiting=0)
+        uart = UARTCommunication()
+        future = uart.open_port_async('COM3', timeout=0.1)
+        self.assertIn("Error: No answer from firmware", future.result(2))
+        self.assertFalse(uart.ready.is_set())
+        self.assertIsNone(uart.ser)
+
+    @patch('serial.Serial')
+    def test_open_failure_is_reported(self, mock_serial):
+        mock_serial.side_effect = Exception("Port error")
+        future = UARTCommunication().open_port_async('COM3')
+        self.assertEqual(future.result(2), "Error: Port error")
+
+
+class TestDiscover(unittest.TestCase):
+    BANNER = b'{"type":"info","message":"TicTacToe Game Started"}\r\n'
+
+    def fake_serial(self, port, baud_rate, timeout=None):
+        if port == '/dev/ttyACM0':
+            ser = MagicMock(is_open=True, in_waiting=len(self.BANNER))
+            ser.read.return_value = self.BANNER
+            return ser
+        if port == '/dev/ttyUSB0':
+            return FakeBaudSerial()  # no banner, but answers PING
+        if port.startswith('/dev/ttyS'):
+            return MagicMock(is_open=True, in_waiting=0)
+        raise serial.SerialException(f"could not open port {port}")
+
+    @patch('serial.tools.list_ports.comports')
+    @patch('serial.Serial')
+    def test_ranks_devices_found_in_parallel(self, mock_serial, mock_comports):
+        mock_serial.side_effect = self.fake_serial
+        mock_comports.return_value = [
+            SimpleNamespace(device='/dev/ttyUSB0', vid=0x1A86, pid=0x7523, serial_number=None),
+            SimpleNamespace(device='/dev/ttyACM0', vid=0x2341, pid=0x0043, serial_number='A1'),
+        ]
+        ports = ['/dev/ttyS0', '/dev/ttyS1', '/dev/ttyUSB0', '/dev/ttyACM0', '/dev/ttyS2', '/dev/ttyACM9']
+        started = time.monotonic()
+        found = UARTCommunication.discover(ports, timeout=0.3)
+        # three silent ports probed one after another would take over a second
+        self.assertLess(time.monotonic() - started, 0.8)
+        self.assertEqual([entry["port"] for entry in found], ['/dev/ttyACM0', '/dev/ttyUSB0'])
+        self.assertTrue(found[0]["banner"])
+        self.assertFalse(found[1]["banner"])
+        self.assertTrue(found[1]["arduino"])
+
+    @patch('serial.tools.list_ports.comports')
+    @patch('serial.Serial')
+    def test_skips_excluded_and_non_arduino_ports(self, mock_serial, mock_comports):
+        mock_serial.side_effect = self.fake_serial
+        mock_comports.return_value = [
+            SimpleNamespace(device='/dev/ttyUSB0', vid=0x1A86, pid=0x7523, serial_number=None),
+            SimpleNamespace(device='/dev/ttyACM0', vid=0x2341, pid=0x0043, serial_number='A1'),
+            SimpleNamespace(device='/dev/ttyS0', vid=None, pid=None, serial_number=None),
+        ]
+        found = UARTCommunication.discover(timeout=0.3, exclude=['/dev/ttyACM0'], arduino_only=True)
+        self.assertEqual([entry["port"] for entry in found], ['/dev/ttyUSB0'])
+        self.assertEqual([call.args[0] for call in mock_serial.call_args_list], ['/dev/ttyUSB0'])
+
+    @patch('serial.tools.list_ports.comports', return_value=[])
+    def test_no_ports(self, mock_comports):
+        self.assertEqual(UARTCommunication.discover(), [])
+
+
+class TestReconnectSupervisor(unittest.TestCase):
+    BOARD = SimpleNamespace(device='/dev/ttyACM1', vid=0x2341, pid=0x0043, serial_number='A1')
+
+    def setUp(self):
+        self.uart = UARTCommunication(codec="json")
+        self.uart.port, self.uart.baud_rate = '/dev/ttyACM0', 9600
+
+    def tearDown(self):
+        self.uart.close_port()
+
+    def test_io_error_closes_port_once_without_supervisor(self):
+        broken = MagicMock(is_open=True, in_waiting=0)
+        broken.read.side_effect = serial.SerialException("device disconnected")
+        self.uart.ser = broken
+        self.uart.start_reader()
+        self.assertEqual(self.uart.inbound.get(timeout=1), "Error: device disconnected")
+        time.sleep(0.05)
+        self.assertIsNone(self.uart.ser)
+        self.assertTrue(self.uart.inbound.empty())
+        broken.close.assert_called_once()
+
+    @patch('serial.Serial')
+    @patch('serial.tools.list_ports.comports')
+    def test_reopens_device_under_new_name_and_resyncs(self, mock_comports, mock_serial):
+        mock_comports.return_value = []
+        banner = b'{"type":"info","message":"TicTacToe Game Started"}\r\n'
+        reopened = MagicMock(is_open=True, in_waiting=len(banner))
+        reopened.read.side_effect = [banner] + [b''] * 1000
+        mock_serial.return_value = reopened
+        self.uart.enable_auto_reconnect(initial_delay=0.01, identity=(0x2341, 0x0043, 'A1'))
+
+        self.uart.supervisor.notify_failure()
+        time.sleep(0.05)
+        mock_serial.assert_not_called()
+        mock_comports.return_value = [self.BOARD]
+
+        deadline = time.monotonic() + 2
+        while self.uart.supervisor.reconnects == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.uart.supervisor.reconnects, 1)
+        mock_serial.assert_called_with('/dev/ttyACM1', 9600, timeout=1)
+        reopened.write.assert_called_with(b'{"command": "BOARD"}\n')
+        messages = self.uart.receive_messages()
+        self.assertEqual(messages, ["Error: Connection to /dev/ttyACM0 lost, waiting for the device",
+                                    {"type": "info", "message": "TicTacToe Game Started"},
+                                    "Reconnected to /dev/ttyACM1"])
+
+    @patch('serial.tools.list_ports.comports')
+    def test_serial_number_must_match_when_known(self, mock_comports):
+        twin = SimpleNamespace(device='/dev/ttyACM2', vid=0x2341, pid=0x0043, serial_number='B2')
+        mock_comports.return_value = [twin]
+        self.uart.enable_auto_reconnect(identity=(0x2341, 0x0043, 'A1'))
+        self.assertIsNone(self.uart.supervisor.find_device())
+        self.uart.supervisor.identity = (0x2341, 0x0043, None)
+        self.assertEqual(self.uart.supervisor.find_device(), '/dev/ttyACM2')
+
+    @patch('serial.Serial')
+    @patch('serial.tools.list_ports.comports')
+    def test_reports_vid_pid_only_match(self, mock_comports, mock_serial):
+        mock_comports.return_value = [SimpleNamespace(device='/dev/ttyUSB0', vid=0x1A86, pid=0x7523,
+                                                      serial_number=None)]
+        mock_serial.side_effect = serial.SerialException("busy")
+        self.uart.enable_auto_reconnect(initial_delay=0.5, identity=(0x1A86, 0x7523, None))
+        self.uart.supervisor.notify_failure()
+        deadline = time.monotonic() + 2
+        while not mock_serial.called and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertIn("Warning: /dev/ttyUSB0 matched by VID/PID only, the board has no serial number",
+                      self.uart.receive_messages())
+
+    @patch('serial.Serial')
+    def test_handle_is_published_after_the_framer_is_reset(self, mock_serial):
+        seen = []
+        self.uart.framer.feed(b'{"type":"inf')
+        mock_serial.side_effect = lambda *args, **kwargs: seen.append(self.uart.ser) or MagicMock(is_open=True)
+        original_clear = self.uart.framer.clear
+        self.uart.framer.clear = lambda: (seen.append(self.uart.ser), original_clear())
+        self.uart.ser = None
+        self.assertEqual(self.uart.open_port('/dev/ttyACM1', 9600), "Connected to /dev/ttyACM1")
+        self.assertEqual(seen, [None, None])
+        self.assertIsNotNone(self.uart.ser)
+
+
+class TestPortRegistry(unittest.TestCase):
+    UNO = SimpleNamespace(device='/dev/ttyACM0', vid=0x2341, pid=0x0043, serial_number='A1')
+    CLONE = SimpleNamespace(device='/dev/ttyUSB0', vid=0x1A86, pid=0x7523, serial_number=None)
+    MODEM = SimpleNamespace(device='/dev/ttyS0', vid=None, pid=None, serial_number=None)
+
+    @patch('serial.tools.list_ports.comports')
+    def test_reads_are_served_from_cache(self, mock_comports):
+        mock_comports.return_value = [self.MODEM, self.UNO]
+        registry = PortRegistry()
+        self.assertTrue(registry.refresh())
+        for _ in range(3):
+            self.assertEqual(registry.ports(), ['/dev/ttyACM0', '/dev/ttyS0'])
+        mock_comports.assert_called_once()
+
+    @patch('serial.tools.list_ports.comports')
+    def test_arduino_filter(self, mock_comports):
+        mock_comports.return_value = [self.MODEM, self.CLONE, self.UNO]
+        registry = PortRegistry()
+        registry.refresh()
+        self.assertEqual(registry.ports(arduino_only=True), ['/dev/ttyACM0', '/dev/ttyUSB0'])
+
+    @patch('serial.tools.list_ports.comports')
+    def test_refresh_reports_changes(self, mock_comports):
+        changes = []
+        registry = PortRegistry(on_change=changes.append)
+        mock_comports.return_value = [self.UNO]
+        self.assertTrue(registry.refresh())
+        self.assertFalse(registry.refresh())
+        mock_comports.return_value = [self.UNO, self.CLONE]
+        self.assertTrue(registry.refresh())
+        self.assertEqual(registry.version, 2)
+        self.assertEqual(len(changes), 2)
+
+    @patch('serial.tools.list_ports.comports')
+    def test_background_rescan_on_device_signature_change(self, mock_comports):
+        signature = [0]
+        mock_comports.return_value = []
+        registry = PortRegistry(poll_interval=0.01, rescan_interval=60, signature=lambda: signature[0])
+        registry.start()
+        try:
+            deadline = time.monotonic() + 2
+            while mock_comports.call_count < 1 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            mock_comports.return_value = [self.UNO]
+            signature[0] = 1  # a device node appeared
+            while not registry.ports() and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(registry.ports(), ['/dev/ttyACM0'])
+            self.assertEqual(mock_comports.call_count, 2)
+        finally:
+            registry.stop()
+
+
+class TestFrameReader(unittest.TestCase):
+    def test_splits_frames_and_keeps_partial(self):
+        framer = FrameReader(capacity=64)
+        framer.feed(b'{"a": 1}\r\n{"b": 2}\n{"c"')
+        self.assertEqual(list(framer.frames()), [b'{"a": 1}', b'{"b": 2}'])
+        self.assertEqual(len(framer), 4)
+        framer.feed(b': 3}\r\n')
+        self.assertEqual(list(framer.frames()), [b'{"c": 3}'])
+        self.assertEqual(len(framer), 0)
+
+    def test_reuses_buffer_across_many_frames(self):
+        framer = FrameReader(capacity=32)
+        received = []
+        for i in range(100):
+            framer.feed(b'{"n": %d}\n{"m"' % i)
+            received.extend(framer.frames())
+            framer.feed(b': 0}\n')
+            received.extend(framer.frames())
+        self.assertEqual(len(received), 200)
+        self.assertEqual(received[-2], b'{"n": 99}')
+        self.assertEqual(framer.overflows, 0)
+
+    def test_drops_overlong_frame_and_resyncs(self):
+        framer = FrameReader(capacity=16)
+        framer.feed(b'{"x": "0123456789')
+        framer.feed(b'abcdefghij"}\n{"ok": 1}\n')
+        self.assertEqual(list(framer.frames()), [b'{"ok": 1}'])
+        self.assertEqual(framer.overflows, 1)
+
+    def test_read_from_uses_single_bulk_read(self):
+        framer = FrameReader()
+        ser = MagicMock(in_waiting=20)
+        ser.read.return_value = b'{"a": 1}\n{"b": 2}\n'
+        self.assertEqual(framer.read_from(ser), 18)
+        ser.read.assert_called_once_with(20)
+        self.assertEqual(len(list(framer.frames())), 2)
+
+
+class TestReceiveMessages(unittest.TestCase):
+    def setUp(self):
+        self.uart = UARTCommunication()
+        self.uart.ser = MagicMock(is_open=True)
+        data = b''.join(b'{"type": "board", "n": %d}\r\n' % i for i in range(10))
+        self.uart.ser.in_waiting = len(data)
+        self.uart.ser.read.return_value = data
+
+    def test_returns_all_buffered_frames(self):
+        messages = self.uart.receive_messages()
+        self.assertEqual([m["n"] for m in messages], list(range(10)))
+        self.uart.ser.read.assert_called_once()
+
+    def test_max_count_keeps_remaining_frames(self):
+        self.assertEqual(len(self.uart.receive_messages(max_count=4)), 4)
+        self.uart.ser.in_waiting = 0
+        self.assertEqual([m["n"] for m in self.uart.receive_messages()], list(range(4, 10)))
+
+    def test_without_open_port(self):
+        self.assertEqual(UARTCommunication().receive_messages(), [])
+
+    def test_auto_receive_handles_whole_burst_in_one_tick(self):
+        boards = [[["X", " ", " "], [" ", " ", " "], [" ", " ", " "]],
+                  [["X", "O", " "], [" ", " ", " "], [" ", " ", " "]]]
+        data = b''.join(b'{"type": "board", "board": %s}\r\n' % json.dumps(b).encode() for b in boards)
+        self.uart.ser.in_waiting = len(data)
+        self.uart.ser.read.return_value = data
+        buttons = [[MagicMock() for _ in range(3)] for _ in range(3)]
+        root = MagicMock()
+        auto_receive(self.uart, buttons, MagicMock(), root)
+        buttons[0][1].config.assert_called_with(text="O")
+        # both boards are handled, but only the latest one is painted
+        self.assertEqual(buttons[0][0].config.call_count, 1)
+        root.after.assert_called_once()
+
+
+class TestUARTReaderThread(unittest.TestCase):
+    def setUp(self):
+        self.uart = UARTCommunication(inbound_size=4)
+        self.uart.ser = MagicMock(is_open=True, in_waiting=0)
+
+    def tearDown(self):
+        self.uart.stop_reader()
+
+    def test_reader_queues_parsed_messages(self):
+        chunks = [b'{"type": "info", "message": "TicTacToe Game Started"}\r\nInvalid JSON\r\n']
+        self.uart.ser.read.side_effect = lambda size: chunks.pop(0) if chunks else time.sleep(0.01) or b''
+        self.uart.start_reader()
+        first = self.uart.inbound.get(timeout=1)
+        second = self.uart.inbound.get(timeout=1)
+        self.assertEqual(first, {"type": "info", "message": "TicTacToe Game Started"})
+        self.assertEqual(second, "Error: Invalid JSON received")
+
+    def test_reader_joins_partial_frames(self):
+        chunks = [b'{"type": "er', b'ror", "message": "Invalid move."}\r\n']
+        self.uart.ser.read.side_effect = lambda size: chunks.pop(0) if chunks else time.sleep(0.01) or b''
+        self.uart.start_reader()
+        self.assertEqual(self.uart.inbound.get(timeout=1), {"type": "error", "message": "Invalid move."})
+
+    def test_receive_message_reads_from_queue_when_reader_running(self):
+        self.uart.ser.read.side_effect = lambda size: time.sleep(0.01) or b''
+        self.uart.start_reader()
+        self.assertIsNone(self.uart.receive_message())
+        self.uart.inbound.put({"type": "board"})
+        self.assertEqual(self.uart.receive_message(), {"type": "board"})
+        self.uart.ser.read.assert_called()
+
+    def test_reader_notifies_consumer(self):
+        chunks = [b'{"type": "pong"}\r\n']
+        self.uart.ser.read.side_effect = lambda size: chunks.pop(0) if chunks else time.sleep(0.01) or b''
+        woken = threading.Event()
+        self.uart.on_receive = woken.set
+        self.uart.start_reader()
+        self.assertTrue(woken.wait(1))
+        self.assertEqual(self.uart.receive_message(), {"type": "pong"})
+
+    def test_close_port_stops_reader(self):
+        self.uart.ser.read.side_effect = lambda size: time.sleep(0.01) or b''
+        self.uart.start_reader()
+        self.assertTrue(self.uart.reader_running)
+        self.uart.close_port()
+        self.assertFalse(self.uart.reader_running)
+        self.assertIsNone(self.uart.ser)
+
+
+class TestBudgetedPump(unittest.TestCase):
+    def setUp(self):
+        self.uart = UARTCommunication()
+        frames = b"".join(b'{"type":"cell","r":%d,"c":%d,"v":"X"}\r\n' % (i // 3 % 3, i % 3) for i in range(30))
+        self.uart.ser = MagicMock(is_open=True, in_waiting=len(frames))
+        self.uart.ser.read.return_value = frames
+        self.seen = []
+
+    def slow_handler(self, message):
+        self.seen.append((message["r"], message["c"]))
+        time.sleep(0.003)
+
+    def test_dispatch_stops_at_the_budget_and_keeps_order(self):
+        self.uart.subscribe("cell", self.slow_handler)
+        first = self.uart.dispatch_messages(max_time=0.008)
+        self.assertLess(first, 10)
+        self.assertEqual(self.uart.backlog, 30 - first)
+        self.uart.ser.in_waiting = 0
+        while self.uart.backlog:
+            self.assertGreaterEqual(self.uart.dispatch_messages(max_time=0.008), 1)
+        self.assertEqual(self.seen, [(i // 3 % 3, i % 3) for i in range(30)])
+
+    @unittest.skipUnless(hasattr(os, "pipe") and os.name == "posix", "requires POSIX pipes")
+    def test_auto_receive_resumes_on_idle(self):
+        root = FakeTkRoot()
+        self.uart.subscribe("cell", self.slow_handler)
+        buttons = [[MagicMock() for _ in range(3)] for _ in range(3)]
+        wakeup = auto_receive(self.uart, buttons, MagicMock(), root, budget=0.008)
+        self.uart.ser.in_waiting = 0
+        pumps = 1
+        while root.idle:
+            callback = root.idle.pop(0)
+            started = time.monotonic()
+            callback()
+            self.assertLess(time.monotonic() - started, 0.05)
+            pumps += 1
+        wakeup.close()
+        self.assertEqual(len(self.seen), 30)
+        self.assertGreater(pumps, 3)
+        buttons[0][0].config.assert_called_with(text="X")
+
+    def test_wakeups_keep_a_single_pump_queued(self):
+        root = FakeTkRoot()
+        self.uart.subscribe("cell", self.slow_handler)
+        buttons = [[MagicMock() for _ in range(3)] for _ in range(3)]
+        wakeup = auto_receive(self.uart, buttons, MagicMock(), root, budget=0.008)
+        self.uart.ser.in_waiting = 0
+        self.assertEqual(len(root.idle), 1)
+        for _ in range(2):
+            wakeup.callback()  # what each notification or poll runs
+            self.assertEqual(len(root.idle), 1)
+        wakeup.close()
+
+
+class TestBoardRenderer(unittest.TestCase):
+    EMPTY = [[" "] * 3 for _ in range(3)]
+
+    def setUp(self):
+        self.root = FakeTkRoot()
+        self.buttons = [[MagicMock() for _ in range(3)] for _ in range(3)]
+
+    def board(self, *moves):
+        board = [[" "] * 3 for _ in range(3)]
+        for row, col, symbol in moves:
+            board[row][col] = symbol
+        return {"type": "board", "board": board}
+
+    def test_only_latest_board_is_painted_once_per_frame(self):
+        renderer = BoardRenderer(self.buttons, self.root, frame_interval=0.05)
+        renderer.show_board(self.board((0, 0, "X")))
+        renderer.flush()
+        for col in range(3):
+            renderer.show_board(self.board((0, 0, "X"), (1, col, "O")))
+            renderer.show_cell({"type": "cell", "r": 2, "c": col, "v": "X"})
+            renderer.flush()
+        self.assertEqual(renderer.paints, 1)
+        self.assertEqual(len(self.root.scheduled), 1)  # one deferred paint for the next frame
+        delay, paint = self.root.scheduled.pop()
+        self.assertGreater(delay, 0)
+        time.sleep(0.06)
+        paint()
+        self.assertEqual(renderer.paints, 2)
+        self.buttons[1][2].config.assert_called_with(text="O")
+        self.buttons[1][0].config.assert_called_with(text=" ")
+        self.buttons[2][2].config.assert_called_with(text="X")
+        self.assertEqual(self.buttons[0][0].config.call_count, 1)  # unchanged cells are not repainted
+
+    def test_malformed_updates_are_reported_not_painted(self):
+        uart = UARTCommunication(codec="json")
+        frames = (b'{"board": [["X", "O", "X"], ["O", "X", "O"]]}\r\n'
+                  b'{"type":"cell","r":3,"c":0,"v":"X"}\r\n')
+        uart.ser = MagicMock(is_open=True, in_waiting=len(frames))
+        uart.ser.read.return_value = frames
+        output_text = MagicMock()
+        wakeup = auto_receive(uart, self.buttons, output_text, self.root)
+        wakeup.close()
+        logged = [call.args[1] for call in output_text.insert.call_args_list]
+        self.assertEqual(len([line for line in logged if line.startswith("Error: Invalid")]), 2)
+        self.assertFalse(any(button.config.called for row in self.buttons for button in row))
+
+    def test_animation_plays_moves_one_at_a_time(self):
+        renderer = BoardRenderer(self.buttons, self.root, moves_per_second=4)
+        renderer.show_board(self.board((0, 0, "X"), (1, 1, "O"), (2, 2, "X")))
+        renderer.show_cell({"type": "cell", "r": 0, "c": 1, "v": "O"})
+        renderer.flush()
+        painted = [renderer.paints]
+        while self.root.scheduled:
+            delay, step = self.root.scheduled.pop()
+            self.assertEqual(delay, 250)
+            step()
+            painted.append(renderer.paints)
+        self.assertEqual(painted, [1, 2, 3, 4])
+        self.buttons[0][1].config.assert_called_with(text="O")
+        self.buttons[2][2].config.assert_called_with(text="X")
+
+    def test_animation_shows_reset_in_one_step(self):
+        renderer = BoardRenderer(self.buttons, self.root, moves_per_second=4)
+        renderer.show_cell({"type": "cell", "r": 0, "c": 0, "v": "X"})
+        renderer.show_board(self.board())
+        renderer.flush()
+        self.root.scheduled.pop()[1]()
+        self.assertEqual(renderer.paints, 2)
+        self.assertEqual(self.root.scheduled, [])
+        self.buttons[0][0].config.assert_called_with(text=" ")
+
+
+class FakeTkRoot:
+    """Stands in for tk.Tk: records file handlers and after() / after_idle() callbacks."""
+    def __init__(self, file_handlers=True):
+        self.handlers = {}
+        self.scheduled = []
+        self.idle = []
+        self._ids = {}
+        self._next_id = 0
+        self.tk = SimpleNamespace(deletefilehandler=self.handlers.pop)
+        if file_handlers:
+            self.tk.createfilehandler = lambda fd, mask, handler: self.handlers.__setitem__(fd, handler)
+
+    def after(self, delay, callback):
+        entry = (delay, callback)
+        self.scheduled.append(entry)
+        return self._register(self.scheduled, entry)
+
+    def after_idle(self, callback):
+        self.idle.append(callback)
+        return self._register(self.idle, callback)
+
+    def after_cancel(self, identifier):
+        queue, entry = self._ids.pop(identifier, (None, None))
+        if queue is not None and entry in queue:
+            queue.remove(entry)
+
+    def _register(self, queue, entry):
+        self._next_id += 1
+        self._ids[self._next_id] = (queue, entry)
+        return self._next_id
+
+
+class TestTkWakeupFlag(unittest.TestCase):
+    def test_flag_is_checked_on_the_tk_thread(self):
+        root = FakeTkRoot(file_handlers=False)
+        callback = MagicMock(return_value=1)
+        wakeup = TkWakeup(root, callback, min_interval=10)
+        self.assertEqual(wakeup.mode, "flag")
+        root.scheduled.pop()[1]()
+        callback.assert_not_called()  # nothing signalled yet
+        thread = threading.Thread(target=wakeup.notify)  # as the reader thread does
+        thread.start()
+        thread.join()
+        wakeup.notify()
+        self.assertEqual(len(root.scheduled), 1)  # notify() itself never touches Tk
+        delay, check = root.scheduled.pop()
+        self.assertEqual(delay, 10)
+        check()
+        callback.assert_called_once_with()
+        wakeup.close()
+        self.assertEqual(root.scheduled, [])
+
+    def test_polling_notify_reschedules_at_min_interval(self):
+        root = FakeTkRoot(file_handlers=False)
+        wakeup = TkWakeup(root, lambda: 0, event_driven=False, min_interval=10, max_interval=80)
+        for _ in range(4):
+            root.scheduled.pop()[1]()
+        self.assertEqual(root.scheduled, [(80, wakeup._tick)])
+        wakeup.notify()
+        self.assertEqual(root.scheduled, [(10, wakeup._tick)])
+        wakeup.close()
+
+
+@unittest.skipUnless(hasattr(os, "pipe") and os.name == "posix", "requires POSIX pipes")
+class TestTkWakeup(unittest.TestCase):
+    def test_notifications_wake_the_loop_once(self):
+        root = FakeTkRoot()
+        callback = MagicMock(return_value=1)
+        wakeup = TkWakeup(root, callback)
+        self.assertEqual(wakeup.mode, "pipe")
+        self.assertEqual(root.scheduled, [])  # nothing polls while idle
+        fd, handler = next(iter(root.handlers.items()))
+        wakeup.notify()
+        wakeup.notify()
+        self.assertEqual(len(os.read(fd, 16)), 1)
+        handler(fd, 0)
+        callback.assert_called_once_with()
+        wakeup.notify()
+        handler(fd, 0)
+        self.assertEqual(callback.call_count, 2)
+        wakeup.close()
+        self.assertEqual(root.handlers, {})
+
+    def test_polling_fallback_backs_off_when_idle(self):
+        root = FakeTkRoot(file_handlers=False)
+        counts = [3, 0, 0, 0, 0, 0, 0]
+        wakeup = TkWakeup(root, lambda: counts.pop(0), event_driven=False, min_interval=10, max_interval=80)
+        self.assertEqual(wakeup.mode, "poll")
+        for _ in range(6):
+            root.scheduled[-1][1]()
+        self.assertEqual([delay for delay, _ in root.scheduled], [0, 10, 20, 40, 80, 80, 80])
+        wakeup.notify()
+        root.scheduled[-1][1]()
+        self.assertEqual(root.scheduled[-1][0], 20)
+        wakeup.close()
+
+
+@unittest.skipUnless(hasattr(os, "openpty"), "requires a POSIX pseudo-terminal")
+class TestAsyncUARTCommunication(unittest.TestCase):
+    def setUp(self):
+        self.master, self.slave = os.openpty()
+        self.port = os.ttyname(self.slave)
+
+    def tearDown(self):
+        os.close(self.master)
+        os.close(self.slave)
+
+    def run_async(self, coro):
+        return asyncio.run(asyncio.wait_for(coro, 5))
+
+    def test_read_error_ends_iteration(self):
+        async def scenario():
+            uart = AsyncUARTCommunication(codec="json")
+            await uart.open_port(self.port)
+            uart.ser.read = MagicMock(side_effect=serial.SerialException("device disconnected"))
+            os.write(self.master, b"x")
+            received = [message async for message in uart]
+            return received, uart.ser
+
+        received, ser = self.run_async(scenario())
+        self.assertEqual(received, ["Error: device disconnected"])
+        self.assertIsNone(ser)
+
+    def test_concurrent_sends_do_not_interleave(self):
+        async def scenario():
+            uart = AsyncUARTCommunication(codec="json")
+            await uart.open_port(self.port)
+            messages = [{"command": "X", "data": symbol * 20000} for symbol in "ab"]
+            frames = [uart.encoder.encode(message)[0] for message in messages]
+            received = bytearray()
+            os.set_blocking(self.master, False)
+            loop = asyncio.get_running_loop()
+            loop.add_reader(self.master, lambda: received.extend(os.read(self.master, 4096)))
+            statuses = await asyncio.gather(*(uart.send_message(message) for message in messages))
+            while len(received) < sum(map(len, frames)):
+                await asyncio.sleep(0.01)
+            loop.remove_reader(self.master)
+            uart.close_port()
+            return statuses, bytes(received), frames
+
+        statuses, received, frames = self.run_async(scenario())
+        self.assertTrue(all(status.startswith("Sent") for status in statuses))
+        self.assertIn(received, (frames[0] + frames[1], frames[1] + frames[0]))
+
+    def test_send_and_iterate_messages(self):
+        async def scenario():
+            uart = AsyncUARTCommunication(codec="json")
+            self.assertEqual(await uart.open_port(self.port), f"Connected to {self.port}")
+            status = await uart.send({"command": "RESET"})
+            self.assertEqual(status, 'Sent: {"command": "RESET"}')
+            self.assertEqual(os.read(self.master, 64), b'{"command": "RESET"}\n')
+            os.write(self.master, b'{"type": "game_status", "message": "Game reset."}\n{"type": "bo')
+            os.write(self.master, b'ard"}\n')
+            received = []
+            async for message in uart:
+                received.append(message)
+                if len(received) == 2:
+                    uart.close_port()
+            return received
+
+        received = self.run_async(scenario())
+        self.assertEqual(received, [{"type": "game_status", "message": "Game reset."}, {"type": "board"}])
+
+    def test_request_waits_for_expected_type(self):
+        async def scenario():
+            uart = AsyncUARTCommunication()
+            await uart.open_port(self.port)
+            asyncio.get_running_loop().call_later(
+                0.05, os.write, self.master, b'{"type": "game_status"}\n{"type": "board", "board": []}\n')
+            reply = await uart.request({"command": "RESET"}, expect_type="board")
+            other = await uart.receive_message(timeout=1)
+            uart.close_port()
+            return reply, other
+
+        reply, other = self.run_async(scenario())
+        self.assertEqual(reply, {"type": "board", "board": []})
+        self.assertEqual(other, {"type": "game_status"})
+
+    def test_request_times_out(self):
+        async def scenario():
+            uart = AsyncUARTCommunication()
+            await uart.open_port(self.port)
+            try:
+                with self.assertRaises(asyncio.TimeoutError):
+                    await uart.request({"command": "RESET"}, expect_type="board", timeout=0.05)
+            finally:
+                uart.close_port()
+
+        self.run_async(scenario())
+
+    def test_send_without_open_port(self):
+        self.assertEqual(self.run_async(AsyncUARTCommunication().send({"command": "RESET"})), "Port not opened")
+
+
+@unittest.skipUnless(hasattr(os, "openpty"), "requires a POSIX pseudo-terminal")
+class TestUARTPool(unittest.TestCase):
+    def setUp(self):
+        self.ptys = [os.openpty() for _ in range(3)]
+        self.names = [os.ttyname(slave) for _, slave in self.ptys]
+        self.pool = UARTPool(codec="json")
+
+    def tearDown(self):
+        self.pool.stop()
+        for master, slave in self.ptys:
+            for fd in (master, slave):
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+
+    def wait_until(self, condition):
+        deadline = time.monotonic() + 2
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return condition()
+
+    def test_routes_frames_from_many_ports_on_one_thread(self):
+        received = []
+        threads = set()
+
+        def callback(port, message):
+            threads.add(threading.current_thread().name)
+            received.append((port, message))
+
+        self.assertEqual(self.pool.open_port(self.names[0], callback=callback), f"Connected to {self.names[0]}")
+        self.pool.open_port(self.names[1], callback=callback)
+        self.pool.open_port(self.names[2])
+        self.pool.start()
+        for index, (master, _) in enumerate(self.ptys):
+            os.write(master, b'{"type":"cell","r":0,"c":%d,"v":"X"}\r\n' % index)
+        self.assertTrue(self.wait_until(lambda: len(received) == 2))
+        self.assertTrue(self.wait_until(lambda: self.pool.stats()["frames_in"] == 3))
+        self.assertEqual(threads, {"uart-pool"})
+        self.assertEqual(sorted(port for port, _ in received), sorted(self.names[:2]))
+        self.assertEqual(self.pool.receive_messages(self.names[2]), [{"type": "cell", "r": 0, "c": 2, "v": "X"}])
+        stats = self.pool.stats()
+        self.assertEqual(stats["ports"], 3)
+        self.assertEqual(stats["per_port"][self.names[0]]["frames_in"], 1)
+
+    def test_send_and_close(self):
+        self.pool.open_port(self.names[0])
+        self.pool.start()
+        self.assertEqual(self.pool.send_message(self.names[0], {"command": "RESET"}), 'Sent: {"command": "RESET"}')
+        self.assertEqual(os.read(self.ptys[0][0], 64), b'{"command": "RESET"}\n')
+        self.pool.close_port(self.names[0])
+        self.assertEqual(self.pool.send_message(self.names[0], {"command": "RESET"}), "Port not opened")
+        self.assertEqual(len(self.pool), 0)
+
+    def test_open_failure(self):
+        self.assertTrue(self.pool.open_port("/dev/does-not-exist").startswith("Error:"))
+
+
 class TestGameCommands(unittest.TestCase):
     def setUp(self):
         self.uart = UARTCommunication()  # Ensure uart is set up for each test
@@ -98,7 +1629,7 @@ class TestGameCommands(unittest.TestCase):
         output_text = scrolledtext.ScrolledText(root, width=50, height=10)
 
         # Simulate no data received
-        mock_serial().readline.return_value = b''
+        mock_serial().read.return_value = b''
         auto_receive(self.uart, buttons, output_text, root) 
 
         # Check if no board update happens
@@ -114,8 +1645,8 @@ class TestGameCommands(unittest.TestCase):
 
     @patch('serial.Serial')
     def test_auto_receive_valid_response(self, mock_serial):
-        mock_serial.return_value = MagicMock(is_open=True, in_waiting=1)
-        mock_serial().readline.return_value = b'{"board": [["X", "O", "X"], ["O", "X", "O"], ["X", "O", "X"]]}'
+        mock_serial.return_value = MagicMock(is_open=True, in_waiting=65)
+        mock_serial().read.return_value = b'{"board": [["X", "O", "X"], ["O", "X", "O"], ["X", "O", "X"]]}\r\n'
         self.uart.ser = mock_serial()
         root = Tk()
         buttons = [[tk.Button(root, text=" ") for _ in range(3)] for _ in range(3)]
@@ -132,8 +1663,8 @@ class TestGameCommands(unittest.TestCase):
 
     @patch('serial.Serial')
     def test_auto_receive_invalid_json(self, mock_serial):
-        mock_serial.return_value = MagicMock(is_open=True, in_waiting=1)
-        mock_serial().readline.return_value = b'{"board": [["X", "O", "X"], ["O", "X", "O"]]}'
+        mock_serial.return_value = MagicMock(is_open=True, in_waiting=48)
+        mock_serial().read.return_value = b'{"board": [["X", "O", "X"], ["O", "X", "O"]]}\r\n'
         self.uart.ser = mock_serial()
         root = Tk()
         buttons = [[tk.Button(root, text=" ") for _ in range(3)] for _ in range(3)]
@@ -17,6 +17,58 @@ bool gameOver = false;
 /// The game mode: 0 = Player vs Player, 1 = Player vs AI, 2 = AI vs AI.
 int gameMode = 0;
 
+/// True once the host has switched the link to the binary protocol.
+bool binaryMode = false;
+
+/// Receive buffer for one COBS-encoded binary command frame.
+uint8_t rxFrame[16];
+
+/// Number of bytes currently held in rxFrame.
+size_t rxLength = 0;
+
+/// True once the host has enabled "*HH" CRC-8 suffixes on JSON frames.
+bool jsonChecksum = false;
+
+/// The "id" of the JSON command being executed, echoed in every reply; -1 if none.
+long requestId = -1;
+
+/// The serial baud rate currently in use.
+unsigned long currentBaud = 9600;
+
+/// The baud rate to return to if a BAUD switch is not confirmed by a PING.
+unsigned long previousBaud = 9600;
+
+/// True while a BAUD switch waits for its confirming PING.
+bool baudPending = false;
+
+/// millis() value after which an unconfirmed BAUD switch is rolled back.
+unsigned long baudDeadline = 0;
+
+/// How long the host has to confirm a BAUD switch with a PING.
+const unsigned long BAUD_COMMIT_TIMEOUT_MS = 2000;
+
+/// Binary opcodes, see BinaryProtocol in Game.py.
+const uint8_t OP_MODE = 0x10;
+const uint8_t OP_RESET = 0x20;
+const uint8_t OP_PROTO_JSON = 0x30;
+const uint8_t OP_BOARD_REQUEST = 0x40;
+const uint8_t OP_PING = 0x50;
+const uint8_t OP_BOARD = 0x80;
+const uint8_t OP_CELL = 0x81;
+const uint8_t OP_EVENT = 0x90;
+const uint8_t OP_PROTO_ACK_JSON = 0xA0;
+const uint8_t OP_PONG = 0xB0;
+
+/// Events reported to the host; the values match BINARY_EVENTS in Game.py.
+enum EventId {
+    EVT_STARTED = 0,
+    EVT_INVALID_MOVE = 1,
+    EVT_WIN = 2,
+    EVT_DRAW = 3,
+    EVT_RESET = 4,
+    EVT_MODE = 5
+};
+
 /**
  * @brief Initializes the game board and resets game state.
  *        All cells are set to an empty space (' '), and the current player is set to 'X'.
@@ -32,25 +84,144 @@ void initializeBoard() {
     gameOver = false;    // Reset the game over flag
 }
 
+/**
+ * @brief Computes the CRC-8 (polynomial 0x07, initial value 0) of a buffer.
+ * @param data The bytes to checksum.
+ * @param length The number of bytes.
+ * @return The 8-bit checksum.
+ */
+uint8_t crc8(const uint8_t* data, size_t length) {
+    uint8_t crc = 0;
+    for (size_t i = 0; i < length; i++) {
+        crc ^= data[i];
+        for (int bit = 0; bit < 8; bit++) {
+            crc = (crc & 0x80) ? (uint8_t)((crc << 1) ^ 0x07) : (uint8_t)(crc << 1);
+        }
+    }
+    return crc;
+}
+
+/**
+ * @brief Writes a JSON document as one newline-terminated frame.
+ * @param doc The document to send.
+ *
+ * With checksums enabled the frame ends in '*' and the CRC-8 of the JSON
+ * text as two hex digits, see add_checksum() in Game.py.
+ */
+void sendJsonDocument(const JsonDocument& doc) {
+    static const char HEX_DIGITS[] = "0123456789ABCDEF";
+    char text[160];
+    size_t length = serializeJson(doc, text, sizeof(text));
+    Serial.write((const uint8_t*)text, length);
+    if (jsonChecksum) {
+        uint8_t crc = crc8((const uint8_t*)text, length);
+        Serial.write('*');
+        Serial.write(HEX_DIGITS[crc >> 4]);
+        Serial.write(HEX_DIGITS[crc & 0x0F]);
+    }
+    Serial.println();
+}
+
 /**
  * @brief Sends a JSON message over Serial.
  * @param type The type of the message (e.g., "info", "error", "win_status").
  * @param message The content of the message to be sent.
  * 
  * This function is used for communicating game state or errors to an external interface.
+ * The id of the command being executed, if any, is echoed in the message.
  */
 void sendJsonMessage(const char* type, const char* message) {
     StaticJsonDocument<200> doc;
     doc["type"] = type;
     doc["message"] = message;
-    serializeJson(doc, Serial); // Serialize the JSON and send it via Serial
-    Serial.println();
+    if (requestId >= 0) doc["id"] = requestId;
+    sendJsonDocument(doc); // Serialize the JSON and send it via Serial
+}
+
+/**
+ * @brief Sends a payload as a binary frame: COBS(payload + CRC8) followed by a zero byte.
+ * @param payload The payload bytes (at most 8).
+ * @param length The number of payload bytes.
+ */
+void sendBinaryFrame(const uint8_t* payload, size_t length) {
+    uint8_t data[9];
+    uint8_t encoded[11];
+    memcpy(data, payload, length);
+    data[length] = crc8(payload, length);
+    length++;
+
+    size_t codeIndex = 0;
+    size_t out = 1;
+    uint8_t code = 1;
+    for (size_t i = 0; i < length; i++) {
+        if (data[i] == 0) {
+            encoded[codeIndex] = code; // Close the block at the zero byte
+            codeIndex = out++;
+            code = 1;
+        } else {
+            encoded[out++] = data[i];
+            code++;
+        }
+    }
+    encoded[codeIndex] = code;
+    encoded[out++] = 0; // Frame delimiter
+    Serial.write(encoded, out);
 }
 
 /**
- * @brief Sends the current state of the game board as a JSON message.
+ * @brief Reports a game event to the host in the active protocol.
+ * @param id The event to report.
+ * @param arg The event argument: the winning player for EVT_WIN, the mode digit for EVT_MODE, otherwise 0.
+ */
+void sendEvent(EventId id, char arg) {
+    if (binaryMode) {
+        uint8_t payload[2] = {(uint8_t)(OP_EVENT | id), (uint8_t)arg};
+        sendBinaryFrame(payload, arg ? 2 : 1);
+        return;
+    }
+    char message[32];
+    switch (id) {
+        case EVT_STARTED:
+            sendJsonMessage("info", "TicTacToe Game Started");
+            break;
+        case EVT_INVALID_MOVE:
+            sendJsonMessage("error", "Invalid move.");
+            break;
+        case EVT_WIN:
+            snprintf(message, sizeof(message), "Player %c wins!", arg);
+            sendJsonMessage("win_status", message);
+            break;
+        case EVT_DRAW:
+            sendJsonMessage("win_status", "It's a draw!");
+            break;
+        case EVT_RESET:
+            sendJsonMessage("game_status", "Game reset.");
+            break;
+        case EVT_MODE:
+            snprintf(message, sizeof(message), "Game mode set to %c", arg);
+            sendJsonMessage("game_mode", message);
+            break;
+    }
+}
+
+/**
+ * @brief Sends the current state of the game board in the active protocol.
+ *
+ * In binary mode the board is packed two bits per cell (0 = empty, 1 = X, 2 = O)
+ * into three little-endian bytes after the OP_BOARD opcode.
  */
 void sendBoardState() {
+    if (binaryMode) {
+        uint32_t packed = 0;
+        for (int i = 0; i < BOARD_SIZE * BOARD_SIZE; i++) {
+            char cell = board[i / BOARD_SIZE][i % BOARD_SIZE];
+            uint32_t code = cell == 'X' ? 1 : (cell == 'O' ? 2 : 0);
+            packed |= code << (2 * i);
+        }
+        uint8_t payload[4] = {OP_BOARD, (uint8_t)packed, (uint8_t)(packed >> 8), (uint8_t)(packed >> 16)};
+        sendBinaryFrame(payload, sizeof(payload));
+        return;
+    }
     StaticJsonDocument<300> doc;
     doc["type"] = "board"; // Indicate the message contains the board state
     JsonArray boardArray = doc.createNestedArray("board");
@@ -60,8 +231,99 @@ void sendBoardState() {
             row.add(String(board[i][j])); // Add each cell value to the row
         }
     }
-    serializeJson(doc, Serial); // Send the JSON-encoded board state
-    Serial.println();
+    if (requestId >= 0) doc["id"] = requestId;
+    sendJsonDocument(doc); // Send the JSON-encoded board state
+}
+
+/**
+ * @brief Sends a single-cell delta after a move, in the active protocol.
+ * @param row The row index of the changed cell.
+ * @param col The column index of the changed cell.
+ *
+ * Full board snapshots are only sent on RESET, MODE and BOARD; every move is
+ * reported as {"type":"cell","r":row,"c":col,"v":symbol}. In binary mode the
+ * delta is the OP_CELL opcode followed by (3 * row + col) << 2 | cell code.
+ */
+void sendCellUpdate(int row, int col) {
+    char cell = board[row][col];
+    if (binaryMode) {
+        uint8_t code = cell == 'X' ? 1 : (cell == 'O' ? 2 : 0);
+        uint8_t payload[2] = {OP_CELL, (uint8_t)(((row * BOARD_SIZE + col) << 2) | code)};
+        sendBinaryFrame(payload, sizeof(payload));
+        return;
+    }
+    StaticJsonDocument<128> doc;
+    char symbol[2] = {cell, '\0'};
+    doc["type"] = "cell";
+    doc["r"] = row;
+    doc["c"] = col;
+    doc["v"] = symbol;
+    if (requestId >= 0) doc["id"] = requestId;
+    sendJsonDocument(doc);
+}
+
+/**
+ * @brief Answers a PING in the active protocol.
+ */
+void sendPong() {
+    if (binaryMode) {
+        uint8_t payload[1] = {OP_PONG};
+        sendBinaryFrame(payload, 1);
+        return;
+    }
+    StaticJsonDocument<64> doc;
+    doc["type"] = "pong";
+    if (requestId >= 0) doc["id"] = requestId;
+    sendJsonDocument(doc);
+}
+
+/**
+ * @brief Checks whether a baud rate may be negotiated with the BAUD command.
+ * @param baud The requested baud rate.
+ * @return True for the supported standard rates up to 1000000.
+ */
+bool isSupportedBaud(unsigned long baud) {
+    const unsigned long rates[] = {9600, 19200, 38400, 57600, 115200, 250000, 500000, 1000000};
+    for (size_t i = 0; i < sizeof(rates) / sizeof(rates[0]); i++) {
+        if (rates[i] == baud) return true;
+    }
+    return false;
+}
+
+/**
+ * @brief Handles a BAUD command: acknowledges at the old rate, then switches.
+ * @param baud The requested baud rate.
+ *
+ * The new rate stays provisional until the host sends a PING at that rate;
+ * without one, loop() rolls back to the previous rate after BAUD_COMMIT_TIMEOUT_MS.
+ */
+void handleBaud(unsigned long baud) {
+    StaticJsonDocument<96> doc;
+    doc["type"] = "baud";
+    doc["baud"] = isSupportedBaud(baud) ? baud : currentBaud;
+    if (requestId >= 0) doc["id"] = requestId;
+    sendJsonDocument(doc); // Acknowledge at the current rate
+    if (!isSupportedBaud(baud) || baud == currentBaud) return;
+
+    Serial.flush();
+    Serial.end();
+    Serial.begin(baud);
+    previousBaud = currentBaud;
+    currentBaud = baud;
+    baudPending = true;
+    baudDeadline = millis() + BAUD_COMMIT_TIMEOUT_MS;
+}
+
+/**
+ * @brief Rolls back an unconfirmed BAUD switch once its deadline has passed.
+ */
+void checkBaudTimeout() {
+    if (baudPending && (long)(millis() - baudDeadline) >= 0) {
+        Serial.end();
+        Serial.begin(previousBaud);
+        currentBaud = previousBaud;
+        baudPending = false;
+    }
 }
 
 /**
@@ -105,14 +367,15 @@ bool checkDraw() {
  * 
  * The function randomly selects an empty cell on the board and places the AI's symbol there.
  * This logic is used for basic AI functionality.
+ * @return The index (3 * row + col) of the chosen cell.
  */
-void aiMoveRandom() {
+int aiMoveRandom() {
     while (true) {
         int row = random(0, BOARD_SIZE);
         int col = random(0, BOARD_SIZE);
         if (board[row][col] == ' ') { // Check if the cell is empty
             board[row][col] = currentPlayer; // Place the AI's symbol
-            break; // Exit the loop after a valid move
+            return row * BOARD_SIZE + col; // Exit the loop after a valid move
         }
     }
 }
@@ -121,25 +384,24 @@ void aiMoveRandom() {
  * @brief Handles the AI vs AI game mode, where both players are controlled by AI.
  * 
  * This function alternates between AI players making moves until there is a winner or a draw.
- * After each move, the board state is sent to the external interface.
+ * After each move, the changed cell is sent to the external interface.
  */
 void handleAiVsAi() {
     while (!gameOver) {
         if (checkDraw()) {
-            sendJsonMessage("win_status", "It's a draw!");
+            sendEvent(EVT_DRAW, 0);
             gameOver = true;
             return;
         }
-        aiMoveRandom(); // AI makes a random move
+        int cell = aiMoveRandom(); // AI makes a random move
         if (checkWin()) {
-            String message = "Player " + String(currentPlayer) + " wins!";
-            sendBoardState();
-            sendJsonMessage("win_status", message.c_str());
+            sendCellUpdate(cell / BOARD_SIZE, cell % BOARD_SIZE);
+            sendEvent(EVT_WIN, currentPlayer);
             gameOver = true;
             return;
         }
         currentPlayer = (currentPlayer == 'X') ? 'O' : 'X'; // Switch players
-        sendBoardState(); // Send the board state after each move
+        sendCellUpdate(cell / BOARD_SIZE, cell % BOARD_SIZE); // Send the changed cell after each move
     }
 }
 
@@ -156,11 +418,10 @@ bool makeMove(int row, int col) {
     if (row >= 0 && row < BOARD_SIZE && col >= 0 && col < BOARD_SIZE && board[row][col] == ' ' && !gameOver) {
         board[row][col] = currentPlayer; // Place the current player's symbol
         if (checkWin()) {
-            String message = "Player " + String(currentPlayer) + " wins!";
-            sendJsonMessage("win_status", message.c_str());
+            sendEvent(EVT_WIN, currentPlayer);
             gameOver = true;
         } else if (checkDraw()) {
-            sendJsonMessage("win_status", "It's a draw!");
+            sendEvent(EVT_DRAW, 0);
             gameOver = true;
         } else {
             currentPlayer = (currentPlayer == 'X') ? 'O' : 'X'; // Switch to the other player
@@ -176,62 +437,198 @@ bool makeMove(int row, int col) {
  * This function runs once when the Arduino is powered on or reset.
  */
 void setup() {
-    Serial.begin(9600); // Initialize Serial communication
+    Serial.begin(currentBaud); // Initialize Serial communication
     initializeBoard();  // Initialize the game board
-    sendJsonMessage("info", "TicTacToe Game Started"); // Send a startup message
+    sendEvent(EVT_STARTED, 0); // Send a startup message
+}
+
+/**
+ * @brief Executes one decoded command and runs any AI turn that follows it.
+ * @param command The command name: "MOVE", "RESET", "MODE", "BOARD" or "PING".
+ * @param row The row for MOVE.
+ * @param col The column for MOVE.
+ * @param mode The game mode for MODE.
+ */
+void executeCommand(const char* command, int row, int col, int mode) {
+    if (strcmp(command, "MOVE") == 0) { // Handle a move command
+        if (makeMove(row, col)) {
+            sendCellUpdate(row, col);
+        } else {
+            sendEvent(EVT_INVALID_MOVE, 0);
+        }
+    } else if (strcmp(command, "RESET") == 0) { // Handle game reset
+        initializeBoard();
+        sendEvent(EVT_RESET, 0);
+        sendBoardState();
+    } else if (strcmp(command, "MODE") == 0) { // Handle mode change
+        gameMode = mode;
+        sendEvent(EVT_MODE, '0' + gameMode);  // Send game mode message first
+        initializeBoard();
+        sendEvent(EVT_RESET, 0);
+        sendBoardState();
+    } else if (strcmp(command, "BOARD") == 0) { // Handle a snapshot request
+        sendBoardState();
+        return;
+    } else if (strcmp(command, "PING") == 0) { // Handle a liveness check
+        baudPending = false; // A PING at the new rate confirms a BAUD switch
+        sendPong();
+        return;
+    }
+
+    // Handle AI moves if applicable
+    if (gameMode == 1 && !gameOver && currentPlayer == 'O') {
+        int cell = aiMoveRandom();// Make a random move for the AI
+        if (checkWin()) {
+            sendEvent(EVT_WIN, currentPlayer);
+            gameOver = true;
+        } else if (checkDraw()) {
+            sendEvent(EVT_DRAW, 0);
+            gameOver = true;
+        }
+        currentPlayer = 'X'; // Switch back to Player X
+        sendCellUpdate(cell / BOARD_SIZE, cell % BOARD_SIZE);
+    } else if (gameMode == 2 && !gameOver) {
+        handleAiVsAi(); // Handle AI vs AI
+    }
+}
+
+/**
+ * @brief Verifies and strips the "*HH" CRC-8 suffix from a command line.
+ * @param input The received line; the suffix is removed in place.
+ * @return False if the suffix does not match, or is missing while checksums are on.
+ */
+bool checkJsonChecksum(String& input) {
+    input.trim();
+    int star = input.length() - 3;
+    if (star < 0 || input[star] != '*') return !jsonChecksum; // Unchecked lines only while checksums are off
+    uint8_t expected = (uint8_t)strtol(input.c_str() + star + 1, NULL, 16);
+    uint8_t actual = crc8((const uint8_t*)input.c_str(), star);
+    input.remove(star);
+    return actual == expected;
+}
+
+/**
+ * @brief Reads and executes one newline-terminated JSON command.
+ *
+ * An optional integer "id" field is echoed in every reply to the command so
+ * the host can match responses to pipelined requests. Lines with a wrong
+ * or, while checksums are on, a missing checksum are dropped.
+ */
+void readJsonCommand() {
+    StaticJsonDocument<200> doc;
+    String input = Serial.readStringUntil('\n'); // Read the incoming command
+    if (!checkJsonChecksum(input)) return;
+    DeserializationError error = deserializeJson(doc, input);
+
+    if (!error) { // Ensure the JSON command is valid
+        const char* command = doc["command"] | "";
+        requestId = doc["id"] | -1L;
+        if (strcmp(command, "PROTO") == 0) { // Handle protocol negotiation
+            const char* proto = doc["proto"] | "json";
+            bool binary = strcmp(proto, "binary") == 0;
+            StaticJsonDocument<64> reply;
+            reply["type"] = "proto";
+            reply["proto"] = binary ? "binary" : "json";
+            if (requestId >= 0) reply["id"] = requestId;
+            sendJsonDocument(reply); // Acknowledge in JSON, then switch
+            Serial.flush();
+            binaryMode = binary;
+            rxLength = 0;
+            requestId = -1;
+            return;
+        }
+        if (strcmp(command, "CRC") == 0) { // Handle checksum negotiation
+            StaticJsonDocument<64> reply;
+            reply["type"] = "crc";
+            reply["enable"] = doc["enable"] | false;
+            if (requestId >= 0) reply["id"] = requestId;
+            sendJsonDocument(reply); // Acknowledge with the old setting, then switch
+            jsonChecksum = doc["enable"] | false;
+            requestId = -1;
+            return;
+        }
+        if (strcmp(command, "BAUD") == 0) { // Handle baud rate negotiation
+            handleBaud(doc["baud"] | 0UL);
+            requestId = -1;
+            return;
+        }
+        executeCommand(command, doc["row"], doc["col"], doc["mode"]);
+        requestId = -1;
+    }
+}
+
+/**
+ * @brief Decodes a COBS frame in place and executes the binary command it carries.
+ * @param frame The received frame without its zero delimiter.
+ * @param length The number of bytes in the frame.
+ *
+ * Frames with invalid stuffing or a CRC mismatch are ignored.
+ */
+void handleBinaryFrame(uint8_t* frame, size_t length) {
+    uint8_t data[sizeof(rxFrame)];
+    size_t size = 0;
+    size_t index = 0;
+    while (index < length) {
+        uint8_t code = frame[index];
+        if (code == 0 || index + code > length) return;
+        for (size_t i = index + 1; i < index + code; i++) data[size++] = frame[i];
+        index += code;
+        if (code != 0xFF && index < length) data[size++] = 0;
+    }
+    if (size != 2 || crc8(data, 1) != data[1]) return;
+
+    uint8_t opcode = data[0];
+    if (opcode < BOARD_SIZE * BOARD_SIZE) {
+        executeCommand("MOVE", opcode / BOARD_SIZE, opcode % BOARD_SIZE, gameMode);
+    } else if ((opcode & 0xF0) == OP_MODE && (opcode & 0x0F) < 3) {
+        executeCommand("MODE", 0, 0, opcode & 0x0F);
+    } else if (opcode == OP_RESET) {
+        executeCommand("RESET", 0, 0, gameMode);
+    } else if (opcode == OP_BOARD_REQUEST) {
+        executeCommand("BOARD", 0, 0, gameMode);
+    } else if (opcode == OP_PING) {
+        executeCommand("PING", 0, 0, gameMode);
+    } else if (opcode == OP_PROTO_JSON) {
+        uint8_t payload[1] = {OP_PROTO_ACK_JSON};
+        sendBinaryFrame(payload, 1); // Acknowledge in binary, then switch
+        Serial.flush();
+        binaryMode = false;
+    }
+}
+
+/**
+ * @brief Collects binary command bytes and dispatches each complete frame.
+ */
+void readBinaryCommands() {
+    while (binaryMode && Serial.available() > 0) {
+        uint8_t byte = Serial.read();
+        if (byte == 0) {
+            if (rxLength <= sizeof(rxFrame)) {
+                handleBinaryFrame(rxFrame, rxLength);
+            }
+            rxLength = 0;
+        } else if (rxLength < sizeof(rxFrame)) {
+            rxFrame[rxLength++] = byte;
+        } else {
+            rxLength = sizeof(rxFrame) + 1; // Too long: drop bytes until the next delimiter
+        }
+    }
 }
 
 /**
  * @brief Arduino loop function, handles game commands received over Serial.
  * 
- * This function listens for JSON-formatted commands to perform actions such as making a move,
- * resetting the game, or changing the game mode.
+ * This function listens for JSON-formatted commands (or binary frames after a
+ * PROTO handshake) to perform actions such as making a move, resetting the game,
+ * or changing the game mode.
  */
 void loop() {
+    checkBaudTimeout();
     if (Serial.available() > 0) {
-        StaticJsonDocument<200> doc;
-        String input = Serial.readStringUntil('\n'); // Read the incoming command
-        DeserializationError error = deserializeJson(doc, input);
-
-        if (!error) { // Ensure the JSON command is valid
-            const char* command = doc["command"];
-            if (strcmp(command, "MOVE") == 0) { // Handle a move command
-                int row = doc["row"];
-                int col = doc["col"];
-                if (makeMove(row, col)) {
-                    sendBoardState();
-                } else {
-                    sendJsonMessage("error", "Invalid move.");
-                }
-            } else if (strcmp(command, "RESET") == 0) { // Handle game reset
-                initializeBoard();
-                sendJsonMessage("game_status", "Game reset.");
-                sendBoardState();
-            } else if (strcmp(command, "MODE") == 0) { // Handle mode change
-                gameMode = doc["mode"];
-                String message = "Game mode set to " + String(gameMode);
-                sendJsonMessage("game_mode", message.c_str());  // Send game mode message first
-                initializeBoard();
-                sendJsonMessage("game_status", "Game reset.");
-                sendBoardState();
-            }
-
-            // Handle AI moves if applicable
-            if (gameMode == 1 && !gameOver && currentPlayer == 'O') {
-                aiMoveRandom();// Make a random move for the AI
-                if (checkWin()) {
-                    String message = "Player " + String(currentPlayer) + " wins!";
-                    sendJsonMessage("win_status", message.c_str());
-                    gameOver = true;
-                } else if (checkDraw()) {
-                    sendJsonMessage("win_status", "It's a draw!");
-                    gameOver = true;
-                }
-                currentPlayer = 'X'; // Switch back to Player X
-                sendBoardState();
-            } else if (gameMode == 2 && !gameOver) {
-                handleAiVsAi(); // Handle AI vs AI
-            }
+        if (binaryMode) {
+            readBinaryCommands();
+        } else {
+            readJsonCommand();
         }
     }
 }